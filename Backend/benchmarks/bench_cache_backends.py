@@ -0,0 +1,110 @@
+"""Compare the cache backends: per-operation latency, and hit rates across worker processes.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_cache_backends --workers 4 --keys 200 --requests 500
+
+The Redis backend runs against the local stand-in in `benchmarks.fake_redis`
+unless `--redis-url` points at a real server.
+
+Part one times `get` (hit and miss) and `set` of a scan-sized value on each
+backend. Part two starts `--workers` processes, like uvicorn or gunicorn
+workers, that each serve `--requests` lookups of `--keys` distinct scans,
+storing the result after every miss as the app does after a model call. With
+the memory backend every worker warms its own cache; with a shared one a
+result computed by one worker is a hit for the others, so fewer misses (model
+calls) are paid overall.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Callable, List, Optional
+
+from benchmarks.fake_redis import FakeRedisServer
+from utils.Cache.backends import CacheBackend, MemoryBackend, RedisBackend, SQLiteBackend
+
+
+def _backend(kind: str, namespace: str, sqlite_path: str, redis_url: str) -> CacheBackend:
+    bounds = {"max_entries": 10_000, "max_bytes": 256 * 1024 * 1024, "default_ttl": 3600}
+    if kind == "memory":
+        return MemoryBackend(namespace, **bounds)
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path, namespace, **bounds)
+    return RedisBackend(redis_url, "bench", namespace, **bounds)
+
+
+def _median_us(fn: Callable[[int], object], runs: int) -> float:
+    samples: List[float] = []
+    for i in range(runs):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def _worker(
+    kind: str, seed: int, keys: int, requests: int, value_size: int, sqlite_path: str, redis_url: str
+) -> tuple[int, int]:
+    backend = _backend(kind, "shared", sqlite_path, redis_url)
+    rng = random.Random(seed)
+    value = b"x" * value_size
+    for _ in range(requests):
+        key = f"scan-{rng.randrange(keys)}"
+        if backend.get(key) is None:
+            backend.set(key, value)
+    return backend.hits, backend.misses
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500, help="lookups per worker")
+    parser.add_argument("--value-kib", type=int, default=20, help="size of a cached scan")
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--redis-url", help="a real Redis server instead of the local stand-in")
+    args = parser.parse_args(argv)
+
+    with ExitStack() as stack:
+        tmp = stack.enter_context(tempfile.TemporaryDirectory())
+        sqlite_path = os.path.join(tmp, "cache.db")
+        redis_url = args.redis_url or stack.enter_context(FakeRedisServer()).url
+        value = os.urandom(args.value_kib * 1024)
+
+        print(f"{'backend':>8} {'get hit µs':>11} {'get miss µs':>12} {'set µs':>8}")
+        for kind in ("memory", "sqlite", "redis"):
+            backend = _backend(kind, "latency", sqlite_path, redis_url)
+            backend.clear()
+            set_us = _median_us(lambda i: backend.set(f"k{i}", value), args.runs)
+            hit_us = _median_us(lambda i: backend.get(f"k{i}"), args.runs)
+            miss_us = _median_us(lambda i: backend.get(f"missing{i}"), args.runs)
+            print(f"{kind:>8} {hit_us:>11.1f} {miss_us:>12.1f} {set_us:>8.1f}")
+
+        print(f"\n{args.workers} workers, {args.keys} distinct scans, {args.requests} lookups each")
+        print(f"{'backend':>8} {'hit rate':>9} {'misses':>7} {'seconds':>8}")
+        context = multiprocessing.get_context("spawn")
+        for kind in ("memory", "sqlite", "redis"):
+            _backend(kind, "shared", sqlite_path, redis_url).clear()
+            started = time.perf_counter()
+            with context.Pool(args.workers) as pool:
+                results = pool.starmap(
+                    _worker,
+                    [
+                        (kind, seed, args.keys, args.requests, len(value), sqlite_path, redis_url)
+                        for seed in range(args.workers)
+                    ],
+                )
+            elapsed = time.perf_counter() - started
+            hits = sum(h for h, _ in results)
+            misses = sum(m for _, m in results)
+            print(f"{kind:>8} {hits / (hits + misses):>9.1%} {misses:>7} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""End-to-end load test of the API against local GitHub, GenAI and DB stand-ins.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_end_to_end --users 50 --scans 40 --concurrency 10
+
+Starts `main.app` under uvicorn with GitHub served by `FakeGithubServer`, the
+model served by `FakeGenAIServer` and a throwaway SQLite database (or
+`--database-url`), then drives signup, login, verify and run-scan phases at
+fixed concurrency. Each run is written to `benchmarks/results/<git sha>.json`;
+pass `--compare <file>` to print the change against an earlier run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.fake_genai import FakeGenAIServer
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+from benchmarks.stats import summarize
+
+RESULTS_DIR = Path(__file__).parent / "results"
+PASSWORD = "benchmark-password"
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    return {"sha": git("rev-parse", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain"))}
+
+
+class AppServer:
+    """Run `main.app` under uvicorn in a background thread on a free port."""
+
+    def __init__(self) -> None:
+        import uvicorn
+
+        import main  # imported late: the app reads its configuration from env at import
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", 0))
+        config = uvicorn.Config(main.app, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "AppServer":
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("The app failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+async def run_phase(
+    count: int,
+    concurrency: int,
+    request: Callable[[int], Awaitable[httpx.Response]],
+    expected_status: int = 200,
+) -> tuple[Dict[str, Any], List[httpx.Response]]:
+    """Issue `count` requests with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    responses: List[httpx.Response] = []
+    errors: Dict[str, int] = {}
+    next_index = iter(range(count))
+
+    async def worker() -> None:
+        for i in next_index:
+            started = time.perf_counter()
+            try:
+                response = await request(i)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            if response.status_code != expected_status:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            responses.append(response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+    summary: Dict[str, Any] = summarize(latencies, time.perf_counter() - started)
+    summary["errors"] = errors
+    return summary, responses
+
+
+async def drive(args: argparse.Namespace, base_url: str) -> Dict[str, Dict[str, Any]]:
+    phases: Dict[str, Dict[str, Any]] = {}
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+
+        def email(i: int) -> str:
+            return f"bench-{run_id}-{i}@example.com"
+
+        phases["signup"], _ = await run_phase(
+            args.users,
+            args.concurrency,
+            lambda i: client.post("/api/auth/signup", json={"email": email(i), "password": PASSWORD}),
+            expected_status=201,
+        )
+
+        phases["login"], logins = await run_phase(
+            args.users,
+            args.concurrency,
+            lambda i: client.post("/api/auth/login", json={"email": email(i), "password": PASSWORD}),
+        )
+        tokens = [r.json()["auth_token"] for r in logins]
+        if not tokens:
+            raise RuntimeError(f"No successful logins: {phases['login']['errors']}")
+
+        def auth(i: int) -> Dict[str, str]:
+            return {"Authorization": tokens[i % len(tokens)]}
+
+        phases["verify"], _ = await run_phase(
+            args.verifies,
+            args.concurrency,
+            lambda i: client.post("/api/auth/verify", headers=auth(i)),
+        )
+
+        phases["run_scan"], _ = await run_phase(
+            args.scans,
+            args.concurrency,
+            lambda i: client.post(
+                "/api/scan/run-scan",
+                json={"access_token": f"gho_bench_{i % len(tokens)}", "repo_name": "octo/synthetic"},
+                headers=auth(i),
+            ),
+        )
+    return phases
+
+
+def print_phases(phases: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]] | None) -> None:
+    print(f"{'phase':>9} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, summary in phases.items():
+        print(
+            f"{name:>9} {summary['requests']:>9} {sum(summary['errors'].values()):>7} "
+            f"{summary['throughput_rps']:>9.2f} {summary['p50_ms']:>9.2f} "
+            f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f}"
+        )
+        if baseline and name in baseline:
+            deltas = []
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+                before = baseline[name].get(metric) or 0
+                change = (summary[metric] - before) / before * 100 if before else 0.0
+                deltas.append(f"{change:>+8.1f}%")
+            print(f"{'vs base':>9} {'':>9} {'':>7} " + " ".join(deltas))
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--verifies", type=int, default=500)
+    parser.add_argument("--scans", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--dirs", type=int, default=200, help="directories in the synthetic repo")
+    parser.add_argument("--files-per-dir", type=int, default=5)
+    parser.add_argument("--github-latency", type=float, default=0.02)
+    parser.add_argument("--genai-latency", type=float, default=0.5)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument(
+        "--scan-cache",
+        choices=("off", "on"),
+        default="off",
+        help="off measures the full pipeline on every scan; on measures cache hits",
+    )
+    parser.add_argument("--output", type=Path, help="defaults to benchmarks/results/<sha>.json")
+    parser.add_argument("--compare", type=Path, help="earlier result file to diff against")
+    args = parser.parse_args(argv)
+
+    repo = SyntheticRepo(directories=args.dirs, files_per_dir=args.files_per_dir)
+    workdir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{workdir.name}/bench.db"
+
+    with FakeGithubServer(repo, args.github_latency) as github, FakeGenAIServer(args.genai_latency) as genai:
+        os.environ.update(
+            {
+                "DATABASE_URL": database_url,
+                "GITHUB_API_URL": github.url,
+                "GOOGLE_GENAI_BASE_URL": genai.url,
+                "GOOGLE_GENAI_API_KEY": os.getenv("GOOGLE_GENAI_API_KEY", "benchmark-key"),
+            }
+        )
+        if args.scan_cache == "off":
+            os.environ.update({"SCAN_CACHE_MAX_ENTRIES": "0", "SCAN_CACHE_DATABASE": "false"})
+
+        with AppServer() as app:
+            import logging
+
+            logging.getLogger().setLevel(logging.WARNING)
+            phases = asyncio.run(drive(args, app.url))
+        upstream = {"github_requests": github.request_count, "genai_requests": genai.request_count}
+
+    workdir.cleanup()
+    revision = git_revision()
+    result = {
+        "git_sha": revision["sha"],
+        "dirty": revision["dirty"],
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items() if k not in ("output", "compare")},
+        "database": database_url.split(":", 1)[0],
+        "upstream": upstream,
+        "phases": phases,
+    }
+
+    baseline = json.loads(args.compare.read_text())["phases"] if args.compare else None
+    print_phases(phases, baseline)
+
+    output = args.output or RESULTS_DIR / f"{revision['sha'][:12]}{'-dirty' if revision['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
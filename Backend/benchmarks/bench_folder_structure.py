@@ -0,0 +1,66 @@
+"""Compare the per-directory Contents crawl with the single-call Git Trees loader.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_folder_structure --sizes 10 100 500 2000 --latency 0.005
+
+For each synthetic repo size it reports how many HTTP requests and how much
+wall time each loader needs, and checks both produce the same structure.
+"""
+
+import argparse
+import time
+from typing import Callable, List
+
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+from utils.GithubScrapper.github_client import GithubClient
+from utils.GithubScrapper.Scrapper import (
+    FolderStructure,
+    get_folder_structure,
+    get_folder_structure_by_contents,
+)
+
+
+def _measure(
+    server: FakeGithubServer,
+    loader: Callable[..., FolderStructure],
+) -> tuple[FolderStructure, int, float]:
+    # No conditional-request cache, so every run pays for every request, and no
+    # rate-limit pacing, which would dominate the timings
+    client = GithubClient("benchmark-token", base_url=server.url, cache=None, limiter=None)
+    repo = client.get_repo(server.repo.full_name)
+    server.reset_count()
+    started = time.perf_counter()
+    structure = loader(repo)
+    return structure, server.request_count, time.perf_counter() - started
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--files-per-dir", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per request")
+    parser.add_argument(
+        "--truncate-limit",
+        type=int,
+        default=100_000,
+        help="entries before the fake server truncates a recursive tree",
+    )
+    args = parser.parse_args(argv)
+
+    print(f"{'dirs':>6} {'loader':>10} {'requests':>9} {'seconds':>9}")
+    for size in args.sizes:
+        repo = SyntheticRepo(directories=size, files_per_dir=args.files_per_dir)
+        with FakeGithubServer(repo, args.latency, args.truncate_limit) as server:
+            crawled, crawl_requests, crawl_time = _measure(
+                server, get_folder_structure_by_contents
+            )
+            tree, tree_requests, tree_time = _measure(server, get_folder_structure)
+        if crawled != tree:
+            raise SystemExit(f"Loaders disagree for a repo with {size} directories")
+        print(f"{size:>6} {'contents':>10} {crawl_requests:>9} {crawl_time:>9.3f}")
+        print(f"{size:>6} {'git-tree':>10} {tree_requests:>9} {tree_time:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Repeat scans against the fake GitHub server with and without the ETag cache.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_github_http_cache --dirs 500 --rescans 5
+
+Each "scan" fetches the head commit, the recursive tree and the README, the
+same GitHub calls `/api/scan/run-scan` makes. With the cache, rescans become
+conditional requests answered by empty 304s.
+"""
+
+import argparse
+import time
+from typing import List
+
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+from utils.Cache.backends import MemoryBackend
+from utils.GithubScrapper.github_client import GithubClient
+from utils.GithubScrapper.http_cache import ConditionalRequestCache
+from utils.GithubScrapper.Scrapper import (
+    get_file_content,
+    get_folder_structure,
+    get_head_commit_sha,
+)
+
+
+def _scan(client: GithubClient, full_name: str) -> None:
+    repo = client.get_repo(full_name)
+    get_folder_structure(repo, get_head_commit_sha(repo))
+    get_file_content(repo, "README.md")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dirs", type=int, default=500)
+    parser.add_argument("--rescans", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    repo = SyntheticRepo(directories=args.dirs)
+    print(f"{'mode':>10} {'requests':>9} {'304s':>6} {'seconds':>9} {'bytes saved':>12}")
+    with FakeGithubServer(repo, args.latency) as server:
+        for mode in ("no-cache", "etag"):
+            cache = (
+                ConditionalRequestCache(MemoryBackend("github_http", max_bytes=64 * 1024 * 1024))
+                if mode == "etag"
+                else None
+            )
+            client = GithubClient("benchmark-token", base_url=server.url, cache=cache, limiter=None)
+            _scan(client, repo.full_name)  # warm-up: first scan always pays in full
+            server.reset_count()
+            started = time.perf_counter()
+            for _ in range(args.rescans):
+                _scan(client, repo.full_name)
+            elapsed = time.perf_counter() - started
+            saved = cache.stats().bytes_saved if cache else 0
+            print(
+                f"{mode:>10} {server.request_count:>9} {server.not_modified_count:>6} "
+                f"{elapsed:>9.3f} {saved:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
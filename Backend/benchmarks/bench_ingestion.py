@@ -0,0 +1,124 @@
+"""Compare API-crawl ingestion with single-tarball ingestion of a repository.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_ingestion --sizes 100 1000 5000 --latency 0.02
+
+Both paths collect what a deep scan needs: the folder structure, README,
+.gitignore and the key source files. For each synthetic repo size it reports
+HTTP requests, wall time and peak Python memory, and checks that both paths
+see the same structure and pick the same key files.
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+from utils.GithubScrapper.archive import get_repo_archive
+from utils.GithubScrapper.github_client import GithubClient, GithubRepo
+from utils.GithubScrapper.Scrapper import get_file_content, get_repo_tree
+from utils.Scan.deep_scan import (
+    DEEP_SCAN_MAX_FILE_BYTES,
+    DEEP_SCAN_MAX_FILES,
+    build_key_files_prompt,
+    key_file_scorer,
+    key_files_from_archive,
+)
+from utils.Scan.prompt_builder import build_ignore_rules
+
+
+def _key_files(size: int) -> Dict[str, str]:
+    """Manifests, entry points and routes spread through the repo, plus noise."""
+    files = {
+        "package.json": '{"name": "synthetic", "dependencies": {"express": "^4"}}\n',
+        "requirements.txt": "fastapi\nsqlalchemy\n",
+        "Dockerfile": "FROM python:3.12-slim\nCOPY . /app\n",
+        ".gitignore": "dist/\n*.log\n",
+        "src/main.py": "from fastapi import FastAPI\n\napp = FastAPI()\n" * 40,
+        "node_modules/left-pad/index.js": "module.exports = () => {}\n",
+        "dist/bundle.min.js": "x" * 50_000,
+    }
+    for i in range(min(size // 20, 40)):
+        files[f"src/routes/route_{i}.py"] = f"# route {i}\n" + "def handler():\n    return {}\n" * 200
+        files[f"src/models/model_{i}.py"] = f"class Model{i}:\n    pass\n" * 100
+    return files
+
+
+def _via_api(repo: GithubRepo) -> Dict[str, Any]:
+    tree = get_repo_tree(repo)
+    get_file_content(repo, "README.md")
+    gitignore = get_file_content(repo, ".gitignore")
+    key_files = build_key_files_prompt(repo, tree.blobs, build_ignore_rules(gitignore))
+    return {"structure": tree.structure, "files": [f.path for f in key_files.files]}
+
+
+def _via_archive(repo: GithubRepo) -> Dict[str, Any]:
+    archive = get_repo_archive(
+        repo,
+        scorer=key_file_scorer(build_ignore_rules()),
+        max_samples=DEEP_SCAN_MAX_FILES,
+        max_sample_bytes=DEEP_SCAN_MAX_FILE_BYTES,
+    )
+    key_files = key_files_from_archive(archive, build_ignore_rules(archive.gitignore))
+    return {
+        "structure": archive.structure,
+        "files": [f.path for f in key_files.files],
+        "compressed_bytes": archive.stats.compressed_bytes,
+    }
+
+
+def _measure(
+    server: FakeGithubServer, ingest: Callable[[GithubRepo], Dict[str, Any]]
+) -> tuple[Dict[str, Any], int, float, int]:
+    # No conditional-request cache, so every run pays for every request, and no
+    # rate-limit pacing, which would dominate the timings
+    client = GithubClient("benchmark-token", base_url=server.url, cache=None, limiter=None)
+    repo = client.get_repo(server.repo.full_name)
+    server.reset_count()
+    started = time.perf_counter()
+    result = ingest(repo)
+    elapsed = time.perf_counter() - started
+    requests = server.request_count
+
+    # tracemalloc slows allocation down a lot, so memory gets a run of its own
+    tracemalloc.start()
+    ingest(repo)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, requests, elapsed, peak
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--files-per-dir", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    args = parser.parse_args(argv)
+
+    print(f"{'dirs':>6} {'path':>8} {'requests':>9} {'seconds':>9} {'peak MiB':>9} {'archive KiB':>12}")
+    for size in args.sizes:
+        repo = SyntheticRepo(
+            directories=size, files_per_dir=args.files_per_dir, extra_files=_key_files(size)
+        )
+        repo.tarball()  # built once up front, not inside the timed download
+        with FakeGithubServer(repo, args.latency) as server:
+            api, api_requests, api_time, api_peak = _measure(server, _via_api)
+            tar, tar_requests, tar_time, tar_peak = _measure(server, _via_archive)
+        if api["structure"] != tar["structure"]:
+            raise SystemExit(f"Ingestion paths disagree on the structure for {size} directories")
+        if sorted(api["files"]) != sorted(tar["files"]):
+            raise SystemExit(
+                f"Ingestion paths picked different key files for {size} directories:\n"
+                f"  api:     {sorted(api['files'])}\n  archive: {sorted(tar['files'])}"
+            )
+        print(f"{size:>6} {'api':>8} {api_requests:>9} {api_time:>9.3f} {api_peak / 2**20:>9.2f} {'':>12}")
+        print(
+            f"{size:>6} {'archive':>8} {tar_requests:>9} {tar_time:>9.3f} {tar_peak / 2**20:>9.2f} "
+            f"{tar['compressed_bytes'] / 1024:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
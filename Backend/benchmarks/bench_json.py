@@ -0,0 +1,122 @@
+"""Time encoding scan responses: stdlib JSONResponse vs orjson vs pre-encoded cache hits.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_json --components 50 --components 500 --components 2000
+
+For scan results of each size it times three ways of producing the
+`/run-scan` response body:
+
+- `stdlib`: what the route used to do, Starlette's JSONResponse over
+  `outcome.to_response()`;
+- `orjson`: FastJSONResponse over the same dict;
+- `cached`: FastJSONResponse over `outcome.to_response_json()` when the scan
+  cache already holds the result encoded, so only the envelope is encoded.
+
+It also checks that all three bodies decode to the same document.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+
+from utils.Http.fast_json import FastJSONResponse, orjson
+from utils.Scan.scan_cache import CachedScan, ScanCacheKey
+from utils.Scan.scan_pipeline import ScanOutcome
+
+
+WORDS = (
+    "clean modular backend frontend api service layered monolith microservice tested "
+    "documented readable scalable consistent naming folder structure separation concerns "
+    "production ready prototype messy duplicated utilities database auth caching"
+).split()
+TAGS = ["well-structured", "modular", "bloated", "unclear", "redundant", "missing-tests", "tested"]
+
+
+def _analysis(components: int, rng: random.Random) -> Dict[str, Any]:
+    """A scan result shaped like ScanAnalysis, with `components` analyzed components."""
+
+    def words(k: int) -> str:
+        return " ".join(rng.choices(WORDS, k=k))
+
+    return {
+        "name": "benchmark-repo",
+        "type": "dir",
+        "analyzed_components": [
+            {
+                "file_name": f"src/module{i // 20}/file{i}.py",
+                "file_type": "file",
+                "insights": words(30),
+                "pros": words(15),
+                "cons": words(15),
+                "tags": rng.sample(TAGS, 3),
+            }
+            for i in range(components)
+        ],
+        "score": {
+            "overall": 7,
+            "modularity": 8,
+            "naming_conventions": 7,
+            "folder_structure": 6,
+            "production_practices": 5,
+            "code_quality": 7,
+            "maintainability": 7,
+            "score_reasoning": words(60),
+        },
+        "summary": words(120),
+        "files_to_check": [[f"src/module0/file{i}.py" for i in range(5)]],
+        "documentation": {
+            "has_readme": True,
+            "readme_quality": "detailed",
+            "readme_insights": words(40),
+            "has_license": True,
+            "has_contributing": False,
+            "has_env_example": True,
+        },
+    }
+
+
+def _time(fn: Callable[[], bytes], runs: int) -> tuple[float, bytes]:
+    """Median microseconds per call, and the last body produced."""
+    body = fn()
+    samples: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        body = fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples), body
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", type=int, action="append", help="analyzed components per result")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args(argv)
+    if orjson is None:
+        print("orjson is not installed: FastJSONResponse falls back to the stdlib encoder\n")
+
+    key = ScanCacheKey("owner/benchmark-repo", "0" * 40, "prompt-hash", "model")
+    print(f"{'components':>10} {'KiB':>8} {'stdlib µs':>10} {'orjson µs':>10} {'cached µs':>10} {'speedup':>8}")
+    for components in args.components or [50, 500, 2000]:
+        data = _analysis(components, random.Random(components))
+        outcome = ScanOutcome(CachedScan.of(data), key, cache_tier="memory")
+
+        stdlib, stdlib_body = _time(lambda: JSONResponse(outcome.to_response()).body, args.runs)
+        fast, fast_body = _time(lambda: FastJSONResponse(outcome.to_response()).body, args.runs)
+        cached, cached_body = _time(lambda: FastJSONResponse(outcome.to_response_json()).body, args.runs)
+        if not json.loads(stdlib_body) == json.loads(fast_body) == json.loads(cached_body):
+            raise SystemExit(f"Response bodies differ for {components} components")
+
+        print(
+            f"{components:>10} {len(stdlib_body) / 1024:>8.1f} {stdlib:>10.1f} {fast:>10.1f} "
+            f"{cached:>10.1f} {stdlib / cached:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
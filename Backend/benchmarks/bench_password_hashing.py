@@ -0,0 +1,86 @@
+"""Login latency under concurrency: bcrypt on the event loop vs on the hasher pool.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_password_hashing --logins 200 --rounds 12
+
+Each simulated login verifies a bcrypt hash. "inline" calls `verify_password`
+directly inside the coroutine, as the login route used to; "pool" awaits
+`verify_password_async`. While the logins run, a probe coroutine measures how
+long a trivial request (think `/api/auth/verify`) waits for the event loop.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from benchmarks.stats import summarize
+from utils.Auth.hash_pass_handler import (
+    HasherOverloadedError,
+    password_hasher,
+    pwd_context,
+    verify_password,
+    verify_password_async,
+)
+
+
+async def _run(mode: str, logins: int, hashed: str) -> Dict[str, Dict[str, float]]:
+    latencies: List[float] = []
+    probe_latencies: List[float] = []
+    rejected = 0
+    done = asyncio.Event()
+
+    async def login() -> None:
+        nonlocal rejected
+        started = time.perf_counter()
+        if mode == "inline":
+            await asyncio.sleep(0)  # let every login start before the loop blocks
+            verify_password("benchmark-password", hashed)
+        else:
+            try:
+                await verify_password_async("benchmark-password", hashed)
+            except HasherOverloadedError:
+                rejected += 1
+                return
+        latencies.append(time.perf_counter() - started)
+
+    async def probe() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            probe_latencies.append(time.perf_counter() - started - 0.005)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    wall = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return {
+        "logins": {**summarize(latencies, wall), "rejected": rejected},
+        "loop_lag": summarize(probe_latencies, wall),
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    args = parser.parse_args(argv)
+
+    hashed = pwd_context.copy(bcrypt__rounds=args.rounds).hash("benchmark-password")
+    print(f"{args.logins} concurrent logins, bcrypt rounds={args.rounds}, pool workers={password_hasher.workers}")
+    for mode in ("inline", "pool"):
+        result = asyncio.run(_run(mode, args.logins, hashed))
+        logins, lag = result["logins"], result["loop_lag"]
+        print(
+            f"{mode:>7}: {logins['throughput_rps']:>8} logins/s  "
+            f"p50 {logins['p50_ms']:>9} ms  p99 {logins['p99_ms']:>9} ms  "
+            f"loop lag p99 {lag['p99_ms']:>9} ms  rejected {logins['rejected']}"
+        )
+    print(f"hasher stats: {password_hasher.stats().as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
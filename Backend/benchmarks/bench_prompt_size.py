@@ -0,0 +1,66 @@
+"""Report folder-structure prompt size: indented JSON vs the compact tree prompt.
+
+Run from the Backend directory against real repositories:
+
+    GITHUB_TOKEN=... python -m benchmarks.bench_prompt_size --repo owner/name --repo owner/other
+
+Without --repo it uses a synthetic repo (with a vendored `node_modules`
+and a large asset folder) served by the local fake GitHub server.
+"""
+
+import argparse
+import os
+from typing import List
+
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+from utils.GithubScrapper.github_client import GithubClient
+from utils.GithubScrapper.Scrapper import FolderStructure, get_file_content, get_folder_structure
+from utils.Scan.prompt_builder import build_tree_prompt
+
+
+def _report(name: str, structure: FolderStructure, gitignore: str | None) -> None:
+    stats = build_tree_prompt(structure, gitignore=gitignore).stats
+    print(
+        f"{name:<40} {stats.json_tokens:>10} {stats.compact_tokens:>10} "
+        f"{stats.saved_ratio:>8.1%} {stats.ignored_entries:>8} {stats.collapsed_dirs:>9}"
+    )
+
+
+def _synthetic_repo() -> SyntheticRepo:
+    repo = SyntheticRepo(directories=60, files_per_dir=4)
+    for i in range(400):
+        repo.files[f"node_modules/pkg{i % 40}/index{i}.js"] = b"module.exports = {}\n"
+    for i in range(300):
+        repo.files[f"public/images/img{i}.png"] = b"\x89PNG"
+    repo.dirs.extend(["node_modules", "public", "public/images"])
+    repo.dirs.extend(f"node_modules/pkg{i}" for i in range(40))
+    repo._index()
+    return repo
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repo", action="append", default=[], help="owner/name on GitHub")
+    parser.add_argument("--token", default=os.getenv("GITHUB_TOKEN", ""))
+    args = parser.parse_args(argv)
+
+    print(f"{'repository':<40} {'json tok':>10} {'tree tok':>10} {'saved':>8} {'ignored':>8} {'collapsed':>9}")
+    if args.repo:
+        client = GithubClient(args.token, base_url="https://api.github.com")
+        for name in args.repo:
+            repo = client.get_repo(name)
+            structure = get_folder_structure(repo)
+            gitignore = None
+            if isinstance(structure.get(".gitignore"), str):
+                gitignore = get_file_content(repo, ".gitignore")
+            _report(name, structure, gitignore)
+        return
+
+    synthetic = _synthetic_repo()
+    with FakeGithubServer(synthetic) as server:
+        client = GithubClient("benchmark-token", base_url=server.url)
+        _report("synthetic (fake server)", get_folder_structure(client.get_repo(synthetic.full_name)), None)
+
+
+if __name__ == "__main__":
+    main()
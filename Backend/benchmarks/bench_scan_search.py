@@ -0,0 +1,216 @@
+"""Time the stored scan search against a seeded PostgreSQL table.
+
+Run from the Backend directory, against a PostgreSQL database you can write to:
+
+    python -m benchmarks.bench_scan_search --database-url postgresql://postgres@127.0.0.1/SkillCred
+
+Everything happens in a scratch schema (dropped afterwards unless --keep),
+so the app's own tables are never touched. It seeds users and stored scans
+shaped like real analyses, then times representative searches (score
+filters, tag and file containment, summary text, deep keyset pages) through
+the same `search_scan_results` the endpoint uses, and reports the median and
+p95 latency of each.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from typing import Any, Dict, List
+
+from sqlalchemy import create_engine, insert, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database import Base
+from models import scan_cache, scan_result, user  # noqa: F401  (registers the tables on Base)
+from models.scan_result import SCORE_FIELDS, ScanResult
+from models.user import User, UserProfile
+from schemas.routesSchemas.scan import ScanSearchQuery
+from utils.Scan.scan_store import search_scan_results
+
+
+TAGS = [
+    "well-structured", "modular", "bloated", "unclear", "redundant", "missing-tests",
+    "tested", "typed", "documented", "hardcoded-secrets", "scalable", "legacy",
+]
+STACKS = [
+    ["package.json", "src/index.js", "src/routes"],
+    ["package.json", "tsconfig.json", "src/server.ts"],
+    ["requirements.txt", "app/main.py", "app/routes"],
+    ["pyproject.toml", "src/app.py", "tests"],
+    ["go.mod", "cmd/server/main.go", "internal"],
+    ["Cargo.toml", "src/main.rs"],
+    ["pom.xml", "src/main/java"],
+]
+EXTRAS = ["Dockerfile", "docker-compose.yml", ".env.example", "README.md", ".github/workflows"]
+WORDS = (
+    "clean modular backend frontend api service layered monolith microservice tested "
+    "documented readable scalable consistent naming folder structure separation concerns "
+    "production ready prototype messy duplicated utilities database auth caching"
+).split()
+
+
+def _analysis(rng: random.Random) -> Dict[str, Any]:
+    quality = rng.gauss(6, 2)
+    score = {name: max(0, min(10, round(quality + rng.gauss(0, 1.2)))) for name in SCORE_FIELDS}
+    paths = rng.choice(STACKS) + rng.sample(EXTRAS, rng.randint(0, 3))
+    components = [
+        {
+            "file_name": path,
+            "file_type": "dir" if "." not in path.rsplit("/", 1)[-1] else "file",
+            "insights": " ".join(rng.choices(WORDS, k=8)),
+            "pros": " ".join(rng.choices(WORDS, k=5)),
+            "cons": " ".join(rng.choices(WORDS, k=5)),
+            "tags": rng.sample(TAGS, rng.randint(1, 3)),
+        }
+        for path in paths
+    ]
+    return {
+        "name": f"project-{rng.randrange(10**6)}",
+        "type": "dir",
+        "analyzed_components": components,
+        "score": {**score, "score_reasoning": " ".join(rng.choices(WORDS, k=12))},
+        "summary": " ".join(rng.choices(WORDS, k=25)),
+        "files_to_check": [paths[:2]],
+        "documentation": {
+            "has_readme": True,
+            "readme_quality": rng.choice(["basic", "detailed", "exceptional", "missing", "placeholder"]),
+            "readme_insights": " ".join(rng.choices(WORDS, k=8)),
+            "has_license": rng.random() < 0.5,
+            "has_contributing": rng.random() < 0.2,
+            "has_env_example": rng.random() < 0.4,
+        },
+    }
+
+
+def seed(url: str, schema: str, scans: int, users: int, batch: int = 5000) -> float:
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    rng = random.Random(42)
+    started = time.perf_counter()
+    with engine.begin() as db:
+        db.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        db.execute(text(f'CREATE SCHEMA "{schema}"'))
+    Base.metadata.create_all(engine)
+
+    user_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(users)]
+    with engine.begin() as db:
+        for start in range(0, users, batch):
+            ids = user_ids[start : start + batch]
+            db.execute(insert(User), [{"id": i, "email": f"{i}@example.invalid"} for i in ids])
+            db.execute(
+                insert(UserProfile),
+                [{"id": uuid.uuid4(), "user_id": i, "first_name": "Candidate", "city": "Pune"} for i in ids],
+            )
+        for start in range(0, scans, batch):
+            db.execute(
+                insert(ScanResult),
+                [
+                    {
+                        "id": uuid.UUID(int=rng.getrandbits(128)),
+                        "user_id": user_ids[n % users],
+                        "repo_full_name": f"user{n % users}/repo{n}",
+                        "commit_sha": f"{n:040x}",
+                        "model": "gemini-2.5-flash",
+                        "result": _analysis(rng),
+                    }
+                    for n in range(start, min(start + batch, scans))
+                ],
+            )
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as db:
+        db.execute(text("VACUUM ANALYZE scan_results"))
+    engine.dispose()
+    return time.perf_counter() - started
+
+
+QUERIES: Dict[str, Dict[str, Any]] = {
+    "top overall": {},
+    "min scores": {"min_overall": 8, "min_modularity": 7, "min_code_quality": 7},
+    "tag, by code quality": {"tags": ["well-structured"], "sort": "code_quality"},
+    "two tags + min": {"tags": ["tested", "modular"], "min_overall": 6},
+    "stack files": {"files": ["requirements.txt", "Dockerfile"], "min_overall": 6},
+    "summary text": {"q": "clean modular backend"},
+    "text + tag + min": {"q": "scalable api", "tags": ["documented"], "min_maintainability": 7},
+    "rare: min 10": {"min_overall": 10, "min_code_quality": 10, "min_modularity": 10},
+}
+
+
+async def measure(url: str, schema: str, runs: int, pages: int, explain: bool) -> None:
+    engine = create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+    print(f"{'query':<24} {'rows':>5} {'median ms':>10} {'p95 ms':>8}")
+    async with AsyncSession(engine) as db:
+        for label, params in QUERIES.items():
+            query = ScanSearchQuery(**params)
+            timings: List[float] = []
+            for _ in range(runs + 1):  # the first run warms the cache and is dropped
+                started = time.perf_counter()
+                page = await search_scan_results(db, query)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings = sorted(timings[1:])
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{label:<24} {len(page['results']):>5} {statistics.median(timings):>10.2f} {p95:>8.2f}")
+
+        # Walk `pages` keyset pages deep: each page costs the same as the first
+        query = ScanSearchQuery(min_overall=5, limit=50)
+        walk: List[float] = []
+        for _ in range(pages):
+            started = time.perf_counter()
+            page = await search_scan_results(db, query)
+            walk.append((time.perf_counter() - started) * 1000)
+            if page["next_cursor"] is None:
+                break
+            query = query.model_copy(update={"cursor": page["next_cursor"]})
+        print(
+            f"{'keyset walk (50/page)':<24} {len(walk):>5} {statistics.median(walk):>10.2f} "
+            f"{max(walk):>8.2f}  (pages, median and slowest page)"
+        )
+
+        if explain:
+            for statement in (
+                "SELECT id FROM scan_results WHERE (result -> 'analyzed_components') @> "
+                "'[{\"tags\": [\"tested\"]}]' ORDER BY CAST(result -> 'score' ->> 'overall' AS INTEGER) DESC, id DESC LIMIT 21",
+                "SELECT id FROM scan_results WHERE to_tsvector('english', result ->> 'summary') @@ "
+                "plainto_tsquery('english', 'clean modular backend') ORDER BY "
+                "CAST(result -> 'score' ->> 'overall' AS INTEGER) DESC, id DESC LIMIT 21",
+            ):
+                plan = (await db.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}"))).scalar()
+                plan = plan if isinstance(plan, list) else json.loads(plan)
+                print(f"\n{statement[:90]}...\n  {plan[0]['Execution Time']:.2f} ms")
+    await engine.dispose()
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="postgresql:// URL (sync driver)")
+    parser.add_argument("--schema", default="bench_scan_search")
+    parser.add_argument("--scans", type=int, default=300_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--explain", action="store_true", help="print EXPLAIN ANALYZE timings of two raw queries")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded schema for another run")
+    parser.add_argument("--reuse", action="store_true", help="skip seeding and use a kept schema")
+    args = parser.parse_args(argv)
+    if make_url(args.database_url).get_backend_name() != "postgresql":
+        raise SystemExit("The search indexes are PostgreSQL-specific; pass a postgresql:// URL")
+
+    if not args.reuse:
+        elapsed = seed(args.database_url, args.schema, args.scans, args.users)
+        print(f"Seeded {args.scans} scans for {args.users} users in {elapsed:.1f}s\n")
+    try:
+        asyncio.run(measure(args.database_url, args.schema, args.runs, args.pages, args.explain))
+    finally:
+        if not args.keep:
+            engine = create_engine(args.database_url)
+            with engine.begin() as db:
+                db.execute(text(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE'))
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Cold-start cost: time to import `main` and time to the first served request.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_startup --runs 5
+
+Every sample is a fresh interpreter, started without GOOGLE_GENAI_API_KEY
+against a throwaway SQLite database. The run fails (exit code 1) when a median
+exceeds its budget or when `import main` pulls in a module that should only
+load on first use; `--importtime` lists the slowest imports to find the culprit.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+# Modules that must not be imported until a request needs them
+LAZY_MODULES = ("google.genai",)
+
+_IMPORT_PROBE = f"""
+import sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+eager = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+print(elapsed, ",".join(eager))
+"""
+
+
+def _env(database_url: str) -> Dict[str, str]:
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("GOOGLE_GENAI_API_KEY", None)
+    return env
+
+
+def measure_import(env: Dict[str, str]) -> tuple[float, List[str]]:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip().splitlines()[-1]
+    seconds, _, eager = out.partition(" ")
+    return float(seconds), [m for m in eager.split(",") if m]
+
+
+def measure_first_request(env: Dict[str, str], timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn until `GET /` answers 200."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before serving a request")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise TimeoutError(f"No response within {timeout} s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def print_slowest_imports(env: Dict[str, str], top: int) -> None:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        rows.append((int(cumulative), module.rstrip()))
+    print("\nSlowest imports (cumulative ms):")
+    for cumulative, module in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>9.1f}  {module}")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1200)
+    parser.add_argument("--first-request-budget-ms", type=float, default=2500)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="list the N slowest imports")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = _env(f"sqlite:///{workdir}/startup.db")
+        imports: List[float] = []
+        eager: set[str] = set()
+        for _ in range(args.runs):
+            seconds, loaded = measure_import(env)
+            imports.append(seconds)
+            eager.update(loaded)
+        first_requests = [measure_first_request(env) for _ in range(args.runs)]
+        if args.importtime:
+            print_slowest_imports(env, args.importtime)
+
+    import_ms = statistics.median(imports) * 1000
+    first_request_ms = statistics.median(first_requests) * 1000
+    print(f"\n{'measure':>15} {'median ms':>10} {'budget ms':>10}")
+    print(f"{'import main':>15} {import_ms:>10.1f} {args.import_budget_ms:>10.0f}")
+    print(f"{'first request':>15} {first_request_ms:>10.1f} {args.first_request_budget_ms:>10.0f}")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import main took {import_ms:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+    if first_request_ms > args.first_request_budget_ms:
+        failures.append(
+            f"first request took {first_request_ms:.0f} ms (budget {args.first_request_budget_ms:.0f} ms)"
+        )
+    if eager:
+        failures.append(f"imported at startup but should load lazily: {', '.join(sorted(eager))}")
+    if failures:
+        print("\n❌ Startup budget exceeded:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\n✅ Startup within budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Local stand-in for the Gemini REST API, for benchmarking scans offline.
+
+Point the app at it with `GOOGLE_GENAI_BASE_URL`. It answers both
+`models/{model}:generateContent` and `models/{model}:streamGenerateContent`
+(as SSE) with a canned analysis after a configurable delay: bare JSON when the
+request asks for JSON mode, a ```json block otherwise.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+def canned_analysis(components: int = 8) -> Dict[str, Any]:
+    """An answer shaped like the one `prompts/run1.txt` asks the model for."""
+    return {
+        "name": "synthetic",
+        "type": "dir",
+        "analyzed_components": [
+            {
+                "file_name": f"src/module_{i}",
+                "file_type": "dir",
+                "insights": "Groups related handlers behind a small public interface.",
+                "pros": "Consistent naming and clear separation of concerns.",
+                "cons": "No tests alongside the module.",
+                "tags": ["well-structured", "missing-tests"],
+            }
+            for i in range(components)
+        ],
+        "score": {
+            "overall": 7,
+            "modularity": 7,
+            "naming_conventions": 8,
+            "folder_structure": 7,
+            "production_practices": 6,
+            "code_quality": 7,
+            "maintainability": 7,
+            "score_reasoning": "Synthetic benchmark answer.",
+        },
+        "summary": "Synthetic benchmark answer.",
+        "files_to_check": [],
+        "documentation": {
+            "has_readme": True,
+            "readme_quality": "basic",
+            "readme_insights": "Synthetic benchmark answer.",
+            "has_license": False,
+            "has_contributing": False,
+            "has_env_example": False,
+        },
+    }
+
+
+class FakeGenAIServer:
+    """Serve canned model answers over HTTP on localhost, in a background thread.
+
+    `latency` is the time before the first byte; streamed answers are split
+    into `stream_chunks` pieces spread over `stream_interval` seconds each.
+    `text` replaces the answer verbatim, e.g. to simulate cut-off output.
+    Setting `failures` makes that many upcoming requests fail with a 500.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        answer: Optional[Dict[str, Any]] = None,
+        stream_chunks: int = 8,
+        stream_interval: float = 0.0,
+        text: Optional[str] = None,
+    ) -> None:
+        self.latency = latency
+        self.json_text = json.dumps(answer or canned_analysis(), indent=2)
+        self.raw_text = text
+        self.stream_chunks = max(stream_chunks, 1)
+        self.stream_interval = stream_interval
+        self.request_count = 0
+        self.prompt_chars = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeGenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def answer_text(self, json_mode: bool) -> str:
+        if self.raw_text is not None:
+            return self.raw_text
+        return self.json_text if json_mode else f"```json\n{self.json_text}\n```"
+
+    def _response(self, text: str, prompt_tokens: int, output_tokens: int, final: bool) -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}}
+        if final:
+            candidate["finishReason"] = "STOP"
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+        }
+
+    def _chunks(self, text: str) -> List[str]:
+        size = max(-(-len(text) // self.stream_chunks), 1)
+        return [text[i : i + size] for i in range(0, len(text), size)]
+
+    def _make_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", "0"))
+                request = self.rfile.read(length)
+                with server._lock:
+                    server.request_count += 1
+                    server.prompt_chars += len(request)
+                    fail = server.failures > 0
+                    server.failures -= fail
+                prompt_tokens = len(request) // 4
+                path = urlparse(self.path).path
+                config = json.loads(request or b"{}").get("generationConfig") or {}
+                text = server.answer_text(config.get("responseMimeType") == "application/json")
+                output_tokens = len(text) // 4
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if fail:
+                    body = json.dumps({"error": {"code": 500, "message": "injected failure", "status": "INTERNAL"}}).encode()
+                    self.send_response(500)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif path.endswith(":generateContent"):
+                    body = json.dumps(server._response(text, prompt_tokens, output_tokens, True)).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif path.endswith(":streamGenerateContent"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    chunks = server._chunks(text)
+                    try:
+                        for i, chunk in enumerate(chunks):
+                            if i and server.stream_interval:
+                                time.sleep(server.stream_interval)
+                            event = server._response(
+                                chunk, prompt_tokens, output_tokens, i == len(chunks) - 1
+                            )
+                            self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+                            self.wfile.flush()
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass  # the client stopped reading, e.g. after rejecting the output
+                    self.close_connection = True
+                else:
+                    body = json.dumps({"error": {"code": 404, "message": path}}).encode()
+                    self.send_response(404)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
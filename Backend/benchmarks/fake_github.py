@@ -0,0 +1,424 @@
+"""A small in-process fake of the GitHub REST API used by the benchmarks.
+
+It serves a synthetic repository of configurable size, adds an artificial
+per-request latency and counts every request it receives, which makes it easy
+to compare how many round trips each code path needs. Like GitHub, it sends an
+ETag with every JSON response and answers matching `If-None-Match` requests
+with an empty `304 Not Modified`. Repository tarballs are served like
+GitHub's: a redirect from the API to a separate download URL.
+"""
+
+import base64
+import difflib
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+
+
+def _sha(kind: str, path: str) -> str:
+    return hashlib.sha1(f"{kind}:{path}".encode()).hexdigest()
+
+
+def blob_sha(content: bytes) -> str:
+    """Git's blob SHA: identical contents share one, as on GitHub."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+@dataclass
+class SyntheticRepo:
+    """A generated repository: `directories` folders with `files_per_dir` files each.
+
+    `extra_files` (path -> content) are added on top, e.g. manifests and entry
+    points for deep scans.
+    """
+
+    full_name: str = "octo/synthetic"
+    directories: int = 100
+    files_per_dir: int = 5
+    branching: int = 8
+    default_branch: str = "main"
+    readme: str = "# Synthetic repo\n\nGenerated for benchmarking.\n"
+    extra_files: Dict[str, str] = field(default_factory=dict)
+    # Bump to model a new commit of the same repository (see FakeGithubServer.push)
+    revision: int = 0
+    dirs: List[str] = field(default_factory=list, init=False)
+    files: Dict[str, bytes] = field(default_factory=dict, init=False)
+    _children: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict, init=False)
+    _trees: Dict[str, str] = field(default_factory=dict, init=False)
+    blobs: Dict[str, bytes] = field(default_factory=dict, init=False)
+    _tarball: Optional[bytes] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Directory i hangs below directory (i - 1) // branching, giving a bushy tree
+        for i in range(self.directories):
+            parent = "" if i < self.branching else self.dirs[i // self.branching - 1]
+            self.dirs.append(f"{parent}/dir{i}" if parent else f"dir{i}")
+        self.files["README.md"] = self.readme.encode()
+        for directory in self.dirs:
+            for j in range(self.files_per_dir):
+                path = f"{directory}/file{j}.py"
+                self.files[path] = f"# {path}\nprint('hello')\n".encode()
+        for path, text in self.extra_files.items():
+            self.files[path] = text.encode()
+            for depth in range(path.count("/"), 0, -1):
+                parent = path.rsplit("/", depth)[0]
+                if parent not in self.dirs:
+                    self.dirs.append(parent)
+        self._index()
+
+    def _index(self) -> None:
+        self._children = {"": []}
+        for directory in self.dirs:
+            self._children[directory] = []
+            parent = directory.rsplit("/", 1)[0] if "/" in directory else ""
+            self._children[parent].append(
+                {"path": directory, "type": "tree", "sha": _sha("tree", directory)}
+            )
+        for file_path, content in self.files.items():
+            parent = file_path.rsplit("/", 1)[0] if "/" in file_path else ""
+            self._children[parent].append(
+                {"path": file_path, "type": "blob", "sha": blob_sha(content), "size": len(content)}
+            )
+        self._trees = {_sha("tree", d): d for d in self.dirs}
+        self.blobs = {blob_sha(content): content for content in self.files.values()}
+
+    def tarball(self) -> bytes:
+        """The repo as GitHub's gzipped tarball: everything below "<owner>-<repo>-<sha>/"."""
+        if self._tarball is None:
+            root = f"{self.full_name.replace('/', '-')}-{self.head_sha[:7]}"
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+                # Depth-first with each folder before its contents, like `git archive`
+                pending = [""]
+                while pending:
+                    directory = pending.pop()
+                    info = tarfile.TarInfo(f"{root}/{directory}".rstrip("/") + "/")
+                    info.type = tarfile.DIRTYPE
+                    tar.addfile(info)
+                    subdirs = []
+                    for entry in self.children(directory):
+                        if entry["type"] == "tree":
+                            subdirs.append(entry["path"])
+                            continue
+                        content = self.files[entry["path"]]
+                        info = tarfile.TarInfo(f"{root}/{entry['path']}")
+                        info.size = len(content)
+                        tar.addfile(info, io.BytesIO(content))
+                    pending.extend(reversed(subdirs))
+            self._tarball = buffer.getvalue()
+        return self._tarball
+
+    @property
+    def head_sha(self) -> str:
+        name = f"{self.full_name}@{self.revision}" if self.revision else self.full_name
+        return _sha("commit", name)
+
+    def children(self, path: str) -> List[Dict[str, Any]]:
+        """Direct children of a directory ("" is the root), dirs first."""
+        return self._children.get(path, [])
+
+    def tree_path(self, sha: str) -> Optional[str]:
+        if sha in (self.default_branch, self.head_sha, _sha("tree", "")):
+            return ""
+        return self._trees.get(sha)
+
+
+class FakeGithubServer:
+    """Serve a `SyntheticRepo` over HTTP on localhost, in a background thread.
+
+    `truncate_limit` mimics GitHub's cap on recursive tree responses: a tree
+    with more entries than that is returned cut short with `"truncated": true`.
+    JSON responses carry `X-RateLimit-*` headers for an hourly budget of
+    `rate_limit` calls (304s are free, as on GitHub); once it is spent every
+    request gets a 403. Setting `throttle` answers that many upcoming
+    requests with a secondary-rate-limit 403. `/user/repos` lists the repo
+    plus `extra_repos` generated ones, paginated with `Link` headers.
+    """
+
+    def __init__(
+        self,
+        repo: SyntheticRepo,
+        latency: float = 0.0,
+        truncate_limit: int = 100_000,
+        rate_limit: int = 5000,
+        extra_repos: int = 0,
+    ) -> None:
+        self.repo = repo
+        self.extra_repos = extra_repos
+        self.latency = latency
+        self.truncate_limit = truncate_limit
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.rate_limit = rate_limit
+        self.rate_remaining = rate_limit
+        self.rate_reset = int(time.time()) + 3600
+        self.throttle = 0
+        # Every pushed revision, by commit SHA, for the Compare API
+        self.history: Dict[str, SyntheticRepo] = {repo.head_sha: repo}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def push(self, repo: SyntheticRepo) -> None:
+        """Make `repo` the new head; earlier revisions stay comparable."""
+        self.history[repo.head_sha] = repo
+        self.repo = repo
+
+    def reset_count(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.not_modified_count = 0
+
+    def __enter__(self) -> "FakeGithubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # -------------------- ROUTES --------------------
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]]) -> tuple[int, Any]:
+        repo = self.repo
+        base = f"/repos/{repo.full_name}"
+        owner = repo.full_name.split("/")[0]
+        if path == "/user":
+            return 200, {"login": owner, "name": owner.title(), "email": f"{owner}@example.com", "html_url": f"https://github.com/{owner}"}
+        if path == "/user/repos":
+            start, stop = self._page(query)
+            return 200, self._user_repos()[start:stop]
+        if path == base:
+            return 200, {
+                "name": repo.full_name.split("/")[1],
+                "full_name": repo.full_name,
+                "default_branch": repo.default_branch,
+                "url": f"{self.url}{base}",
+            }
+        if path == f"{base}/branches/{repo.default_branch}":
+            return 200, {"name": repo.default_branch, "commit": {"sha": repo.head_sha}}
+        if path.startswith(f"{base}/git/trees/"):
+            return self._tree(path[len(f"{base}/git/trees/") :], "recursive" in query)
+        if path.startswith(f"{base}/git/blobs/"):
+            content = repo.blobs.get(unquote(path[len(f"{base}/git/blobs/") :]))
+            if content is None:
+                return 404, {"message": "Not Found"}
+            return 200, {"sha": blob_sha(content), "size": len(content), "encoding": "base64", "content": base64.b64encode(content).decode()}
+        if path.startswith(f"{base}/compare/"):
+            return self._compare(unquote(path[len(f"{base}/compare/") :]))
+        if path.startswith(f"{base}/contents"):
+            return self._contents(path[len(f"{base}/contents") :].strip("/"))
+        return 404, {"message": "Not Found"}
+
+    def _user_repos(self) -> List[Dict[str, Any]]:
+        owner = self.repo.full_name.split("/")[0]
+        names = [self.repo.full_name] + [f"{owner}/extra-{i}" for i in range(self.extra_repos)]
+        return [{"full_name": name, "default_branch": self.repo.default_branch} for name in names]
+
+    @staticmethod
+    def _page(query: Dict[str, List[str]]) -> tuple[int, int]:
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        return (page - 1) * per_page, page * per_page
+
+    def next_link(self, path: str, query: Dict[str, List[str]]) -> Optional[str]:
+        """GitHub's `Link` header pointing at the next page of `/user/repos`, if there is one."""
+        if path != "/user/repos":
+            return None
+        _, stop = self._page(query)
+        if stop >= len(self._user_repos()):
+            return None
+        page = int(query.get("page", ["1"])[0]) + 1
+        params = {**{k: v[0] for k, v in query.items()}, "page": str(page)}
+        return f'<{self.url}{path}?{urlencode(params)}>; rel="next"'
+
+    def send_archive(self, handler: BaseHTTPRequestHandler, path: str) -> bool:
+        """Serve the tarball redirect and download; False for any other path."""
+        repo = self.repo
+        download = f"/_codeload/{repo.full_name}/tar.gz/{repo.head_sha}"
+        if path.startswith(f"/repos/{repo.full_name}/tarball/"):
+            handler.send_response(302)
+            handler.send_header("Location", f"{self.url}{download}")
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return True
+        if path != download:
+            return False
+        body = repo.tarball()
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-gzip")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        try:
+            handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up, e.g. on a size limit
+        return True
+
+    def _tree(self, sha: str, recursive: bool) -> tuple[int, Any]:
+        root = self.repo.tree_path(unquote(sha))
+        if root is None:
+            return 404, {"message": "Not Found"}
+        prefix = f"{root}/" if root else ""
+        pending = [root]
+        entries: List[Dict[str, Any]] = []
+        while pending:
+            for entry in self.repo.children(pending.pop(0)):
+                entries.append({**entry, "path": entry["path"][len(prefix) :], "mode": "100644"})
+                if recursive and entry["type"] == "tree":
+                    pending.append(entry["path"])
+        truncated = len(entries) > self.truncate_limit
+        return 200, {
+            "sha": _sha("tree", root),
+            "url": "",
+            "tree": entries[: self.truncate_limit],
+            "truncated": truncated,
+        }
+
+    def _compare(self, basehead: str) -> tuple[int, Any]:
+        base_sha, _, head_sha = basehead.partition("...")
+        old, new = self.history.get(base_sha), self.history.get(head_sha)
+        if old is None or new is None:
+            return 404, {"message": "Not Found"}
+        if old.revision > new.revision:
+            return 200, {"status": "behind", "ahead_by": 0, "behind_by": old.revision - new.revision, "files": []}
+        files = []
+        for path in sorted(set(old.files) | set(new.files)):
+            before, after = old.files.get(path), new.files.get(path)
+            if before == after:
+                continue
+            status = "added" if before is None else "removed" if after is None else "modified"
+            patch_lines = list(
+                difflib.unified_diff(
+                    (before or b"").decode().splitlines(),
+                    (after or b"").decode().splitlines(),
+                    lineterm="",
+                    n=3,
+                )
+            )[2:]
+            files.append(
+                {
+                    "filename": path,
+                    "status": status,
+                    "sha": blob_sha(after or b""),
+                    "additions": sum(1 for line in patch_lines if line.startswith("+")),
+                    "deletions": sum(1 for line in patch_lines if line.startswith("-")),
+                    "changes": len(patch_lines),
+                    "patch": "\n".join(patch_lines),
+                }
+            )
+        status = "identical" if old.revision == new.revision else "ahead"
+        return 200, {
+            "status": status,
+            "ahead_by": new.revision - old.revision,
+            "behind_by": 0,
+            "files": files[:300],
+        }
+
+    def _contents(self, path: str) -> tuple[int, Any]:
+        path = unquote(path)
+        repo_url = f"{self.url}/repos/{self.repo.full_name}"
+        if path in self.repo.files:
+            content = self.repo.files[path]
+            return 200, {
+                "type": "file",
+                "name": path.rsplit("/", 1)[-1],
+                "path": path,
+                "sha": blob_sha(content),
+                "size": len(content),
+                "encoding": "base64",
+                "content": base64.b64encode(content).decode(),
+                "url": f"{repo_url}/contents/{path}",
+            }
+        if path and path not in self.repo._children:
+            return 404, {"message": "Not Found"}
+        return 200, [
+            {
+                "type": "dir" if entry["type"] == "tree" else "file",
+                "name": entry["path"].rsplit("/", 1)[-1],
+                "path": entry["path"],
+                "sha": entry["sha"],
+                "url": f"{repo_url}/contents/{entry['path']}",
+            }
+            for entry in self.repo.children(path)
+        ]
+
+    def _make_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                if server.send_archive(self, parsed.path):
+                    return
+                with server._lock:
+                    throttled = server.throttle > 0
+                    server.throttle -= throttled
+                    exhausted = server.rate_remaining <= 0
+                if throttled:
+                    status, payload = 403, {"message": "You have exceeded a secondary rate limit."}
+                elif exhausted:
+                    status, payload = 403, {"message": "API rate limit exceeded."}
+                else:
+                    status, payload = server.handle("GET", parsed.path, parse_qs(parsed.query))
+                link = server.next_link(parsed.path, parse_qs(parsed.query)) if status == 200 else None
+                body = json.dumps(payload).encode()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                with server._lock:
+                    if status == 200 and self.headers.get("If-None-Match") == etag:
+                        server.not_modified_count += 1
+                        status, body = 304, b""
+                    elif not throttled and not exhausted:
+                        server.rate_remaining -= 1
+                    remaining = max(server.rate_remaining, 0)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status in (200, 304):
+                    self.send_header("ETag", etag)
+                if link:
+                    self.send_header("Link", link)
+                self.send_header("X-RateLimit-Limit", str(server.rate_limit))
+                self.send_header("X-RateLimit-Remaining", str(remaining))
+                self.send_header("X-RateLimit-Reset", str(server.rate_reset))
+                self.send_header("X-RateLimit-Resource", "core")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                # OAuth code exchange: any code yields a token for the synthetic user
+                with server._lock:
+                    server.request_count += 1
+                length = int(self.headers.get("Content-Length", "0"))
+                code = parse_qs(self.rfile.read(length).decode()).get("code", [""])[0]
+                status = 200 if urlparse(self.path).path == "/login/oauth/access_token" else 404
+                body = json.dumps({"access_token": f"gho_{_sha('code', code)[:36]}"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
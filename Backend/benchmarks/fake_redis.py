@@ -0,0 +1,153 @@
+"""Local stand-in for a Redis server, for trying the redis cache backend offline.
+
+Point the app at it with `CACHE_BACKEND=redis` and `CACHE_REDIS_URL`. It
+speaks enough of the RESP2 protocol for `RedisBackend`: PING, GET, SET (with
+EX/PX), DEL, SCAN, INFO, DBSIZE, FLUSHDB and the CLIENT calls redis-py makes
+on connect. Keys expire like on Redis, and past `max_keys` the least
+recently used are evicted and counted in `INFO`'s `evicted_keys`, like an
+`allkeys-lru` server.
+"""
+
+import fnmatch
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class FakeRedisServer:
+    """Serve a Redis-compatible key store on localhost, in a background thread.
+
+    `latency` is added to every command, to stand in for the network hop to
+    a real server.
+    """
+
+    def __init__(self, latency: float = 0.0, max_keys: Optional[int] = None) -> None:
+        self.latency = latency
+        self.max_keys = max_keys
+        self.command_count = 0
+        self.evicted_keys = 0
+        # key -> (expires at, on time.monotonic(), or None; value)
+        self._data: "OrderedDict[bytes, tuple[Optional[float], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def __enter__(self) -> "FakeRedisServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def execute(self, args: List[bytes]) -> bytes:
+        """Run one command and return its RESP-encoded reply."""
+        name = args[0].upper()
+        with self._lock:
+            self.command_count += 1
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"GET":
+                return _bulk(self._live(args[1]))
+            if name == b"SET":
+                return self._set(args[1], args[2], args[3:])
+            if name == b"DEL":
+                deleted = sum(self._data.pop(key, None) is not None for key in args[1:])
+                return b":%d\r\n" % deleted
+            if name == b"SCAN":
+                return self._scan(args[1:])
+            if name == b"DBSIZE":
+                return b":%d\r\n" % sum(self._live(key) is not None for key in list(self._data))
+            if name == b"INFO":
+                info = f"# Stats\r\nevicted_keys:{self.evicted_keys}\r\n".encode()
+                return _bulk(info)
+            if name in (b"FLUSHDB", b"FLUSHALL"):
+                self._data.clear()
+                return b"+OK\r\n"
+            if name in (b"CLIENT", b"SELECT"):
+                return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    def _set(self, key: bytes, value: bytes, options: List[bytes]) -> bytes:
+        expires_at = None
+        for option, argument in zip(options, options[1:]):
+            if option.upper() == b"EX":
+                expires_at = time.monotonic() + int(argument)
+            elif option.upper() == b"PX":
+                expires_at = time.monotonic() + int(argument) / 1000
+        self._data.pop(key, None)
+        self._data[key] = (expires_at, value)
+        while self.max_keys is not None and len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+            self.evicted_keys += 1
+        return b"+OK\r\n"
+
+    def _scan(self, args: List[bytes]) -> bytes:
+        # One pass over everything: cursor 0 back tells the client the scan is done
+        pattern = b"*"
+        for i in range(1, len(args) - 1):
+            if args[i].upper() == b"MATCH":
+                pattern = args[i + 1]
+        keys = [
+            key
+            for key in list(self._data)
+            if self._live(key) is not None and fnmatch.fnmatchcase(key.decode(), pattern.decode())
+        ]
+        return b"*2\r\n" + _bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(_bulk(k) for k in keys)
+
+    def _make_handler(self) -> type[socketserver.StreamRequestHandler]:
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                while True:
+                    try:
+                        args = _read_command(self.rfile)
+                    except (ConnectionError, ValueError):
+                        return
+                    if args is None:
+                        return
+                    if server.latency:
+                        time.sleep(server.latency)
+                    self.wfile.write(server.execute(args))
+
+        return Handler
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _read_command(rfile) -> Optional[List[bytes]]:
+    """One command as the client sends it, an array of bulk strings; None at EOF."""
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline command, e.g. typed into telnet
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(rfile.readline()[1:])
+        args.append(rfile.read(length + 2)[:-2])
+    return args
@@ -0,0 +1,24 @@
+"""Latency summary helpers shared by the benchmarks."""
+
+import math
+from typing import Dict, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (pct in 0..100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples_seconds: Sequence[float], wall_seconds: float) -> Dict[str, float]:
+    """Throughput and p50/p95/p99 (milliseconds) for one benchmark run."""
+    return {
+        "requests": len(samples_seconds),
+        "throughput_rps": round(len(samples_seconds) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(samples_seconds, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples_seconds, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples_seconds, 99) * 1000, 2),
+    }
@@ -0,0 +1,41 @@
+"""Shared pytest setup: the app runs against a throwaway SQLite file and the fake GitHub server.
+
+The environment has to be in place before the app's modules are imported,
+since they read it at import time.
+"""
+
+import os
+import tempfile
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+
+
+_db_dir = tempfile.mkdtemp(prefix="skillcred-tests-")
+fake_github = FakeGithubServer(SyntheticRepo(directories=5))
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_db_dir, 'skillcred.db')}",
+    GITHUB_API_URL=fake_github.url,
+    GITHUB_OAUTH_URL=f"{fake_github.url}/login/oauth/access_token",
+    CACHE_BACKEND="memory",
+    SCAN_CACHE_DATABASE="false",
+    RECRUITER_EMAILS="recruiter@example.com",
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def github_server() -> Iterator[FakeGithubServer]:
+    with fake_github:
+        yield fake_github
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
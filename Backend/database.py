@@ -1,15 +1,21 @@
+import logging
 import os
-from typing import Annotated
+from typing import Annotated, Any, AsyncIterator
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from fastapi import Depends
+from utils.Http.fast_json import dumps_str
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Database configuration from environment variables
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
@@ -17,15 +23,55 @@ DB_NAME = os.getenv("DB_NAME", "SkillCred")
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 
-# Construct the DATABASE_URL with proper PostgreSQL format
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Construct the DATABASE_URL with proper PostgreSQL format (or take a full URL,
+# e.g. sqlite:///./skillcred.db for local runs)
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+)
+
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _async_url(url: str) -> str:
+    """Swap the driver of a sync URL for its async counterpart."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Async driver counterpart of DATABASE_URL (asyncpg for Postgres, aiosqlite for SQLite)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
 
-# Create the SQLAlchemy engine with additional configuration
-engine = create_engine(DATABASE_URL)
+def _pool_options(url: str) -> dict[str, Any]:
+    """Connection pool settings; SQLite uses its own pools and ignores them."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+# Create the SQLAlchemy engine with additional configuration; JSON columns are encoded with orjson
+engine = create_engine(DATABASE_URL, json_serializer=dumps_str, **_pool_options(DATABASE_URL))
 
 # Create a configured "Session" class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and sessions for request handlers, so queries don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, json_serializer=dumps_str, **_pool_options(ASYNC_DATABASE_URL)
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 # Create a base class for declarative models
 Base = declarative_base()
 
@@ -34,10 +80,10 @@ Base = declarative_base()
 def test_connection():
     try:
         with engine.connect():
-            print("✅ Database connection successful!")
+            logger.info("✅ Database connection successful!")
             return True
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        logger.error("❌ Database connection failed: %s", e)
         return False
 
 
@@ -49,4 +95,10 @@ def get_db():
         db.close()
 
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
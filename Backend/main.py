@@ -2,28 +2,52 @@ from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from fastapi.concurrency import run_in_threadpool
+import logging
 import os
 
-from database import test_connection, engine
-from models import user
+from database import test_connection
+from migrate import create_tables
 from routes.auth import authRouter
 from routes.scan import scanRouter
+from routes.user import userRouter
+from routes.metrics import metricsRouter
+from utils.Scan.job_queue import scan_job_queue
+from utils.GithubScrapper.github_client import close_shared_http_clients
+from utils.Http.fast_json import FastJSONResponse
+from utils.Observability.collectors import register_collectors
+from utils.Observability.log_pipeline import CorrelationIdMiddleware, configure_logging
+from utils.Observability.metrics import event_loop_lag_monitor
+from utils.Observability.server_timing import ServerTimingMiddleware
 
 # Load environment variables
 load_dotenv()
 
+# Log records are written by a background thread, never on the request path
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Create missing tables on startup; disable when `python migrate.py` runs as a deploy step
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "true").lower() == "true"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     if not test_connection():
         raise Exception("Database connection failed during startup.")
-    print("✅ Database connection established successfully.")
+    logger.info("✅ Database connection established successfully.")
+    if DB_CREATE_TABLES:
+        await run_in_threadpool(create_tables)
+    event_loop_lag_monitor.start()
     yield
-    print("🛑 Application shutdown.")
+    await event_loop_lag_monitor.stop()
+    await scan_job_queue.stop()
+    await close_shared_http_clients()
+    logger.info("🛑 Application shutdown.")
 
 
-# Create FastAPI app with lifespan
-app = FastAPI(lifespan=lifespan)
+# Create FastAPI app with lifespan; responses are encoded with orjson
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Properly add CORS middleware
 app.add_middleware(
@@ -32,19 +56,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
 
+# Per-stage durations in a Server-Timing header, plus request latency histograms
+app.add_middleware(ServerTimingMiddleware)
+# Outermost: every log record of a request carries its X-Request-ID
+app.add_middleware(CorrelationIdMiddleware)
+register_collectors()
+
 api_router = APIRouter()
 
 api_router.include_router(authRouter, prefix="/auth", tags=["Authentication"])
 api_router.include_router(scanRouter, prefix="/scan", tags=["Scan"])
+api_router.include_router(userRouter, prefix="/user", tags=["User"])
 
 # Include routers AFTER creating the app
 app.include_router(api_router, prefix="/api")
-
-# Create tables from user models
-user.Base.metadata.create_all(bind=engine)
-
+app.include_router(metricsRouter)
 
 # Root route
 @app.get("/")
@@ -0,0 +1,21 @@
+"""Create the database tables for every model.
+
+Run from the Backend directory before deploying a schema change:
+
+    python migrate.py
+
+The app also runs this once at startup unless DB_CREATE_TABLES=false, which
+lets several workers start without racing each other on DDL.
+"""
+
+from database import Base, engine
+from models import scan_cache, scan_result, user  # noqa: F401  (registers the tables on Base)
+
+
+def create_tables() -> None:
+    Base.metadata.create_all(bind=engine)
+
+
+if __name__ == "__main__":
+    create_tables()
+    print("✅ Database tables are up to date.")
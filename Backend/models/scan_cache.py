@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import JSON, DateTime, Index, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+# -------------------- SCAN RESULT CACHE MODEL --------------------
+class ScanCacheEntry(Base):
+    __tablename__ = "scan_cache"
+    __table_args__ = (
+        # Latest scan of a repo with a given prompt and model, for incremental rescans
+        Index(
+            "ix_scan_cache_latest", "repo_full_name", "prompt_hash", "model", "created_at"
+        ),
+    )
+
+    # sha256 over (repo full name, commit sha, prompt template hash, model name)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    repo_full_name: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    commit_sha: Mapped[str] = mapped_column(String(40), nullable=False)
+    prompt_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+
+    result: Mapped[dict[str, Any]] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"),
+        nullable=False,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
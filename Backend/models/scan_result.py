@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID, uuid4
+
+from sqlalchemy import DDL, JSON, DateTime, ForeignKey, Index, String, UniqueConstraint, event, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+# Integer fields of the analysis `score` object, searchable and sortable
+SCORE_FIELDS = (
+    "overall",
+    "modularity",
+    "naming_conventions",
+    "folder_structure",
+    "production_practices",
+    "code_quality",
+    "maintainability",
+)
+
+
+def score_sql(name: str) -> str:
+    """SQL for one score field. Queries must use this exact text to hit its index."""
+    if name not in SCORE_FIELDS:
+        raise ValueError(f"Unknown score field: {name}")
+    return f"CAST(result -> 'score' ->> '{name}' AS INTEGER)"
+
+
+# Components of the analysis, for containment (@>) queries on tags and file names
+COMPONENTS_SQL = "(result -> 'analyzed_components')"
+# Full-text document for free-text search over the summary
+SUMMARY_TSVECTOR_SQL = "to_tsvector('english', result ->> 'summary')"
+
+
+# -------------------- STORED SCAN RESULT MODEL --------------------
+class ScanResult(Base):
+    """Latest scan of each repository a user has scanned, kept for candidate search."""
+
+    __tablename__ = "scan_results"
+    __table_args__ = (
+        UniqueConstraint("user_id", "repo_full_name", name="uq_scan_results_user_repo"),
+        # One (score, id) index per score field: score filters, and keyset pages ordered by it
+        *(
+            Index(f"ix_scan_results_score_{name}", text(score_sql(name)), "id")
+            for name in SCORE_FIELDS
+        ),
+        # jsonb_path_ops only supports @>, which is all the tag and file filters use
+        Index(
+            "ix_scan_results_components",
+            text(f"{COMPONENTS_SQL} jsonb_path_ops"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_scan_results_summary_fts",
+            text(SUMMARY_TSVECTOR_SQL),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid4,
+    )
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    repo_full_name: Mapped[str] = mapped_column(String, nullable=False)
+    commit_sha: Mapped[str] = mapped_column(String(40), nullable=False)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+
+    # The ScanAnalysis returned to the user
+    result: Mapped[dict[str, Any]] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"),
+        nullable=False,
+    )
+    scanned_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+# Scores move together (a strong repo scores high everywhere), so combined
+# score filters match far more rows than independent per-column estimates
+# say. Without these statistics the planner bitmap-scans thousands of rows
+# where walking the sort index would stop after a few dozen.
+event.listen(
+    ScanResult.__table__,
+    "after_create",
+    DDL(
+        "CREATE STATISTICS IF NOT EXISTS st_scan_results_scores (mcv, dependencies) ON "
+        + ", ".join(f"({score_sql(name)})" for name in SCORE_FIELDS)
+        + " FROM scan_results"
+    ).execute_if(dialect="postgresql"),
+)
@@ -1,27 +1,47 @@
-from fastapi import APIRouter, HTTPException, Header
-from fastapi.responses import JSONResponse
-from database import db_dependency
+import logging
+from fastapi import APIRouter, HTTPException
+from utils.Http.fast_json import FastJSONResponse
+from database import async_db_dependency
 from schemas.routesSchemas.auth import UserSignUp, UserLogin, UserVerify
-from utils.Auth.hash_pass_handler import hash_password, verify_password
-from utils.Auth.jwt_handler import create_jwt, verify_jwt
+from utils.Auth.hash_pass_handler import (
+    HasherOverloadedError,
+    hash_password_async,
+    password_hasher,
+    verify_password_async,
+)
+from utils.Auth.auth_dependency import current_user_dependency, token_dependency
+from utils.Auth.jwt_handler import create_jwt
+from utils.Auth.token_cache import RevocationError, verified_token_cache
+from utils.Cache.backends import CacheUnavailableError
 from models.user import User
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from email_validator import validate_email, EmailNotValidError
-from github import Github, Auth
-from typing import Annotated
-import requests
-import os
+from utils.GithubScrapper.github_client import GithubClient, exchange_oauth_code
+from utils.Observability.metrics import stage_timer
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
 
 authRouter = APIRouter(
     tags=["Authentication"], responses={404: {"description": "Not found"}}
 )
 
 
+async def _email_taken(db: AsyncSession, email: str) -> bool:
+    with stage_timer("db_query"):
+        return (
+            await db.execute(select(literal(1)).where(User.email == email).limit(1))
+        ).first() is not None
+
+
 @authRouter.post(
     "/signup",
     description="API endpoint for user signup",
     response_model=UserSignUp.Response.Success,
 )
-async def signup(body: UserSignUp.Body, db: db_dependency) -> JSONResponse:
+async def signup(body: UserSignUp.Body, db: async_db_dependency) -> FastJSONResponse:
     try:
         # Validate email format
         try:
@@ -37,26 +57,34 @@ async def signup(body: UserSignUp.Body, db: db_dependency) -> JSONResponse:
                 ).model_dump(),
             )
 
-        # Check if user exists
-        existing_user: User | None = (
-            db.query(User).filter(User.email == validated_email).first()
+        duplicate = HTTPException(
+            status_code=400,
+            detail=UserSignUp.Response.Error(
+                message="A user with this email already exists.",
+                status=400,
+            ).model_dump(),
         )
-        if existing_user:
-            raise HTTPException(
-                status_code=400,
-                detail=UserSignUp.Response.Error(
-                    message="A user with this email already exists.",
-                    status=400,
-                ).model_dump(),
-            )
 
-        # Hash password and create user
-        hashed_password: str = hash_password(body.password)
-        new_user = User(email=validated_email, password=hashed_password)
+        # Reject known emails with a cheap lookup before spending bcrypt time on them
+        if await _email_taken(db, validated_email):
+            raise duplicate
+        # Return the connection to the pool before the slow bcrypt hash
+        await db.close()
+
+        hashed_password: str = await hash_password_async(body.password)
+        new_user = User(id=uuid4(), email=validated_email, password=hashed_password)
 
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        try:
+            with stage_timer("db_insert"):
+                await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            # Lost a race with a concurrent signup for the same email; anything
+            # else is a real error
+            if await _email_taken(db, validated_email):
+                raise duplicate
+            raise
 
         # JWT payload and token
         jwt_payload: dict[str, str] = {
@@ -66,7 +94,7 @@ async def signup(body: UserSignUp.Body, db: db_dependency) -> JSONResponse:
         jwt_token: str = create_jwt(jwt_payload, expires_in=60)
 
         # Response with secure cookie
-        response = JSONResponse(
+        response = FastJSONResponse(
             content=UserSignUp.Response.Success(
                 message="User created successfully",
                 user_id=str(new_user.id),
@@ -80,9 +108,17 @@ async def signup(body: UserSignUp.Body, db: db_dependency) -> JSONResponse:
 
     except HTTPException:
         raise
+    except HasherOverloadedError:
+        raise HTTPException(
+            status_code=503,
+            detail=UserSignUp.Response.Error(
+                message="Server is busy, please try again shortly",
+                status=503,
+            ).model_dump(),
+        )
     except Exception as e:
-        db.rollback()
-        print(f"Error during signup: {str(e)}")
+        await db.rollback()
+        logger.error("❌ Error during signup: %s", e)
         raise HTTPException(
             status_code=500,
             detail=UserSignUp.Response.Error(
@@ -97,7 +133,7 @@ async def signup(body: UserSignUp.Body, db: db_dependency) -> JSONResponse:
     description="API endpoint for user login",
     response_model=UserLogin.Response.Success,
 )
-async def login(body: UserLogin.Body, db: db_dependency) -> JSONResponse:
+async def login(body: UserLogin.Body, db: async_db_dependency) -> FastJSONResponse:
     try:
         # Validate email format
         try:
@@ -114,7 +150,16 @@ async def login(body: UserLogin.Body, db: db_dependency) -> JSONResponse:
             )
 
         # Fetch user
-        user: User | None = db.query(User).filter(User.email == validated_email).first()
+        with stage_timer("db_query"):
+            user = (
+                await db.execute(
+                    select(User.id, User.email, User.password).where(
+                        User.email == validated_email
+                    )
+                )
+            ).first()
+        # Return the connection to the pool before the slow bcrypt check
+        await db.close()
         if not user:
             raise HTTPException(
                 status_code=404,
@@ -134,7 +179,7 @@ async def login(body: UserLogin.Body, db: db_dependency) -> JSONResponse:
             )
 
         # Verify password
-        if not verify_password(body.password, user.password):
+        if not await verify_password_async(body.password, user.password):
             raise HTTPException(
                 status_code=401,
                 detail=UserLogin.Response.Error(
@@ -151,7 +196,7 @@ async def login(body: UserLogin.Body, db: db_dependency) -> JSONResponse:
         jwt_token: str = create_jwt(jwt_payload, expires_in=60)
 
         # Response with secure cookie
-        response = JSONResponse(
+        response = FastJSONResponse(
             content=UserLogin.Response.Success(
                 message="User logged in successfully",
                 user_id=str(user.id),
@@ -165,9 +210,17 @@ async def login(body: UserLogin.Body, db: db_dependency) -> JSONResponse:
 
     except HTTPException:
         raise
+    except HasherOverloadedError:
+        raise HTTPException(
+            status_code=503,
+            detail=UserLogin.Response.Error(
+                message="Server is busy, please try again shortly",
+                status=503,
+            ).model_dump(),
+        )
     except Exception as e:
-        db.rollback()
-        print(f"Error during login: {str(e)}")
+        await db.rollback()
+        logger.error("❌ Error during login: %s", e)
         raise HTTPException(
             status_code=500,
             detail=UserLogin.Response.Error(
@@ -178,37 +231,61 @@ async def login(body: UserLogin.Body, db: db_dependency) -> JSONResponse:
 
 
 @authRouter.post("/verify")
-async def verify_user(
-    Authorization: Annotated[str, Header()],
-) -> JSONResponse:
+async def verify_user(user_data: current_user_dependency) -> FastJSONResponse:
+    # Repeat checks for the same token are served from the verified-token cache
+    return FastJSONResponse(
+        content={
+            "success": True,
+            "message": "User is authenticated",
+            "user_data": user_data,
+        },
+        status_code=200,
+    )
+
 
+@authRouter.post(
+    "/logout",
+    description="API endpoint revoking the presented token until it expires",
+)
+async def logout(token: token_dependency) -> FastJSONResponse:
     try:
-        jwt_token = Authorization
-        response = verify_jwt(jwt_token)
+        revoked = verified_token_cache.revoke(token)
+    except (RevocationError, CacheUnavailableError):
+        raise HTTPException(
+            status_code=503, detail={"message": "Could not log out, try again"}
+        )
+    if not revoked:
+        raise HTTPException(
+            status_code=401, detail={"message": "Invalid or expired token"}
+        )
 
-        if response.get("success") is False:
-            raise HTTPException(
-                status_code=401, detail={"message": "Invalid or expired token"}
-            )
+    return FastJSONResponse(
+        content={"success": True, "message": "Logged out"},
+        status_code=200,
+    )
 
-        return JSONResponse(
-            content={
-                "success": True,
-                "message": "User is authenticated",
-                "user_data": response.get("userData", {}),
-            },
-            status_code=200,
-        )
 
-    except HTTPException:
-        raise
+@authRouter.get(
+    "/token-cache-stats",
+    description="API endpoint exposing verified-token cache counters",
+)
+async def get_token_cache_stats(user: current_user_dependency) -> FastJSONResponse:
+    return FastJSONResponse(content=verified_token_cache.stats(), status_code=200)
+
+
+@authRouter.get(
+    "/hasher-stats",
+    description="API endpoint exposing password hashing queue depth and wait times",
+)
+async def get_hasher_stats(user: current_user_dependency) -> FastJSONResponse:
+    return FastJSONResponse(content=password_hasher.stats().as_dict(), status_code=200)
 
 
 @authRouter.post(
     "/github/set-token",
     description="API endpoint to exchange GitHub code for access token and fetch user data",
 )
-async def set_github_token(token: str, db: db_dependency) -> JSONResponse:
+async def set_github_token(token: str, db: async_db_dependency) -> FastJSONResponse:
     try:
         if not token or len(token) < 20:
             raise HTTPException(
@@ -220,15 +297,7 @@ async def set_github_token(token: str, db: db_dependency) -> JSONResponse:
             )
 
         # Step 1: Exchange GitHub OAuth code for access token
-        response = requests.post(
-            url="https://github.com/login/oauth/access_token",
-            data={
-                "client_id": os.getenv("AUTH_GITHUB_ID"),
-                "client_secret": os.getenv("AUTH_GITHUB_SECRET"),
-                "code": token,
-            },
-            headers={"Accept": "application/json"},
-        )
+        response = await exchange_oauth_code(token)
 
         if response.status_code != 200:
             raise HTTPException(
@@ -241,8 +310,6 @@ async def set_github_token(token: str, db: db_dependency) -> JSONResponse:
 
         access_token = response.json().get("access_token")
 
-        print(f"Access Token: {access_token}")  # Debugging line
-
         if not access_token:
             raise HTTPException(
                 status_code=400,
@@ -252,43 +319,39 @@ async def set_github_token(token: str, db: db_dependency) -> JSONResponse:
                 ).model_dump(),
             )
 
-        # Step 2: Use PyGithub to fetch user data
-
-        auth = Auth.Token(access_token)
+        # Step 2: Fetch user data from the GitHub API
 
-        github = Github(auth=auth)
-        gh_user = github.get_user()
+        gh_user = await GithubClient(access_token).aget_user()
 
-        print(f"GitHub User: {gh_user.login}")  # Debugging line
+        logger.debug("🔗 GitHub OAuth login for %s", gh_user["login"])
 
         # Extract user data
-        email = gh_user.email or ""  # Email might be None
+        email = gh_user.get("email") or ""  # Email might be None
 
-        username = gh_user.login
-        name = gh_user.name
-        profile_url = gh_user.html_url
+        username = gh_user["login"]
+        name = gh_user.get("name")
+        profile_url = gh_user.get("html_url")
 
         # Optional: you could pull repos or public stats here too
 
-        existing_user: User | None = db.query(User).filter(User.email == email).first()
-
-        if existing_user:
-            return JSONResponse(content={})
-
-        # Step 3: Save to DB
+        # Step 3: Save to DB (an existing user with this email is left untouched)
         new_user = User(
+            id=uuid4(),
             email=email,
             github_access_token=access_token,
             is_profile_complete=False,
         )
 
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return FastJSONResponse(content={})
 
         id = str(new_user.id)
 
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "message": "GitHub access token and user info received",
                 "user_data": {
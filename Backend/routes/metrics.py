@@ -0,0 +1,54 @@
+import hmac
+from typing import Annotated
+
+from fastapi import APIRouter, Header, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from utils.Http.fast_json import FastJSONResponse
+from utils.Observability.log_pipeline import LOG_ADMIN_TOKEN, log_levels, set_log_level
+
+
+metricsRouter = APIRouter(tags=["Metrics"])
+
+
+@metricsRouter.get(
+    "/metrics",
+    description="Prometheus scrape endpoint",
+    include_in_schema=False,
+)
+async def metrics() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@metricsRouter.get(
+    "/log-level",
+    description="Current log levels and the log writer's queue",
+    include_in_schema=False,
+)
+async def get_log_level() -> FastJSONResponse:
+    return FastJSONResponse(content=log_levels(), status_code=200)
+
+
+@metricsRouter.put(
+    "/log-level",
+    description="Change a logger's level (the root logger by default) without a restart, in the worker process that answers",
+    include_in_schema=False,
+)
+async def put_log_level(
+    level: str,
+    logger: str = "",
+    x_admin_token: Annotated[str, Header()] = "",
+) -> FastJSONResponse:
+    """Set a log level in this worker process only.
+
+    Under several uvicorn workers each keeps its own levels: repeat the call
+    until every `pid` has answered, or set LOG_LEVEL and restart. Levels go
+    back to the configured ones when a worker restarts.
+    """
+    if not LOG_ADMIN_TOKEN or not hmac.compare_digest(x_admin_token.encode(), LOG_ADMIN_TOKEN.encode()):
+        return FastJSONResponse(content={"error": "Invalid admin token"}, status_code=403)
+    try:
+        set_log_level(level, logger)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    return FastJSONResponse(content=log_levels(), status_code=200)
@@ -1,22 +1,45 @@
 import logging
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from google.genai import types
-from utils.Scan.google_genai import genai_client
-from utils.GithubScrapper.Scrapper import (
-    get_github_client,
-    get_file_content,
-    get_folder_structure,
+from database import async_db_dependency
+from schemas.routesSchemas.scan import ScanSearchQuery
+from utils.Auth.auth_dependency import current_user_dependency, recruiter_dependency
+from utils.Cache.backends import cache_backends
+from utils.GithubScrapper.Scrapper import get_github_client
+from utils.GithubScrapper.http_cache import github_http_cache
+from utils.GithubScrapper.rate_limit import (
+    GithubPriority,
+    GithubRateLimitError,
+    github_priority,
 )
-import json
-import re
+from utils.Http.fast_json import FastJSONResponse
+from utils.Observability.metrics import stage_timer
+from utils.Scan.analysis_parser import AnalysisStreamParser
+from utils.Scan.batch import batch_github_calls, list_user_repo_names, scan_repositories
+from utils.Scan.job_queue import JobQueueFullError, scan_job_queue
+from utils.Scan.scan_pipeline import (
+    STAGE_ANALYZING,
+    STAGE_PARSING,
+    build_scan_prompt,
+    complete_scan,
+    finish_scan,
+    prepare_scan,
+    stream_scan_output,
+)
+from utils.Scan.scan_store import save_scan_result, search_scan_results
+from utils.Scan.single_flight import scan_flights
+from utils.Scan.sse import format_sse
+from contextlib import aclosing
+from dataclasses import replace
+from typing import Annotated, AsyncIterator
+import asyncio
+import math
+import os
+import time
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 scanRouter = APIRouter(tags=["Scan"], responses={404: {"description": "Not found"}})
@@ -25,6 +48,18 @@ scanRouter = APIRouter(tags=["Scan"], responses={404: {"description": "Not found
 class ScanRequestBody(BaseModel):
     access_token: str
     repo_name: str
+    deep: bool = False  # Also read key source files (manifests, entry points, routes)
+
+
+class BatchScanRequestBody(BaseModel):
+    access_token: str
+    repo_names: list[str] | None = None
+    all_repos: bool = False  # Scan every repo owned by the token's user
+    deep: bool = False
+
+
+# Upper bound on repositories accepted by one batch request
+BATCH_MAX_REPOS = int(os.getenv("SCAN_BATCH_MAX_REPOS", "100"))
 
 
 @scanRouter.post(
@@ -34,85 +69,316 @@ class ScanRequestBody(BaseModel):
 )
 async def run_scan(
     body: ScanRequestBody,
-) -> JSONResponse:
+    user: current_user_dependency,
+    background_tasks: BackgroundTasks,
+) -> FastJSONResponse:
     try:
+        logger.debug("🔍 Starting scan process...")
 
         github_client = get_github_client(body.access_token)
         logger.debug("🔗 GitHub client created successfully.")
 
-        fileStructure = {}
-        readmeContent = ""
+        # GitHub and GenAI calls are blocking; keep them off the event loop
+        ctx = await run_in_threadpool(
+            prepare_scan, github_client, body.repo_name, body.deep
+        )
+        outcome = ctx.cached_outcome()
+        if outcome is None:
+            # Identical scans requested meanwhile wait on this one instead of
+            # repeating it; the work outlives any single waiter disconnecting
+            outcome, shared = await scan_flights.arun(
+                ctx.cache_key.digest, lambda: complete_scan(ctx)
+            )
+            if shared:
+                outcome = replace(outcome, coalesced=True)
 
-        fileStructure = get_folder_structure(github_client.get_repo(body.repo_name))
-        logger.debug("📂 Folder structure retrieved successfully.")
+        # Kept for candidate search once the response is sent
+        background_tasks.add_task(save_scan_result, user.get("user_id"), outcome)
+        # Cached results are already encoded; only the small envelope is encoded here
+        return FastJSONResponse(content=outcome.to_response_json(), status_code=200)
 
-        readmeContent = get_file_content(
-            github_client.get_repo(body.repo_name), "README.md"
+    except GithubRateLimitError as e:
+        logger.warning("⏳ Scan of %s refused: %s", body.repo_name, e)
+        return FastJSONResponse(
+            content={"error": str(e)},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
         )
-        logger.debug("📄 README content retrieved successfully.")
+    except Exception as e:
+        logger.error("❌ Error running scan: %s", e)
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
 
-        logger.debug("🔍 Starting scan process...")
-        logger.debug(f"📥 Received request body: {body}")
-
-        # Load prompt template
-        logger.debug("📜 Loading prompt template...")
-        with open("prompts/run1.txt", "r", encoding="utf-8") as file:
-            prompt_template = file.read()
-        logger.debug("✅ Loaded prompt template.")
-
-        # Format prompt
-        logger.debug("📝 Formatting prompt...")
-        prompt = (
-            f"### Prompt for Google GenAI\n\n {prompt_template}\n\n  ### README Content:\n\n{readmeContent}\n\n### Folder Structure:\n\n"
-            f"{json.dumps(fileStructure, indent=2)}"
+
+@scanRouter.post(
+    "/run-scan/stream",
+    description="API endpoint to run a scan, streaming model output as Server-Sent Events",
+)
+async def run_scan_stream(
+    body: ScanRequestBody, user: current_user_dependency
+) -> StreamingResponse:
+    started = time.perf_counter()
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            github_client = get_github_client(body.access_token)
+            ctx = await run_in_threadpool(
+                prepare_scan, github_client, body.repo_name, body.deep
+            )
+
+            cached = ctx.cached_outcome()
+            if cached is not None:
+                yield format_sse(
+                    "result",
+                    {
+                        **cached.to_response(),
+                        "timings": {"time_to_first_byte_ms": None, "total_ms": elapsed_ms()},
+                    },
+                )
+                await run_in_threadpool(save_scan_result, user.get("user_id"), cached)
+                return
+
+            # An identical scan already running elsewhere: wait for its result
+            # rather than streaming a second model call
+            shared = await scan_flights.join(ctx.cache_key.digest)
+            if shared is not None:
+                yield format_sse(
+                    "result",
+                    {
+                        **replace(shared, coalesced=True).to_response(),
+                        "timings": {"time_to_first_byte_ms": None, "total_ms": elapsed_ms()},
+                    },
+                )
+                await run_in_threadpool(save_scan_result, user.get("user_id"), shared)
+                return
+
+            # Forward fetch progress from the worker thread as it happens
+            loop = asyncio.get_running_loop()
+            stages: asyncio.Queue[str] = asyncio.Queue()
+            prompt_task = asyncio.ensure_future(
+                run_in_threadpool(
+                    build_scan_prompt,
+                    ctx,
+                    lambda stage: loop.call_soon_threadsafe(stages.put_nowait, stage),
+                )
+            )
+            while not prompt_task.done() or not stages.empty():
+                stage_task = asyncio.ensure_future(stages.get())
+                await asyncio.wait(
+                    [prompt_task, stage_task], return_when=asyncio.FIRST_COMPLETED
+                )
+                if stage_task.done():
+                    yield format_sse("stage", {"stage": stage_task.result()})
+                else:
+                    stage_task.cancel()
+            prompt = prompt_task.result()
+
+            yield format_sse("stage", {"stage": STAGE_ANALYZING})
+            # Validates components as they arrive; raises (ending the model
+            # stream early) as soon as the output cannot be an analysis
+            parser = AnalysisStreamParser()
+            ttfb_ms: float | None = None
+            async with aclosing(stream_scan_output(prompt)) as output:
+                async for text in output:
+                    if ttfb_ms is None:
+                        ttfb_ms = elapsed_ms()
+                    yield format_sse("chunk", {"text": text})
+                    for component in parser.feed(text):
+                        yield format_sse("component", component)
+
+            yield format_sse("stage", {"stage": STAGE_PARSING})
+            with stage_timer("parse"):
+                analysis = parser.finish()
+            outcome = await run_in_threadpool(finish_scan, ctx, analysis)
+            total_ms = elapsed_ms()
+            logger.debug("⏱️ Streamed scan: first chunk %s ms, total %s ms", ttfb_ms, total_ms)
+
+            yield format_sse(
+                "result",
+                {
+                    **outcome.to_response(),
+                    "timings": {"time_to_first_byte_ms": ttfb_ms, "total_ms": total_ms},
+                },
+            )
+            await run_in_threadpool(save_scan_result, user.get("user_id"), outcome)
+
+        except Exception as e:
+            logger.error("❌ Error running streamed scan: %s", e)
+            yield format_sse("error", {"error": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@scanRouter.post(
+    "/batch",
+    description="API endpoint to scan many repositories at once, streaming each result as Server-Sent Events",
+)
+async def run_batch_scan(
+    body: BatchScanRequestBody, user: current_user_dependency
+) -> StreamingResponse:
+    if not body.all_repos and not body.repo_names:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Provide repo_names or set all_repos to true"},
         )
-        logger.debug(f"✅ Formatted prompt: {prompt[:200]}...")
 
-        logger.debug("🔍 Running scan with Google GenAI...")
-        logger.debug("Prompt for Google GenAI: %s", prompt)
+    github_client = get_github_client(body.access_token)
+    if body.all_repos:
+        try:
+            with github_priority(GithubPriority.BATCH):
+                repo_names = await run_in_threadpool(list_user_repo_names, github_client)
+        except Exception as e:
+            logger.error("❌ Error listing repositories: %s", e)
+            raise HTTPException(status_code=502, detail={"message": str(e)})
+    else:
+        repo_names = list(dict.fromkeys(body.repo_names or []))
 
-        response = genai_client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                max_output_tokens=3000,
-            ),
+    if len(repo_names) > BATCH_MAX_REPOS:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": f"A batch can contain at most {BATCH_MAX_REPOS} repositories"},
         )
+    if github_client.limiter is not None:
+        try:
+            with github_priority(GithubPriority.BATCH):
+                github_client.limiter.require(
+                    github_client.token,
+                    batch_github_calls(len(repo_names), body.deep),
+                    f"A batch of {len(repo_names)} repositories",
+                )
+        except GithubRateLimitError as e:
+            raise HTTPException(
+                status_code=429,
+                detail={"message": str(e)},
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
 
-        # Extract the JSON string wrapped inside triple backticks from the first candidate's first part's text
-        # Validate response structure before accessing attributes
-        if not response.candidates or not response.candidates[0].content:
-            raise ValueError("Invalid response: Missing candidates or content.")
-
-        content = response.candidates[0].content
-        if not content.parts or not content.parts[0].text:
-            raise ValueError("Invalid response: Missing parts or text in content.")
-
-        raw_text: str = content.parts[0].text
-        logger.debug(f"Raw response text from AI:\n{raw_text[:300]}...")
-
-        # Use regex to extract JSON inside ```json ... ```
-        match = re.search(r"```json\s*(\{.*\})\s*```", raw_text, re.DOTALL)
-        if match:
-            json_str = match.group(1)  # Extract the JSON string
-        else:
-            # fallback if no markdown block found, try raw text
-            json_str = raw_text.strip()
-
-        # Parse the JSON string to dict
-        parsed_response = json.loads(json_str)
-
-        return JSONResponse(
-            content={
-                "message": "Scan completed successfully",
-                "response": {
-                    "status": "success",
-                    "data": parsed_response,
-                },
-            },
-            status_code=200,
+    async def event_stream() -> AsyncIterator[str]:
+        yield format_sse("batch", {"repo_names": repo_names})
+        succeeded = failed = 0
+        async for result in scan_repositories(
+            github_client,
+            body.access_token,
+            repo_names,
+            deep=body.deep,
+            owner_id=user.get("user_id"),
+        ):
+            if result["success"]:
+                succeeded += 1
+            else:
+                failed += 1
+            yield format_sse("repo_result", result)
+        yield format_sse("done", {"succeeded": succeeded, "failed": failed})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@scanRouter.post(
+    "/jobs",
+    description="API endpoint to queue a scan and return its job ID immediately",
+    status_code=202,
+)
+async def submit_scan_job(
+    body: ScanRequestBody, user: current_user_dependency
+) -> FastJSONResponse:
+    try:
+        job = scan_job_queue.submit(
+            body.access_token,
+            body.repo_name,
+            owner_id=user.get("user_id"),
+            deep=body.deep,
         )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail={"message": str(e)})
 
-    except Exception as e:
-        logger.error(f"❌ Error running scan: {e}")
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+    return FastJSONResponse(
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/scan/jobs/{job.id}",
+            "events_url": f"/api/scan/jobs/{job.id}/events",
+        },
+        status_code=202,
+    )
+
+
+@scanRouter.get(
+    "/jobs/{job_id}",
+    description="API endpoint to poll the status and result of a scan job",
+)
+async def get_scan_job(
+    job_id: str, user: current_user_dependency
+) -> FastJSONResponse:
+    job = scan_job_queue.get(job_id)
+    if job is None or job.owner_id != user.get("user_id"):
+        raise HTTPException(status_code=404, detail={"message": "Scan job not found"})
+
+    return FastJSONResponse(content=job.snapshot(), status_code=200)
+
+
+@scanRouter.get(
+    "/jobs/{job_id}/events",
+    description="API endpoint streaming scan job progress as Server-Sent Events",
+)
+async def stream_scan_job_events(
+    job_id: str, user: current_user_dependency
+) -> StreamingResponse:
+    job = scan_job_queue.get(job_id)
+    if job is None or job.owner_id != user.get("user_id"):
+        raise HTTPException(status_code=404, detail={"message": "Scan job not found"})
+
+    async def event_stream() -> AsyncIterator[str]:
+        async for event in scan_job_queue.events(job):
+            yield format_sse("progress", event)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@scanRouter.get(
+    "/github-cache-stats",
+    description="API endpoint exposing GitHub conditional-request cache hit/miss counters",
+)
+async def get_github_cache_stats(user: current_user_dependency) -> FastJSONResponse:
+    return FastJSONResponse(content=github_http_cache.stats().as_dict(), status_code=200)
+
+
+@scanRouter.get(
+    "/cache-stats",
+    description="API endpoint exposing hit rates, size and evictions of every cache backend (scan results, GitHub responses, JWTs)",
+)
+async def get_cache_stats(user: current_user_dependency) -> FastJSONResponse:
+    def collect() -> dict:
+        return {
+            namespace: backend.stats().as_dict()
+            for namespace, backend in cache_backends.items()
+        }
+
+    # The sqlite and redis backends answer with a query
+    return FastJSONResponse(content=await run_in_threadpool(collect), status_code=200)
+
+
+@scanRouter.get(
+    "/results/search",
+    description="API endpoint for recruiters (RECRUITER_EMAILS) to search stored scan results by scores, component tags and files, and summary text, best first, with keyset pagination",
+)
+async def search_scan_results_route(
+    query: Annotated[ScanSearchQuery, Query()],
+    db: async_db_dependency,
+    user: recruiter_dependency,
+) -> FastJSONResponse:
+    try:
+        with stage_timer("db_search"):
+            page = await search_scan_results(db, query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e)})
+    return FastJSONResponse(content=page, status_code=200)
+
+
+@scanRouter.get(
+    "/coalescing-stats",
+    description="API endpoint exposing how many scans were shared with an identical one already in flight",
+)
+async def get_coalescing_stats(user: current_user_dependency) -> FastJSONResponse:
+    return FastJSONResponse(content=scan_flights.stats(), status_code=200)
@@ -1,7 +1,20 @@
 from fastapi import APIRouter
+from utils.Http.fast_json import FastJSONResponse
+from utils.Auth.auth_dependency import current_user_dependency
 
 
 userRouter = APIRouter(
     tags=["User"],
     responses={404: {"description": "Not found"}},
 )
+
+
+@userRouter.get(
+    "/me",
+    description="API endpoint returning the authenticated user's token claims",
+)
+async def get_me(user: current_user_dependency) -> FastJSONResponse:
+    return FastJSONResponse(
+        content={"user_id": user.get("user_id"), "email": user.get("email")},
+        status_code=200,
+    )
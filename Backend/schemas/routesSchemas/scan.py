@@ -0,0 +1,96 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+# -------------------- SCAN ANALYSIS (model output) --------------------
+# Mirrors the JSON described in prompts/run1.txt. It is sent to the model as
+# the response schema and used to validate what comes back.
+
+
+class AnalyzedComponent(BaseModel):
+    file_name: str
+    file_type: Literal["file", "dir"]
+    insights: str
+    pros: str
+    cons: str
+    tags: list[str] = Field(default_factory=list)
+
+
+class AnalysisScore(BaseModel):
+    overall: int = Field(ge=0, le=10)
+    modularity: int = Field(ge=0, le=10)
+    naming_conventions: int = Field(ge=0, le=10)
+    folder_structure: int = Field(ge=0, le=10)
+    production_practices: int = Field(ge=0, le=10)
+    code_quality: int = Field(ge=0, le=10)
+    maintainability: int = Field(ge=0, le=10)
+    score_reasoning: str
+
+
+class AnalysisDocumentation(BaseModel):
+    has_readme: bool
+    readme_quality: Literal["basic", "detailed", "exceptional", "missing", "placeholder"]
+    readme_insights: str
+    has_license: bool
+    has_contributing: bool
+    has_env_example: bool
+
+
+class ScanAnalysis(BaseModel):
+    name: str
+    type: Literal["dir"] = "dir"
+    analyzed_components: list[AnalyzedComponent]
+    score: AnalysisScore
+    summary: str
+    # Groups of logically related files worth a closer look
+    files_to_check: list[list[str]] = Field(default_factory=list)
+    documentation: AnalysisDocumentation
+
+
+class ChunkAnalysis(BaseModel):
+    """Map step of a chunked scan: the findings for one part of the tree."""
+
+    analyzed_components: list[AnalyzedComponent]
+    score: AnalysisScore
+    summary: str
+    files_to_check: list[list[str]] = Field(default_factory=list)
+
+
+# -------------------- STORED SCAN SEARCH --------------------
+
+
+class ScanSearchQuery(BaseModel):
+    """Query parameters of the stored scan search."""
+
+    q: Optional[str] = Field(None, max_length=200)  # words matched against the summary
+    # Every tag must appear on some analyzed component
+    tags: list[str] = Field(default_factory=list, max_length=10)
+    # Every path must be an analyzed component, e.g. "Dockerfile" or "requirements.txt"
+    files: list[str] = Field(default_factory=list, max_length=10)
+    min_overall: Optional[int] = Field(None, ge=0, le=10)
+    min_modularity: Optional[int] = Field(None, ge=0, le=10)
+    min_naming_conventions: Optional[int] = Field(None, ge=0, le=10)
+    min_folder_structure: Optional[int] = Field(None, ge=0, le=10)
+    min_production_practices: Optional[int] = Field(None, ge=0, le=10)
+    min_code_quality: Optional[int] = Field(None, ge=0, le=10)
+    min_maintainability: Optional[int] = Field(None, ge=0, le=10)
+    sort: Literal[
+        "overall",
+        "modularity",
+        "naming_conventions",
+        "folder_structure",
+        "production_practices",
+        "code_quality",
+        "maintainability",
+    ] = "overall"
+    limit: int = Field(20, ge=1, le=100)
+    # `next_cursor` of the previous page
+    cursor: Optional[str] = None
+
+    def min_scores(self) -> dict[str, int]:
+        return {
+            name.removeprefix("min_"): value
+            for name, value in self.model_dump().items()
+            if name.startswith("min_") and value is not None
+        }
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from utils.Scan.analysis_parser import AnalysisStreamParser, MalformedOutputError, parse_analysis
+
+
+def _component(name: str, file_type: str = "file") -> dict:
+    return {
+        "file_name": name,
+        "file_type": file_type,
+        # Escapes and braces inside strings must not confuse the structure
+        "insights": 'Says "hi" \\ {not an object} [nor an array]\n',
+        "pros": "Small",
+        "cons": "None",
+        "tags": ["api"],
+    }
+
+
+def _analysis(components: list[dict]) -> dict:
+    return {
+        "name": "synthetic",
+        "type": "dir",
+        "analyzed_components": components,
+        "score": {
+            "overall": 7,
+            "modularity": 7,
+            "naming_conventions": 8,
+            "folder_structure": 6,
+            "production_practices": 5,
+            "code_quality": 7,
+            "maintainability": 6,
+            "score_reasoning": "Tidy",
+        },
+        "summary": "A {small} repo",
+        "files_to_check": [["main.py", "routes/scan.py"]],
+        "documentation": {
+            "has_readme": True,
+            "readme_quality": "basic",
+            "readme_insights": "Short",
+            "has_license": False,
+            "has_contributing": False,
+            "has_env_example": True,
+        },
+    }
+
+
+def test_components_complete_however_the_output_is_split():
+    document = _analysis([_component("main.py"), _component("routes", "dir")])
+    text = json.dumps(document, indent=2)
+
+    parser = AnalysisStreamParser()
+    completed_at = []
+    for i, char in enumerate(text):
+        for component in parser.feed(char):
+            completed_at.append((i, component["file_name"]))
+    result = parser.finish()
+
+    assert not result.partial
+    assert result.data == document
+    assert [name for _, name in completed_at] == ["main.py", "routes"]
+    # Each component is reported as soon as its closing brace arrives
+    second_start = text.index('"file_name": "routes"')
+    assert completed_at[0][0] < second_start
+    assert text[completed_at[1][0]] == "}"
+
+    # Splits right inside an escape and inside nested containers
+    parser = AnalysisStreamParser()
+    escape = text.index("\\\\")
+    nested = text.index('"overall"')
+    for start, end in [(0, escape + 1), (escape + 1, nested - 3), (nested - 3, len(text))]:
+        parser.feed(text[start:end])
+    assert parser.finish().data == document
+
+
+def test_fenced_output_is_accepted():
+    document = _analysis([_component("main.py")])
+    result = parse_analysis("```json\n" + json.dumps(document) + "\n```\n")
+
+    assert not result.partial
+    assert result.data == document
+
+
+def test_truncated_output_is_salvaged():
+    text = json.dumps(_analysis([_component("main.py"), _component("routes", "dir")]))
+    cut = text.index('"file_name": "routes"') + 10
+
+    result = parse_analysis(text[:cut])
+
+    assert result.partial
+    assert result.data["name"] == "synthetic"
+    assert [c["file_name"] for c in result.data["analyzed_components"]] == ["main.py"]
+    assert result.missing_fields == ["score", "summary", "files_to_check", "documentation"]
+    assert result.data["files_to_check"] == []
+
+
+def test_invalid_components_are_counted_and_skipped():
+    document = _analysis([_component("main.py"), _component("link", "symlink"), _component("app.py")])
+
+    result = parse_analysis(json.dumps(document))
+
+    assert result.invalid_components == 1
+    assert [c["file_name"] for c in result.data["analyzed_components"]] == ["main.py", "app.py"]
+
+    too_many = _analysis([_component(f"bad{i}", "symlink") for i in range(3)])
+    with pytest.raises(MalformedOutputError):
+        AnalysisStreamParser(max_invalid_components=2).feed(json.dumps(too_many))
+
+
+@pytest.mark.parametrize(
+    "prefix",
+    [
+        "I am sorry, I cannot analyze this repository. " * 20,
+        '{"name": "synthetic", ]',
+        '{"name" "synthetic"',
+        '{"name": "synthetic"} and more',
+    ],
+)
+def test_malformed_prefix_aborts_the_stream(prefix: str):
+    parser = AnalysisStreamParser()
+    with pytest.raises(MalformedOutputError):
+        # Raised while feeding, before the rest of the output would arrive
+        parser.feed(prefix)
@@ -0,0 +1,139 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import routes.auth
+from utils.Auth.jwt_handler import verify_jwt
+from utils.Auth.token_cache import token_denylist
+from utils.Cache.backends import CacheUnavailableError, MemoryBackend, create_backend
+
+
+def _email() -> str:
+    return f"user-{uuid.uuid4().hex[:12]}@example.com"
+
+
+def test_signup_creates_user_and_token(client: TestClient):
+    email = _email()
+    response = client.post("/api/auth/signup", json={"email": email, "password": "hunter22"})
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["email"] == email
+    payload = verify_jwt(body["auth_token"])["userData"]
+    assert payload["user_id"] == body["user_id"]
+
+
+def test_duplicate_signup_is_rejected_before_hashing(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    email = _email()
+    assert client.post("/api/auth/signup", json={"email": email, "password": "first"}).status_code == 201
+
+    hashed: list[str] = []
+
+    async def counting_hash(password: str) -> str:
+        hashed.append(password)
+        return password
+
+    monkeypatch.setattr(routes.auth, "hash_password_async", counting_hash)
+    response = client.post("/api/auth/signup", json={"email": email, "password": "second"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["message"] == "A user with this email already exists."
+    assert hashed == []
+
+
+def test_signup_rejects_invalid_email(client: TestClient):
+    response = client.post("/api/auth/signup", json={"email": "not-an-email", "password": "x"})
+    assert response.status_code == 400
+
+
+def test_login(client: TestClient):
+    email = _email()
+    user_id = client.post("/api/auth/signup", json={"email": email, "password": "hunter22"}).json()["user_id"]
+
+    response = client.post("/api/auth/login", json={"email": email, "password": "hunter22"})
+    assert response.status_code == 200
+    assert response.json()["user_id"] == user_id
+
+    assert client.post("/api/auth/login", json={"email": email, "password": "wrong"}).status_code == 401
+    assert client.post("/api/auth/login", json={"email": _email(), "password": "x"}).status_code == 404
+
+
+def test_set_github_token_creates_user_once(client: TestClient):
+    response = client.post("/api/auth/github/set-token", params={"token": "oauth-code-" + "x" * 20})
+
+    assert response.status_code == 200
+    user_data = response.json()["user_data"]
+    assert user_data["username"] == "octo"
+    assert user_data["email"] == "octo@example.com"
+
+    # The email is taken now: the existing user is left untouched
+    again = client.post("/api/auth/github/set-token", params={"token": "oauth-code-" + "y" * 20})
+    assert again.status_code == 200
+    assert again.json() == {}
+
+
+def test_set_github_token_rejects_short_code(client: TestClient):
+    assert client.post("/api/auth/github/set-token", params={"token": "short"}).status_code == 400
+
+
+def _auth_token(client: TestClient) -> str:
+    return client.post("/api/auth/signup", json={"email": _email(), "password": "hunter22"}).json()["auth_token"]
+
+
+def test_logout_revokes_the_token(client: TestClient):
+    headers = {"Authorization": f"Bearer {_auth_token(client)}"}
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=headers).status_code == 401
+
+
+def test_logout_fails_when_the_revocation_cannot_be_stored(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    headers = {"Authorization": f"Bearer {_auth_token(client)}"}
+    monkeypatch.setattr(token_denylist.backend, "set", lambda *args, **kwargs: False)
+
+    response = client.post("/api/auth/logout", headers=headers)
+    assert response.status_code == 503
+    assert not token_denylist.is_revoked(headers["Authorization"].removeprefix("Bearer "))
+
+
+def test_denylist_is_never_evicted():
+    assert token_denylist.backend.max_entries is None
+    assert token_denylist.backend.max_bytes is None
+    with pytest.raises(ValueError):
+        create_backend("jwt_denylist_bounded", max_entries=10, durable=True)
+
+
+def test_hasher_stats_require_authentication(client: TestClient):
+    assert client.get("/api/auth/hasher-stats").status_code == 401
+
+    headers = {"Authorization": f"Bearer {_auth_token(client)}"}
+    response = client.get("/api/auth/hasher-stats", headers=headers)
+    assert response.status_code == 200
+    assert "queue_depth" in response.json()
+
+
+def test_token_cache_stats_require_authentication(client: TestClient):
+    assert client.get("/api/auth/token-cache-stats").status_code == 401
+
+    headers = {"Authorization": f"Bearer {_auth_token(client)}"}
+    response = client.get("/api/auth/token-cache-stats", headers=headers)
+    assert response.status_code == 200
+    assert "revoked" in response.json()
+
+
+class _UnreachableBackend(MemoryBackend):
+    errors = (OSError,)
+
+    def _get(self, key: str):
+        raise OSError("connection refused")
+
+
+def test_unreadable_denylist_fails_closed(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    headers = {"Authorization": f"Bearer {_auth_token(client)}"}
+    assert client.get("/api/auth/hasher-stats", headers=headers).status_code == 200
+
+    monkeypatch.setattr(token_denylist, "backend", _UnreachableBackend("jwt_denylist"))
+    assert client.get("/api/auth/hasher-stats", headers=headers).status_code == 503
+    assert client.post("/api/auth/logout", headers=headers).status_code == 503
+    with pytest.raises(CacheUnavailableError):
+        token_denylist.is_revoked("token")
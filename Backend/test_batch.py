@@ -0,0 +1,31 @@
+import asyncio
+
+from utils.Scan.batch import BatchScanLimiter
+
+
+async def _peak_concurrency(limiter: BatchScanLimiter, tokens: list[str]) -> int:
+    running = peak = 0
+
+    async def scan(token: str) -> None:
+        nonlocal running, peak
+        async with limiter.slot(token):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(scan(token) for token in tokens))
+    return peak
+
+
+def test_slots_are_capped_per_token_and_globally():
+    limiter = BatchScanLimiter(global_limit=3, per_token_limit=2)
+    assert asyncio.run(_peak_concurrency(limiter, ["a"] * 6)) == 2
+    assert asyncio.run(_peak_concurrency(limiter, ["a", "b", "c", "d"] * 2)) == 3
+
+
+def test_limiter_works_across_event_loops():
+    limiter = BatchScanLimiter(global_limit=1, per_token_limit=1)
+    # Contended in the first loop, which binds the semaphores to it
+    assert asyncio.run(_peak_concurrency(limiter, ["a", "a", "b"])) == 1
+    assert asyncio.run(_peak_concurrency(limiter, ["a", "a", "b"])) == 1
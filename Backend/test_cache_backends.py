@@ -0,0 +1,109 @@
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from benchmarks.fake_redis import FakeRedisServer
+from utils.Cache.backends import CacheBackend, MemoryBackend, RedisBackend, SQLiteBackend
+
+
+BackendFactory = Callable[..., CacheBackend]
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_backend(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[BackendFactory]:
+    """Build a backend of each kind; Redis gets its own fake server, bounded like a real one."""
+    with ExitStack() as stack:
+
+        def make(**bounds: Any) -> CacheBackend:
+            if request.param == "memory":
+                return MemoryBackend("test", **bounds)
+            if request.param == "sqlite":
+                backend = SQLiteBackend(str(tmp_path / "cache.db"), "test", **bounds)
+                # Enforce the bounds on every write, so the checks need not write in batches
+                backend.EVICT_EVERY = 1
+                return backend
+            server = stack.enter_context(FakeRedisServer(max_keys=bounds.get("max_entries")))
+            return RedisBackend(server.url, "skillcred-test", "test", **bounds)
+
+        yield make
+
+
+def test_round_trip_and_stats(make_backend: BackendFactory):
+    backend = make_backend()
+
+    assert backend.get("a") is None
+    assert backend.set("a", b"value")
+    assert backend.get("a") == b"value"
+    backend.delete("a")
+    assert backend.get("a") is None
+
+    stats = backend.stats()
+    assert (stats.hits, stats.misses, stats.sets) == (1, 2, 1)
+    assert stats.as_dict()["hit_rate"] == round(1 / 3, 4)
+
+    backend.set("b", b"value")
+    backend.clear()
+    assert backend.get("b") is None
+    assert (backend.stats().hits, backend.stats().sets) == (0, 0)
+
+
+def test_entries_expire_after_their_ttl(make_backend: BackendFactory):
+    backend = make_backend(default_ttl=0.05)
+    backend.set("default", b"value")
+    backend.set("own", b"value", ttl=0.05)
+    backend.set("longer", b"value", ttl=60)
+    # Already expired: skipped rather than stored
+    backend.set("expired", b"value", ttl=0)
+
+    assert backend.get("own") == b"value"
+    time.sleep(0.15)
+    assert backend.get("default") is None
+    assert backend.get("own") is None
+    assert backend.get("longer") == b"value"
+    assert backend.get("expired") is None
+
+
+def test_least_recently_used_entries_go_past_max_entries(make_backend: BackendFactory):
+    backend = make_backend(max_entries=3)
+    for key in "abcd":
+        backend.set(key, key.encode())
+
+    stats = backend.stats()
+    assert stats.evictions == 1
+    assert stats.entries in (3, None)  # Redis cannot tell per namespace
+    assert backend.get("a") is None
+    assert [backend.get(key) for key in "bcd"] == [b"b", b"c", b"d"]
+
+
+def test_least_recently_used_entries_go_past_max_bytes(make_backend: BackendFactory):
+    backend = make_backend(max_bytes=100)
+    # Larger than the whole bound: never stored, on every backend
+    backend.set("huge", b"x" * 101)
+    assert backend.get("huge") is None
+    if backend.kind == "redis":
+        pytest.skip("Redis bounds memory on the server (maxmemory)")
+
+    for key in "abc":
+        backend.set(key, key.encode() * 40)
+
+    stats = backend.stats()
+    assert stats.evictions == 1
+    assert stats.bytes_stored == 80
+    assert backend.get("a") is None
+    assert backend.get("c") == b"c" * 40
+
+
+def test_memory_backend_sweeps_expired_entries():
+    backend = MemoryBackend("test")
+    backend.PURGE_EVERY = 4
+    for key in "abc":
+        backend.set(key, b"value", ttl=0.01)
+    time.sleep(0.05)
+
+    assert backend.stats().entries == 3
+    backend.set("d", b"value")
+    stats = backend.stats()
+    assert (stats.entries, stats.evictions) == (1, 3)
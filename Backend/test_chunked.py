@@ -0,0 +1,152 @@
+import json
+import uuid
+
+import pytest
+
+from utils.Scan import chunked
+from utils.Scan.analysis_parser import ParsedAnalysis
+from utils.Scan.chunked import (
+    ChunkedAnalysis,
+    ChunkResult,
+    analyze_chunks,
+    merge_chunks,
+    plan_chunks,
+)
+from utils.Scan.prompt_builder import IgnoreRules, listing_tokens
+
+
+def _tree() -> dict:
+    tree: dict = {f"pkg{i}": {f"module{j}.py": "file" for j in range(8)} for i in range(6)}
+    # Far over any chunk budget on its own, but made of smaller folders
+    tree["big"] = {f"part{i}": {f"handler{j}.py": "file" for j in range(8)} for i in range(6)}
+    tree["main.py"] = "file"
+    return tree
+
+
+def _files(structure: dict, prefix: str = "") -> set[str]:
+    paths: set[str] = set()
+    for name, value in structure.items():
+        if isinstance(value, dict):
+            paths |= _files(value, f"{prefix}{name}/")
+        else:
+            paths.add(prefix + name)
+    return paths
+
+
+def _component(name: str) -> dict:
+    return {"file_name": name, "file_type": "file", "insights": "", "pros": "", "cons": "", "tags": []}
+
+
+def _answer(name: str) -> str:
+    return json.dumps(
+        {
+            "analyzed_components": [_component(name)],
+            "score": {
+                "overall": 5,
+                "modularity": 5,
+                "naming_conventions": 5,
+                "folder_structure": 5,
+                "production_practices": 5,
+                "code_quality": 5,
+                "maintainability": 5,
+                "score_reasoning": "",
+            },
+            "summary": name,
+            "files_to_check": [[name]],
+        }
+    )
+
+
+@pytest.fixture
+def small_chunks(monkeypatch: pytest.MonkeyPatch) -> int:
+    budget = listing_tokens({"pkg0": _tree()["pkg0"]}) * 2
+    monkeypatch.setattr(chunked, "SCAN_CHUNKING", "always")
+    monkeypatch.setattr(chunked, "CHUNK_TOKEN_BUDGET", budget)
+    monkeypatch.setattr(chunked, "CHUNK_MAX_CHUNKS", 100)
+    monkeypatch.setattr(chunked, "CHUNK_RETRY_BASE_SECONDS", 0.0)
+    return budget
+
+
+def test_chunks_are_packed_within_the_budget(small_chunks: int):
+    tree = _tree()
+    chunks = plan_chunks(tree, IgnoreRules())
+
+    assert len(chunks) > 2
+    assert all(chunk.tokens <= small_chunks for chunk in chunks)
+    # Every file lands in exactly one chunk
+    files = [path for chunk in chunks for path in _files(chunk.structure())]
+    assert sorted(files) == sorted(_files(tree))
+
+
+def test_oversized_directories_are_split(small_chunks: int):
+    chunks = plan_chunks(_tree(), IgnoreRules())
+
+    labels = [unit.label for chunk in chunks for unit in chunk.units]
+    assert "big" not in labels
+    assert [label for label in labels if label.startswith("big/")] == [f"big/part{i}" for i in range(6)]
+
+
+def test_failed_chunk_is_retried_and_results_are_cached(small_chunks: int):
+    chunks = plan_chunks(_tree(), IgnoreRules())
+    repo = f"octo/{uuid.uuid4().hex}"
+    calls: dict[str, int] = {}
+
+    def flaky_generate(prompt: str, schema: type) -> str:
+        calls[prompt] = calls.get(prompt, 0) + 1
+        if prompt == first_prompt and calls[prompt] == 1:
+            raise RuntimeError("503 UNAVAILABLE")
+        return _answer(str(len(calls)))
+
+    first_prompt = chunked.build_chunk_prompt(chunks[0])
+    result = analyze_chunks(chunks, repo, flaky_generate)
+
+    assert not result.failed
+    assert result.results[0].attempts == 2
+    assert result.summary()["retried"] == 1
+    assert sum(calls.values()) == len(chunks) + 1
+
+    again = analyze_chunks(chunks, repo, flaky_generate)
+    assert all(r.cached for r in again.results)
+    assert again.summary()["cached"] == len(chunks)
+    assert sum(calls.values()) == len(chunks) + 1
+
+
+def test_merge_dedupes_components():
+    def result(*names: str) -> ChunkResult:
+        analysis = json.loads(_answer(names[0]))
+        analysis["analyzed_components"] = [_component(name) for name in names]
+        return ChunkResult(chunk=None, analysis=analysis)  # type: ignore[arg-type]
+
+    reduced = ParsedAnalysis({"name": "synthetic", "analyzed_components": [_component("README.md")]})
+    merged = merge_chunks(
+        ChunkedAnalysis([result("a.py", "README.md"), result("b.py", "a.py")]), reduced
+    )
+
+    assert [c["file_name"] for c in merged.data["analyzed_components"]] == ["README.md", "a.py", "b.py"]
+    assert merged.data["files_to_check"] == [["a.py"], ["b.py"]]
+    assert not merged.partial
+
+
+def test_one_failed_chunk_does_not_rerun_the_others(small_chunks: int):
+    chunks = plan_chunks(_tree(), IgnoreRules())
+    repo = f"octo/{uuid.uuid4().hex}"
+    broken = chunked.build_chunk_prompt(chunks[-1])
+    prompts: list[str] = []
+
+    def generate(prompt: str, schema: type) -> str:
+        prompts.append(prompt)
+        if prompt == broken:
+            raise RuntimeError("500 INTERNAL")
+        return _answer(str(len(prompts)))
+
+    first = analyze_chunks(chunks, repo, generate)
+    assert [r.chunk.index for r in first.failed] == [chunks[-1].index]
+    assert first.failed[0].attempts == chunked.CHUNK_ATTEMPTS
+    merged = merge_chunks(first, ParsedAnalysis({"name": "synthetic", "analyzed_components": []}))
+    assert merged.partial
+    assert "analyzed_components" in merged.missing_fields
+
+    prompts.clear()
+    second = analyze_chunks(chunks, repo, generate)
+    assert set(prompts) == {broken}
+    assert sum(r.cached for r in second.results) == len(chunks) - 1
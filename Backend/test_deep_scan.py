@@ -0,0 +1,62 @@
+import pytest
+
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+from utils.GithubScrapper.github_client import GithubClient
+from utils.GithubScrapper.Scrapper import get_repo_tree
+from utils.Observability.log_pipeline import correlation_id, current_request_id
+from utils.Observability.metrics import count_github_calls
+from utils.Scan import deep_scan
+from utils.Scan.deep_scan import KeyFilesStats, score_path, select_key_files
+from utils.Scan.prompt_builder import IgnoreRules
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "api/test_routes.py",
+        "routes/tests.py",
+        "api/routes_test.go",
+        "src/api.test.ts",
+        "src/api.spec.js",
+        "src/routes/UserControllerTest.java",
+        "conftest.py",
+        "tests/routes/users.py",
+    ],
+)
+def test_test_files_are_skipped(path: str):
+    assert score_path(path) == 0
+
+
+@pytest.mark.parametrize(
+    "path", ["routes/contest.py", "routes/latest.js", "core/attestation.go", "routes/testimonials.py"]
+)
+def test_sources_with_test_inside_their_name_are_kept(path: str):
+    assert score_path(path) > 0
+
+
+def test_key_file_downloads_run_in_the_callers_context(monkeypatch: pytest.MonkeyPatch):
+    repo = SyntheticRepo(
+        directories=2,
+        extra_files={f"routes/route{i}.py": f"# route {i}\n" for i in range(6)},
+    )
+    seen_request_ids = []
+    fetch = deep_scan.get_blob_content
+
+    def recording_fetch(*args):
+        seen_request_ids.append(current_request_id())
+        return fetch(*args)
+
+    monkeypatch.setattr(deep_scan, "get_blob_content", recording_fetch)
+    with FakeGithubServer(repo) as server:
+        github_repo = GithubClient("token", base_url=server.url, cache=None, limiter=None).get_repo(
+            repo.full_name
+        )
+        blobs = get_repo_tree(github_repo).blobs
+        files, _ = select_key_files(blobs, IgnoreRules())
+
+        with correlation_id("req-1"), count_github_calls() as calls:
+            deep_scan.fetch_key_files(github_repo, files, KeyFilesStats())
+
+    assert len(files) == 6
+    assert calls[0] == 6
+    assert seen_request_ids == ["req-1"] * 6
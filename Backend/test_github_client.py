@@ -0,0 +1,84 @@
+from typing import Iterator
+
+import pytest
+
+from benchmarks.fake_github import FakeGithubServer, SyntheticRepo
+from utils.Cache.backends import MemoryBackend
+from utils.GithubScrapper.github_client import GithubClient
+from utils.GithubScrapper.http_cache import ConditionalRequestCache
+
+
+@pytest.fixture
+def server() -> Iterator[FakeGithubServer]:
+    with FakeGithubServer(SyntheticRepo(directories=3), extra_repos=250) as fake:
+        yield fake
+
+
+def _cache(max_bytes: int = 64 * 1024 * 1024) -> ConditionalRequestCache:
+    return ConditionalRequestCache(MemoryBackend("github_http", max_bytes=max_bytes))
+
+
+def _client(server: FakeGithubServer, cache: ConditionalRequestCache, token: str = "token-a") -> GithubClient:
+    return GithubClient(token, base_url=server.url, cache=cache, limiter=None)
+
+
+def test_repeat_request_is_answered_by_a_304(server: FakeGithubServer):
+    cache = _cache()
+    client = _client(server, cache)
+
+    first = client.get("/repos/octo/synthetic")
+    second = client.get("/repos/octo/synthetic")
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.body == first.body
+    assert server.not_modified_count == 1
+    stats = cache.stats()
+    assert (stats.hits, stats.stores, stats.entries) == (1, 1, 1)
+    assert stats.bytes_saved == len(first.body)
+
+
+def test_entries_are_not_shared_between_tokens(server: FakeGithubServer):
+    cache = _cache()
+    _client(server, cache, "token-a").get("/repos/octo/synthetic")
+
+    other = _client(server, cache, "token-b").get("/repos/octo/synthetic")
+
+    assert not other.from_cache
+    assert server.not_modified_count == 0
+    assert cache.stats().entries == 2
+    assert ConditionalRequestCache.key("token-a", "u") != ConditionalRequestCache.key("token-b", "u")
+
+
+def test_least_recently_used_bodies_are_evicted_past_the_byte_bound(server: FakeGithubServer):
+    paths = ["/repos/octo/synthetic", "/repos/octo/synthetic/branches/main", "/user"]
+    client = _client(server, _cache())
+    sizes = [len(client.get(path).body) for path in paths]
+
+    # Room for the two most recent entries (bodies plus their validators), not all three
+    cache = _cache(max_bytes=sizes[1] + sizes[2] + 200)
+    client = _client(server, cache)
+    for path in paths:
+        client.get(path)
+    stats = cache.stats()
+    assert stats.evictions == 1
+    assert stats.entries == 2
+    assert stats.bytes_stored <= sizes[1] + sizes[2] + 200
+
+    server.reset_count()
+    assert not client.get(paths[0]).from_cache
+    assert client.get(paths[2]).from_cache
+
+
+def test_pagination_follows_link_headers_and_replays_them_from_the_cache(server: FakeGithubServer):
+    client = _client(server, _cache())
+
+    names = [repo["full_name"] for repo in client.paginate("/user/repos")]
+    assert len(names) == 251
+    assert len(set(names)) == 251
+    assert server.request_count == 3
+
+    server.reset_count()
+    again = [repo["full_name"] for repo in client.paginate("/user/repos")]
+    assert again == names
+    assert server.not_modified_count == 3
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from utils.Observability.log_pipeline import correlation_id, current_request_id
+from utils.Scan import job_queue
+from utils.Scan.job_queue import JOB_SUCCEEDED, ScanJobQueue
+
+
+class _Outcome:
+    def to_response(self) -> dict:
+        return {"status": "success"}
+
+
+def test_job_result_is_stored_under_the_jobs_request_id(monkeypatch: pytest.MonkeyPatch):
+    seen: dict[str, object] = {}
+
+    def fake_scan(*args):
+        seen["scan"] = current_request_id()
+        return _Outcome()
+
+    def fake_save(owner_id, outcome):
+        seen["save"] = current_request_id()
+
+    monkeypatch.setattr(job_queue, "get_github_client", lambda token: None)
+    monkeypatch.setattr(job_queue, "execute_scan", fake_scan)
+    monkeypatch.setattr(job_queue, "save_scan_result", fake_save)
+
+    async def scenario() -> None:
+        queue = ScanJobQueue(workers=1, max_pending=1, max_retained=1)
+        with correlation_id("req-job"):
+            job = queue.submit("token", "octo/synthetic", owner_id="owner")
+        try:
+            async for _ in queue.events(job):
+                pass
+        finally:
+            await queue.stop()
+        assert job.status == JOB_SUCCEEDED
+
+    asyncio.run(scenario())
+    assert seen == {"scan": "req-job", "save": "req-job"}
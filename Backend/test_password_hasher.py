@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.Auth.hash_pass_handler import HasherOverloadedError, PasswordHasher
+
+
+def test_cancelled_queued_calls_leave_the_queue():
+    async def scenario() -> None:
+        hasher = PasswordHasher(workers=1, max_queue=3)
+        release = threading.Event()
+        busy = asyncio.ensure_future(hasher._run(release.wait))
+        try:
+            await asyncio.sleep(0.05)
+            queued = [asyncio.ensure_future(hasher._run(lambda: "queued")) for _ in range(3)]
+            await asyncio.sleep(0)
+            assert hasher.stats().queue_depth == 3
+            with pytest.raises(HasherOverloadedError):
+                await hasher._run(lambda: "rejected")
+
+            for call in queued:
+                call.cancel()
+            await asyncio.gather(*queued, return_exceptions=True)
+            await asyncio.sleep(0.05)
+            assert hasher.stats().queue_depth == 0
+        finally:
+            # Never leave the worker blocked, or the interpreter cannot exit
+            release.set()
+        await busy
+
+        assert await hasher._run(lambda: "after") == "after"
+        stats = hasher.stats()
+        assert (stats.queue_depth, stats.in_flight, stats.completed) == (0, 0, 2)
+
+    asyncio.run(scenario())
+
+
+def test_hash_and_verify_round_trip():
+    async def scenario() -> None:
+        hasher = PasswordHasher(workers=2, max_queue=0)
+        hashed = await hasher.hash("correct horse")
+        assert await hasher.verify("correct horse", hashed)
+        assert not await hasher.verify("wrong horse", hashed)
+
+    asyncio.run(scenario())
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.GithubScrapper import rate_limit
+from utils.GithubScrapper.rate_limit import (
+    GithubPriority,
+    GithubRateLimiter,
+    GithubRateLimitError,
+    github_priority,
+)
+
+
+class FakeClock:
+    """Stands in for the time module; sleeping advances it instead of waiting."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return 1_700_000_000.0 + self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.now += delay
+        await _real_sleep(0)
+
+
+_real_sleep = asyncio.sleep
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", fake)
+    monkeypatch.setattr(rate_limit, "asyncio", SimpleNamespace(sleep=fake.sleep))
+    return fake
+
+
+def _limiter(**overrides: float) -> GithubRateLimiter:
+    settings = dict(rate=1.0, burst=1, reserve=500, max_wait=60.0, attempts=3, retry_base=1.0)
+    settings.update(overrides)
+    return GithubRateLimiter(**settings)
+
+
+def _budget(clock: FakeClock, remaining: int, reset_in: float = 3600.0) -> dict[str, str]:
+    return {
+        "x-ratelimit-limit": "5000",
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(clock.time() + reset_in),
+    }
+
+
+def test_interactive_requests_jump_queued_background_ones(clock: FakeClock):
+    limiter = _limiter()
+    limiter.acquire("token")  # spends the burst
+    served: list[str] = []
+
+    async def request(priority: GithubPriority) -> None:
+        with github_priority(priority):
+            await limiter.acquire_async("token")
+        served.append(priority.name)
+
+    async def scenario() -> None:
+        background = [asyncio.ensure_future(request(GithubPriority.BACKGROUND)) for _ in range(2)]
+        # Queued after the background requests, served before them
+        interactive = asyncio.ensure_future(request(GithubPriority.INTERACTIVE))
+        await asyncio.gather(*background, interactive)
+
+    asyncio.run(scenario())
+    assert served == ["INTERACTIVE", "BACKGROUND", "BACKGROUND"]
+    # Nobody got past the bucket early: the three requests took at least three refills
+    assert clock.now >= 1003.0
+
+
+def test_reserve_floor_refuses_background_work(clock: FakeClock):
+    limiter = _limiter(rate=0)
+    limiter.acquire("token")
+    limiter.release("token", 200, _budget(clock, remaining=600), "", attempt=0)
+
+    with github_priority(GithubPriority.BACKGROUND), pytest.raises(GithubRateLimitError) as refused:
+        limiter.acquire("token")
+    assert refused.value.retry_after == pytest.approx(3600.0)
+
+    with github_priority(GithubPriority.BATCH):
+        limiter.acquire("token")
+        assert limiter.forecast("token", 50).available == 99
+    limiter.acquire("token")
+    assert limiter.stats("token")["in_flight"] == 2
+
+
+def test_retry_after_pauses_the_token_then_resumes(clock: FakeClock):
+    limiter = _limiter(rate=0)
+    limiter.acquire("token")
+
+    delay = limiter.release("token", 429, {"retry-after": "5"}, "", attempt=0)
+    assert delay == 5.0
+    assert limiter.stats("token")["paused_for_seconds"] == 5.0
+
+    waited = asyncio.run(limiter.acquire_async("token"))
+    assert waited == pytest.approx(5.0)
+    assert limiter.release("token", 200, {}, "", attempt=1) is None
+
+    # A plain permission error is not retried, and retries run out
+    limiter.acquire("token")
+    assert limiter.release("token", 403, {}, "Resource not accessible", attempt=0) is None
+    limiter.acquire("token")
+    with pytest.raises(GithubRateLimitError):
+        limiter.release("token", 429, {"retry-after": "1"}, "", attempt=2)
+
+
+def test_require_raises_when_the_budget_cannot_be_met(clock: FakeClock):
+    limiter = _limiter(rate=0)
+    # Nothing known about the token yet: everything fits
+    assert limiter.require("token", 10_000).fits
+
+    limiter.acquire("token")
+    limiter.release("token", 200, _budget(clock, remaining=40, reset_in=900), "", attempt=0)
+
+    assert limiter.require("token", 40).available == 40
+    with pytest.raises(GithubRateLimitError) as refused:
+        limiter.require("token", 41)
+    assert refused.value.retry_after == pytest.approx(900.0)
+    with github_priority(GithubPriority.BATCH), pytest.raises(GithubRateLimitError):
+        limiter.require("token", 1)
+
+
+def test_idle_tokens_are_forgotten(clock: FakeClock):
+    limiter = _limiter()
+    limiter.acquire("token")
+    limiter.release("token", 200, {}, "", attempt=0)
+
+    limiter.stats("other")
+    assert "token" in limiter._states  # its bucket is still refilling
+
+    clock.now += 2
+    limiter.stats("third")
+    assert "token" not in limiter._states
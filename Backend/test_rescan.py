@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils.GithubScrapper.Scrapper import COMPARE_MAX_FILES, ChangedFile, CommitDiff, get_commit_diff
+from utils.Scan import rescan
+from utils.Scan.analysis_parser import ParsedAnalysis
+from utils.Scan.rescan import merge_rescan, plan_rescan
+
+
+REPO = SimpleNamespace(full_name="octo/synthetic")
+
+
+def _component(name: str, insights: str = "old") -> dict:
+    return {
+        "file_name": name,
+        "file_type": "dir" if "." not in name else "file",
+        "insights": insights,
+        "pros": "",
+        "cons": "",
+        "tags": [],
+    }
+
+
+PREVIOUS = {
+    "name": "synthetic",
+    "analyzed_components": [
+        _component("main.py"),
+        _component("routes"),
+        _component("utils/old_name.py"),
+        _component("utils/gone.py"),
+    ],
+    "summary": "Previous summary",
+    "score": {"overall": 6},
+}
+
+
+def _plan(monkeypatch: pytest.MonkeyPatch, *files: ChangedFile, **diff: object):
+    monkeypatch.setattr(
+        rescan, "get_commit_diff", lambda repo, base, head: CommitDiff(files=list(files), **diff)
+    )
+    return plan_rescan(REPO, "a" * 40, "b" * 40, PREVIOUS)
+
+
+def _names(analysis: ParsedAnalysis) -> list[str]:
+    return [component["file_name"] for component in analysis.data["analyzed_components"]]
+
+
+def test_renamed_file_drops_the_old_component(monkeypatch: pytest.MonkeyPatch):
+    plan = _plan(
+        monkeypatch,
+        ChangedFile("utils/new_name.py", "renamed", previous_path="utils/old_name.py"),
+        status="ahead",
+    )
+    assert plan.removed_paths == {"utils/old_name.py"}
+    assert [c["file_name"] for c in plan.affected] == ["utils/old_name.py"]
+
+    fresh = ParsedAnalysis({**PREVIOUS, "analyzed_components": [_component("utils/new_name.py", "new")]})
+    merged = merge_rescan(plan, fresh)
+    assert _names(merged) == ["main.py", "routes", "utils/gone.py", "utils/new_name.py"]
+
+
+def test_removed_file_is_dropped_unless_reanalyzed(monkeypatch: pytest.MonkeyPatch):
+    plan = _plan(
+        monkeypatch,
+        ChangedFile("utils/gone.py", "removed"),
+        ChangedFile("routes/users.py", "modified"),
+        status="ahead",
+    )
+    assert [c["file_name"] for c in plan.affected] == ["routes", "utils/gone.py"]
+
+    dropped = merge_rescan(
+        plan, ParsedAnalysis({**PREVIOUS, "analyzed_components": [_component("routes", "new")]})
+    )
+    assert _names(dropped) == ["main.py", "routes", "utils/old_name.py"]
+    assert dropped.data["analyzed_components"][1]["insights"] == "new"
+
+    kept = merge_rescan(
+        plan,
+        ParsedAnalysis(
+            {**PREVIOUS, "analyzed_components": [_component("./utils/gone.py", "still referenced")]}
+        ),
+    )
+    assert _names(kept) == ["main.py", "routes", "utils/old_name.py", "./utils/gone.py"]
+
+
+def test_truncated_or_large_diffs_fall_back_to_a_full_scan(monkeypatch: pytest.MonkeyPatch):
+    # GitHub stops listing files at its cap, so a full list may be incomplete
+    files = [{"filename": f"src/file{i}.py", "status": "modified"} for i in range(COMPARE_MAX_FILES)]
+    client = SimpleNamespace(get_json=lambda path, params: {"status": "ahead", "files": files})
+    assert get_commit_diff(SimpleNamespace(full_name="octo/synthetic", client=client), "a", "b").truncated
+
+    assert _plan(monkeypatch, ChangedFile("main.py", "modified"), status="ahead", truncated=True) is None
+    assert _plan(monkeypatch, ChangedFile("main.py", "modified"), status="diverged") is None
+
+    many = [ChangedFile(f"src/file{i}.py", "modified") for i in range(rescan.RESCAN_MAX_CHANGED_FILES + 1)]
+    assert _plan(monkeypatch, *many, status="ahead") is None
+    assert _plan(monkeypatch, *many[:-1], status="ahead") is not None
+
+
+def test_partial_reanalysis_falls_back_to_previous_fields(monkeypatch: pytest.MonkeyPatch):
+    plan = _plan(monkeypatch, ChangedFile("main.py", "modified"), status="ahead")
+    partial = ParsedAnalysis(
+        {"name": "synthetic", "analyzed_components": [_component("main.py", "new")], "summary": "New"},
+        partial=True,
+        missing_fields=["score", "files_to_check"],
+    )
+
+    merged = merge_rescan(plan, partial)
+
+    assert merged.partial
+    assert merged.data["summary"] == "New"
+    assert merged.data["score"] == {"overall": 6}
+    assert "files_to_check" not in merged.data
+    assert _names(merged) == ["main.py", "routes", "utils/old_name.py", "utils/gone.py"]
@@ -0,0 +1,26 @@
+import pytest
+
+from utils.Cache.backends import MemoryBackend
+from utils.Scan import scan_cache as scan_cache_module
+from utils.Scan.scan_cache import ScanCacheKey, ScanResultCache
+from utils.Scan.scan_pipeline import ScanOutcome
+
+
+def test_hits_are_served_without_decoding(monkeypatch: pytest.MonkeyPatch):
+    cache = ScanResultCache(MemoryBackend("scan_results"), latest_keys=None, use_database=False)
+    key = ScanCacheKey("octo/synthetic", "a" * 40, "prompt", "model")
+    stored = cache.set(key, {"summary": "cached", "score": 7})
+
+    decoded: list[bytes] = []
+    loads = scan_cache_module.loads
+    monkeypatch.setattr(scan_cache_module, "loads", lambda data: decoded.append(data) or loads(data))
+
+    cached, tier = cache.get(key)
+    assert tier == "memory"
+    body = ScanOutcome(cached, key, tier).to_response_json().encoded
+    assert stored.encoded in body
+    assert decoded == []
+
+    assert cached.result == {"summary": "cached", "score": 7}
+    assert cached.result is cached.result
+    assert decoded == [stored.encoded]
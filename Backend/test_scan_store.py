@@ -0,0 +1,49 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from database import SessionLocal
+from models.scan_result import ScanResult
+from utils.Scan.scan_cache import CachedScan, ScanCacheKey
+from utils.Scan.scan_pipeline import ScanOutcome
+from utils.Scan.scan_store import save_scan_result
+
+
+def _signup(client: TestClient, email: str) -> tuple[str, str]:
+    body = client.post("/api/auth/signup", json={"email": email, "password": "hunter22"}).json()
+    return body["user_id"], body["auth_token"]
+
+
+def _stored(user_id: str) -> ScanResult:
+    with SessionLocal() as db:
+        return db.scalars(select(ScanResult).where(ScanResult.user_id == uuid.UUID(user_id))).one()
+
+
+def test_search_is_limited_to_recruiters(client: TestClient):
+    _, token = _signup(client, f"user-{uuid.uuid4().hex[:12]}@example.com")
+    response = client.get("/api/scan/results/search", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+    _, token = _signup(client, "Recruiter@example.com")
+    response = client.get("/api/scan/results/search", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code != 403
+
+
+def test_unchanged_scan_is_not_rewritten(client: TestClient):
+    user_id, _ = _signup(client, f"user-{uuid.uuid4().hex[:12]}@example.com")
+    key = ScanCacheKey("octo/synthetic", "a" * 40, "prompt", "model")
+
+    save_scan_result(user_id, ScanOutcome(CachedScan.of({"summary": "first"}), key))
+    first = _stored(user_id)
+
+    # A cache hit of the same commit and model leaves the row alone
+    save_scan_result(user_id, ScanOutcome(CachedScan.of({"summary": "again"}), key))
+    again = _stored(user_id)
+    assert again.result == {"summary": "first"}
+    assert again.scanned_at == first.scanned_at
+
+    newer = ScanCacheKey("octo/synthetic", "b" * 40, "prompt", "model")
+    save_scan_result(user_id, ScanOutcome(CachedScan.of({"summary": "newer"}), newer))
+    latest = _stored(user_id)
+    assert (latest.commit_sha, latest.result) == ("b" * 40, {"summary": "newer"})
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.Scan.single_flight import SingleFlight
+
+
+def _gate(flights: SingleFlight, waiters: int) -> threading.Event:
+    """An event set once `waiters` callers have joined the flight in progress."""
+    joined = threading.Event()
+
+    def watch() -> None:
+        while flights.coalesced < waiters:
+            time.sleep(0.001)
+        joined.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    return joined
+
+
+def test_concurrent_callers_share_one_computation():
+    flights: SingleFlight[str] = SingleFlight("test")
+    joined = _gate(flights, 7)
+    calls = []
+
+    def compute() -> str:
+        calls.append(1)
+        assert joined.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flights.run("key", compute), range(8)))
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ["result"] * 8
+    assert sorted(coalesced for _, coalesced in results) == [False] + [True] * 7
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 7}
+
+
+def test_leader_failure_reaches_every_waiter():
+    flights: SingleFlight[str] = SingleFlight("test")
+    joined = _gate(flights, 3)
+
+    def compute() -> str:
+        assert joined.wait(5)
+        raise RuntimeError("model unavailable")
+
+    def call(_: int) -> str:
+        try:
+            flights.run("key", compute)
+        except RuntimeError as e:
+            return str(e)
+        return "no error"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(call, range(4))) == ["model unavailable"] * 4
+
+
+def test_cancelled_callers_leave_the_leader_running():
+    flights: SingleFlight[str] = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def compute() -> str:
+        calls.append(1)
+        assert release.wait(5)
+        return "result"
+
+    async def scenario() -> None:
+        leader = asyncio.ensure_future(flights.arun("key", compute))
+        waiter = asyncio.ensure_future(flights.arun("key", compute))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        waiter.cancel()
+        await asyncio.gather(leader, waiter, return_exceptions=True)
+        assert leader.cancelled() and waiter.cancelled()
+
+        # The work goes on for anyone still interested
+        late = asyncio.ensure_future(flights.join("key"))
+        await asyncio.sleep(0.01)
+        release.set()
+        assert await late == "result"
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_key_is_released_once_the_flight_completes():
+    flights: SingleFlight[int] = SingleFlight("test")
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert flights.run("key", compute) == (1, False)
+    assert flights.run("key", compute) == (2, False)
+    assert asyncio.run(flights.join("key")) is None
+
+    with pytest.raises(ValueError):
+        flights.run("key", lambda: int("not a number"))
+    # A failure is not remembered either
+    assert flights.run("key", compute) == (3, False)
+    assert flights.stats()["in_flight"] == 0
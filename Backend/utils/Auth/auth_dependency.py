@@ -0,0 +1,54 @@
+from fastapi import Depends, Header, HTTPException
+from typing import Annotated, Any
+import os
+
+from utils.Auth.token_cache import verified_token_cache
+from utils.Cache.backends import CacheUnavailableError
+
+
+# Accounts (by email, comma-separated) allowed to search every user's scans and
+# profiles; while unset nobody is
+RECRUITER_EMAILS = frozenset(
+    email.strip().lower() for email in os.getenv("RECRUITER_EMAILS", "").split(",") if email.strip()
+)
+
+
+def bearer_token(Authorization: Annotated[str | None, Header()] = None) -> str:
+    """Read the JWT from the Authorization header, with or without a Bearer prefix."""
+    if not Authorization:
+        raise HTTPException(
+            status_code=401, detail={"message": "Missing Authorization header"}
+        )
+    scheme, _, credentials = Authorization.partition(" ")
+    token = credentials if scheme.lower() == "bearer" and credentials else Authorization
+    return token.strip()
+
+
+def get_current_user(token: Annotated[str, Depends(bearer_token)]) -> dict[str, Any]:
+    try:
+        payload = verified_token_cache.verify(token)
+    except CacheUnavailableError:
+        # Fail closed: the token might have been revoked
+        raise HTTPException(
+            status_code=503, detail={"message": "Could not check the token, try again"}
+        )
+    if payload is None:
+        raise HTTPException(
+            status_code=401, detail={"message": "Invalid or expired token"}
+        )
+    return payload
+
+
+def get_current_recruiter(
+    user: Annotated[dict[str, Any], Depends(get_current_user)],
+) -> dict[str, Any]:
+    if str(user.get("email", "")).lower() not in RECRUITER_EMAILS:
+        raise HTTPException(
+            status_code=403, detail={"message": "Not allowed to search candidates"}
+        )
+    return user
+
+
+token_dependency = Annotated[str, Depends(bearer_token)]
+current_user_dependency = Annotated[dict[str, Any], Depends(get_current_user)]
+recruiter_dependency = Annotated[dict[str, Any], Depends(get_current_recruiter)]
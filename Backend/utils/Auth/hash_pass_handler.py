@@ -1,9 +1,21 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
 from passlib.context import CryptContext  # type: ignore[import]
 
+from utils.Observability.metrics import stage_timer
+
 
 # Initialize the password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 
 def hash_password(password: str) -> str:
 
@@ -13,3 +25,122 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
 
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class HasherOverloadedError(Exception):
+    """Raised when too many hashing requests are already waiting for a worker."""
+
+
+@dataclass
+class HasherStats:
+    workers: int
+    in_flight: int
+    queue_depth: int
+    completed: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "avg_wait_ms": round(
+                self.total_wait_seconds / self.completed * 1000 if self.completed else 0, 2
+            ),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+        }
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism up
+    to the pool size. Work beyond the pool size waits in the executor queue;
+    its depth and the time spent waiting are tracked for monitoring. Once
+    `max_queue` requests are waiting, new ones are rejected instead of piling
+    up latency for everyone.
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        # Cancelled while still queued (e.g. the client went away): never started
+        self._cancelled = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        submitted_at = time.perf_counter()
+        with self._lock:
+            if self.max_queue and self._queued() >= self.max_queue:
+                raise HasherOverloadedError("Password hashing queue is full")
+            self._submitted += 1
+
+        def task() -> T:
+            waited = time.perf_counter() - submitted_at
+            with self._lock:
+                self._started += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._completed += 1
+
+        def settle(future: "Future[T]") -> None:
+            if future.cancelled():
+                with self._lock:
+                    self._cancelled += 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(settle)
+        # Cancelling the awaiting coroutine cancels the queued task too
+        return await asyncio.wrap_future(future)
+
+    def _queued(self) -> int:
+        return self._submitted - self._started - self._cancelled
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> HasherStats:
+        with self._lock:
+            return HasherStats(
+                workers=self.workers,
+                in_flight=self._started - self._completed,
+                queue_depth=self._queued(),
+                completed=self._completed,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+            )
+
+
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))),
+    max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "512")),
+)
+
+
+async def hash_password_async(password: str) -> str:
+
+    with stage_timer("bcrypt_hash"):
+        return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+
+    with stage_timer("bcrypt_verify"):
+        return await password_hasher.verify(plain_password, hashed_password)
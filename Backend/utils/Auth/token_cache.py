@@ -0,0 +1,129 @@
+from typing import Any
+import hashlib
+import logging
+import os
+import time
+
+from utils.Auth.jwt_handler import verify_jwt
+from utils.Cache.backends import CacheBackend, create_backend
+from utils.Http.fast_json import dumps, loads
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on verified tokens kept in the cache
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+
+def token_digest(token: str) -> str:
+    """Stable key for a token so raw JWTs are never used as cache keys."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationError(Exception):
+    """The denylist could not record a revocation, so the token would stay valid."""
+
+
+def _expiry(payload: dict[str, Any]) -> float:
+    exp = payload.get("exp")
+    return float(exp) if isinstance(exp, (int, float)) else 0.0
+
+
+class TokenDenylist:
+    """Revoked tokens, each remembered only until its own `exp`.
+
+    With a shared cache backend a logout is seen by every worker, not just
+    the one that handled it. The backend must be durable: an evicted entry
+    would silently make its token valid again.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    def revoke(self, token: str, expires_at: float) -> None:
+        """Deny a token until `expires_at`; raises RevocationError if that cannot be stored."""
+        if not self.backend.set(token_digest(token), b"1", ttl=expires_at - time.time()):
+            logger.error("❌ Could not store a revocation in %s denylist", self.backend.kind)
+            raise RevocationError("Revocation could not be stored")
+
+    def is_revoked(self, token: str) -> bool:
+        """Raises CacheUnavailableError when the denylist cannot be read, rather than
+        letting a possibly revoked token through."""
+        return self.backend.get(token_digest(token), strict=True) is not None
+
+    def __len__(self) -> int:
+        return self.backend.stats().entries or 0
+
+
+class VerifiedTokenCache:
+    """Decoded JWT payloads in a bounded cache backend; entries expire at their `exp`."""
+
+    def __init__(self, backend: CacheBackend, denylist: TokenDenylist | None = None) -> None:
+        self.backend = backend
+        self.denylist = denylist
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        stored = self.backend.get(token_digest(token))
+        return loads(stored) if stored is not None else None
+
+    def set(self, token: str, payload: dict[str, Any]) -> None:
+        # Already expired tokens get a non-positive TTL and are not stored
+        self.backend.set(token_digest(token), dumps(payload), ttl=_expiry(payload) - time.time())
+
+    def discard(self, token: str) -> None:
+        self.backend.delete(token_digest(token))
+
+    def verify(self, token: str) -> dict[str, Any] | None:
+        """Return the token's payload, decoding and checking the signature only on a miss.
+
+        Raises CacheUnavailableError if the denylist cannot be read.
+        """
+        if self.denylist is not None and self.denylist.is_revoked(token):
+            return None
+
+        payload = self.get(token)
+        if payload is not None:
+            return payload
+
+        response = verify_jwt(token)
+        if response.get("success") is False:
+            return None
+        payload = response["userData"]
+        self.set(token, payload)
+        return payload
+
+    def revoke(self, token: str) -> bool:
+        """Deny a token until it expires. Returns False if the token was not valid.
+
+        Raises RevocationError if the denylist could not store it, and
+        CacheUnavailableError if it could not be read.
+        """
+        payload = self.verify(token)
+        if payload is None:
+            return False
+        self.discard(token)
+        if self.denylist is not None:
+            self.denylist.revoke(token, _expiry(payload))
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        usage = self.backend.stats().as_dict()
+        return {
+            "backend": usage["backend"],
+            "entries": usage["entries"],
+            "hits": usage["hits"],
+            "misses": usage["misses"],
+            "hit_rate": usage["hit_rate"],
+            "revoked": len(self.denylist) if self.denylist is not None else 0,
+        }
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+# Unbounded: each entry lives only until its token expires anyway
+token_denylist = TokenDenylist(create_backend("jwt_denylist", durable=True))
+verified_token_cache = VerifiedTokenCache(
+    create_backend("jwt_verified", max_entries=TOKEN_CACHE_MAX_ENTRIES),
+    denylist=token_denylist,
+)
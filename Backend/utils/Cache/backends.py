@@ -0,0 +1,432 @@
+import logging
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# "memory" (per process), "sqlite" (one WAL file shared by every worker on the host) or "redis"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+# File of the sqlite backend; keep it on a local disk, never a network mount
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "skillcred-cache.db")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Server of the durable stores (the JWT denylist), which must never lose an entry
+# before it expires: give it `maxmemory-policy noeviction`. Defaults to the cache
+# server, which then needs that policy too
+CACHE_REDIS_DURABLE_URL = os.getenv("CACHE_REDIS_DURABLE_URL", CACHE_REDIS_URL)
+# Prefix of every key on Redis, so deployments can share a server
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "skillcred")
+
+
+class CacheUnavailableError(Exception):
+    """A strict read could not reach the store, so its answer is unknown."""
+
+
+@dataclass
+class BackendStats:
+    """Counters of one cache. Hits, misses and sets are this process's; the rest describe the store."""
+
+    backend: str
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    # None where the store cannot tell cheaply (Redis)
+    entries: Optional[int] = None
+    bytes_stored: Optional[int] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "entries": self.entries,
+            "bytes_stored": self.bytes_stored,
+        }
+
+
+class CacheBackend(ABC):
+    """Byte values under string keys, with a time to live per entry and bounded size.
+
+    Each cache gets its own backend (`namespace`) with its own bounds: the
+    least recently used entries go once there are more than `max_entries`
+    or they add up to more than `max_bytes` (None: no bound). A storage
+    error is logged and behaves like a miss, so a cache outage never fails
+    a request; stores where a wrong miss is unsafe read with `strict`.
+    """
+
+    kind = "abstract"
+    # Storage errors that are logged and swallowed
+    errors: tuple[type[BaseException], ...] = ()
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+    ) -> None:
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, key: str, strict: bool = False) -> Optional[bytes]:
+        """The value, or None on a miss; a storage error raises CacheUnavailableError if `strict`."""
+        try:
+            value = self._get(key)
+        except self.errors as e:
+            logger.warning("⚠️ %s cache %s read failed: %s", self.kind, self.namespace, e)
+            if strict:
+                raise CacheUnavailableError(f"{self.kind} cache {self.namespace} is unavailable") from e
+            value = None
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store `value` for `ttl` seconds (the default TTL if None; forever if that is None too).
+
+        Returns False if the store failed. Values that are already expired or
+        exceed the bounds are skipped, which is not a failure.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return True
+        if self.max_entries == 0 or (self.max_bytes is not None and len(value) > self.max_bytes):
+            return True
+        try:
+            self._set(key, value, ttl)
+        except self.errors as e:
+            logger.warning("⚠️ %s cache %s write failed: %s", self.kind, self.namespace, e)
+            return False
+        with self._counter_lock:
+            self.sets += 1
+        return True
+
+    def delete(self, key: str) -> None:
+        try:
+            self._delete(key)
+        except self.errors as e:
+            logger.warning("⚠️ %s cache %s delete failed: %s", self.kind, self.namespace, e)
+
+    def clear(self) -> None:
+        """Drop every entry of this namespace and reset the counters."""
+        try:
+            self._clear()
+        except self.errors as e:
+            logger.warning("⚠️ %s cache %s clear failed: %s", self.kind, self.namespace, e)
+        with self._counter_lock:
+            self.hits = self.misses = self.sets = 0
+
+    def stats(self) -> BackendStats:
+        stats = BackendStats(self.kind, self.hits, self.misses, self.sets)
+        try:
+            stats.evictions, stats.entries, stats.bytes_stored = self._usage()
+        except self.errors as e:
+            logger.warning("⚠️ %s cache %s stats failed: %s", self.kind, self.namespace, e)
+        return stats
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes, ttl: Optional[float]) -> None: ...
+
+    @abstractmethod
+    def _delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def _clear(self) -> None: ...
+
+    @abstractmethod
+    def _usage(self) -> tuple[int, Optional[int], Optional[int]]:
+        """(evictions, entries, bytes stored)."""
+
+
+class MemoryBackend(CacheBackend):
+    """LRU dict in this process: the fastest, but every worker keeps (and warms) its own.
+
+    Expired entries go when they are next read, and in a sweep every
+    `PURGE_EVERY` writes, so unbounded stores do not keep them forever.
+    """
+
+    kind = "memory"
+    PURGE_EVERY = 256
+
+    def __init__(self, namespace: str, **bounds: Any) -> None:
+        super().__init__(namespace, **bounds)
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else math.inf
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (expires_at, value)
+            self._bytes += len(value)
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge_expired()
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._pop(key)
+        self._evictions += len(expired)
+
+    def _pop(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[1])
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._evictions = 0
+
+    def _usage(self) -> tuple[int, Optional[int], Optional[int]]:
+        with self._lock:
+            return self._evictions, len(self._entries), self._bytes
+
+
+class SQLiteBackend(CacheBackend):
+    """A table in a WAL-mode SQLite file that every worker process on the host opens.
+
+    Readers never block the writer or each other. Recency is tracked
+    coarsely (an entry's `used_at` is refreshed at most every
+    `TOUCH_SECONDS`) so that hits stay reads, and the bounds are enforced
+    every `EVICT_EVERY` writes of a process, so a busy store can overshoot
+    them briefly.
+    """
+
+    kind = "sqlite"
+    errors = (sqlite3.Error,)
+    TOUCH_SECONDS = 30.0
+    EVICT_EVERY = 32
+
+    def __init__(self, path: str, namespace: str, **bounds: Any) -> None:
+        super().__init__(namespace, **bounds)
+        self.path = path
+        self._table = f"cache_{namespace}"
+        self._local = threading.local()
+        self._writes = 0
+        self._evictions = 0
+        self._evict_lock = threading.Lock()
+        db = self._db()
+        db.execute(
+            f'CREATE TABLE IF NOT EXISTS "{self._table}" ('
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, used_at REAL NOT NULL)"
+        )
+        db.execute(
+            f'CREATE INDEX IF NOT EXISTS "ix_{self._table}_used_at" ON "{self._table}" (used_at)'
+        )
+
+    def _db(self) -> sqlite3.Connection:
+        """This thread's connection; sqlite3 connections must not be shared between threads."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            # Durable enough for a cache, and no fsync per write
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _get(self, key: str) -> Optional[bytes]:
+        db = self._db()
+        row = db.execute(
+            f'SELECT value, expires_at, used_at FROM "{self._table}" WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, used_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            db.execute(f'DELETE FROM "{self._table}" WHERE key = ? AND expires_at <= ?', (key, now))
+            return None
+        if used_at < now - self.TOUCH_SECONDS:
+            db.execute(f'UPDATE "{self._table}" SET used_at = ? WHERE key = ?', (now, key))
+        return value
+
+    def _set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        now = time.time()
+        self._db().execute(
+            f'INSERT INTO "{self._table}" (key, value, size, expires_at, used_at) '
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+            "size = excluded.size, expires_at = excluded.expires_at, used_at = excluded.used_at",
+            (key, value, len(value), now + ttl if ttl is not None else None, now),
+        )
+        with self._evict_lock:
+            self._writes += 1
+            due = self._writes % self.EVICT_EVERY == 0
+        if due:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used beyond either bound."""
+        db = self._db()
+        evicted = db.execute(
+            f'DELETE FROM "{self._table}" WHERE expires_at <= ?', (time.time(),)
+        ).rowcount
+        if self.max_entries is not None or self.max_bytes is not None:
+            evicted += db.execute(
+                f'DELETE FROM "{self._table}" WHERE key IN ('
+                "SELECT key FROM (SELECT key, ROW_NUMBER() OVER w AS n, SUM(size) OVER w AS running "
+                f'FROM "{self._table}" WINDOW w AS (ORDER BY used_at DESC ROWS UNBOUNDED PRECEDING)) '
+                "WHERE n > ? OR running > ?)",
+                (
+                    self.max_entries if self.max_entries is not None else sys.maxsize,
+                    self.max_bytes if self.max_bytes is not None else sys.maxsize,
+                ),
+            ).rowcount
+        with self._evict_lock:
+            self._evictions += evicted
+
+    def _delete(self, key: str) -> None:
+        self._db().execute(f'DELETE FROM "{self._table}" WHERE key = ?', (key,))
+
+    def _clear(self) -> None:
+        self._db().execute(f'DELETE FROM "{self._table}"')
+        with self._evict_lock:
+            self._evictions = 0
+
+    def _usage(self) -> tuple[int, Optional[int], Optional[int]]:
+        self._evict()
+        entries, size = self._db().execute(
+            f'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM "{self._table}"'
+        ).fetchone()
+        return self._evictions, entries, size
+
+
+class RedisBackend(CacheBackend):
+    """Keys on a Redis server (or anything speaking its protocol), shared by every host.
+
+    Expiry is Redis's own. The bounds are the server's: configure
+    `maxmemory` with an `allkeys-lru` policy on the cache server, and keep
+    the durable stores on one with `noeviction` (see CACHE_REDIS_DURABLE_URL);
+    here only values larger than `max_bytes` are refused. Needs the optional
+    `redis` package.
+    """
+
+    kind = "redis"
+
+    def __init__(self, url: str, prefix: str, namespace: str, **bounds: Any) -> None:
+        super().__init__(namespace, **bounds)
+        # Optional dependency: only deployments that pick this backend need it
+        import redis
+
+        self.errors = (redis.RedisError, OSError)
+        self._prefix = f"{prefix}:{namespace}:"
+        # RESP2: spoken by every Redis version and by the compatible servers too
+        self._redis = redis.Redis.from_url(
+            url, protocol=2, socket_timeout=1.0, socket_connect_timeout=1.0
+        )
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(self._prefix + key)
+
+    def _set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        self._redis.set(
+            self._prefix + key, value, px=max(int(ttl * 1000), 1) if ttl is not None else None
+        )
+
+    def _delete(self, key: str) -> None:
+        self._redis.delete(self._prefix + key)
+
+    def _clear(self) -> None:
+        batch: list[bytes] = []
+        for name in self._redis.scan_iter(match=self._prefix + "*", count=500):
+            batch.append(name)
+            if len(batch) == 500:
+                self._redis.delete(*batch)
+                batch.clear()
+        if batch:
+            self._redis.delete(*batch)
+
+    def _usage(self) -> tuple[int, Optional[int], Optional[int]]:
+        # Server-wide: Redis evicts across every namespace (and deployment) at once
+        return int(self._redis.info("stats").get("evicted_keys", 0)), None, None
+
+
+# Every backend created by `create_backend`, by namespace, for the stats endpoints
+cache_backends: dict[str, CacheBackend] = {}
+
+
+def create_backend(
+    namespace: str,
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    default_ttl: Optional[float] = None,
+    durable: bool = False,
+) -> CacheBackend:
+    """A CACHE_BACKEND store for one cache, registered under `namespace`.
+
+    Durable stores only ever drop entries when they expire: they take no
+    bounds and, on Redis, live on the CACHE_REDIS_DURABLE_URL server.
+    """
+    if durable and (max_entries is not None or max_bytes is not None):
+        raise ValueError(f"Durable cache {namespace} cannot be bounded")
+    bounds: dict[str, Any] = {
+        "max_entries": max_entries,
+        "max_bytes": max_bytes,
+        "default_ttl": default_ttl,
+    }
+    backend: CacheBackend
+    if CACHE_BACKEND == "memory":
+        backend = MemoryBackend(namespace, **bounds)
+    elif CACHE_BACKEND == "sqlite":
+        backend = SQLiteBackend(CACHE_SQLITE_PATH, namespace, **bounds)
+    elif CACHE_BACKEND == "redis":
+        url = CACHE_REDIS_DURABLE_URL if durable else CACHE_REDIS_URL
+        backend = RedisBackend(url, CACHE_REDIS_PREFIX, namespace, **bounds)
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+    cache_backends[namespace] = backend
+    return backend
@@ -0,0 +1,234 @@
+import gzip
+import hashlib
+import heapq
+import io
+import os
+import tarfile
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional
+from urllib.parse import quote
+
+from utils.GithubScrapper.github_client import GithubRepo
+from utils.GithubScrapper.Scrapper import FolderStructure
+
+
+# Compressed bytes downloaded before an archive is abandoned
+REPO_ARCHIVE_MAX_BYTES = int(os.getenv("REPO_ARCHIVE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Size of the pieces read off the socket and handed to the decompressor
+REPO_ARCHIVE_CHUNK_BYTES = int(os.getenv("REPO_ARCHIVE_CHUNK_BYTES", "65536"))
+# Plain-text files read in full (README, .gitignore) are cut at this size
+REPO_ARCHIVE_TEXT_MAX_BYTES = int(os.getenv("REPO_ARCHIVE_TEXT_MAX_BYTES", "1048576"))
+
+# Scores a file (path, size); files scoring 0 are never read
+SampleScorer = Callable[[str, int], int]
+
+
+class ArchiveTooLargeError(ValueError):
+    """The archive exceeds REPO_ARCHIVE_MAX_BYTES."""
+
+
+@dataclass
+class ArchiveFile:
+    path: str
+    size: int
+    score: int
+    content: bytes
+    truncated: bool = False
+    # Other paths whose kept bytes are identical
+    duplicates: List[str] = field(default_factory=list)
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha1(self.content).hexdigest()
+
+    @property
+    def rank(self) -> tuple[int, int, str]:
+        """Smaller is better: higher score, then shallower, then alphabetical."""
+        return (-self.score, self.path.count("/"), self.path)
+
+
+class _Worst:
+    """Heap entry that puts the worst-ranked sample on top."""
+
+    def __init__(self, sample: ArchiveFile) -> None:
+        self.sample = sample
+        self.rank = sample.rank
+
+    def __lt__(self, other: "_Worst") -> bool:
+        return self.rank > other.rank
+
+
+@dataclass
+class ArchiveStats:
+    compressed_bytes: int = 0
+    entries: int = 0
+    files: int = 0
+    candidates: int = 0
+    binary_skipped: int = 0
+
+
+@dataclass
+class RepoArchive:
+    structure: FolderStructure
+    readme: Optional[str] = None
+    gitignore: Optional[str] = None
+    # Highest-scoring sampled files, best first
+    samples: List[ArchiveFile] = field(default_factory=list)
+    stats: ArchiveStats = field(default_factory=ArchiveStats)
+
+
+class _ChunkReader(io.RawIOBase):
+    """File-like view of an iterator of byte chunks, for tarfile's stream mode."""
+
+    def __init__(self, chunks: Iterator[bytes], max_bytes: int) -> None:
+        self._chunks = chunks
+        self._buffer = b""
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target: bytearray) -> int:  # type: ignore[override]
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                raise ArchiveTooLargeError(
+                    f"Repository archive is larger than {self.max_bytes} bytes"
+                )
+            self._buffer = chunk
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def get_repo_archive(
+    repo: GithubRepo,
+    ref: str = "",
+    scorer: Optional[SampleScorer] = None,
+    max_samples: int = 0,
+    max_sample_bytes: int = 0,
+) -> RepoArchive:
+    """Build the folder structure, README and sampled file contents from one tarball download.
+
+    The gzipped tarball is decompressed and parsed while it downloads, so
+    memory stays bounded by the samples kept (`max_samples` files of at most
+    `max_sample_bytes` each) however large the repository is. Files are
+    sampled by `scorer`; binary files are skipped.
+    """
+    path = f"/repos/{repo.full_name}/tarball/{quote(ref or repo.default_branch, safe='')}"
+    with repo.client.stream(path) as response:
+        length = int(response.headers.get("content-length") or 0)
+        if length > REPO_ARCHIVE_MAX_BYTES:
+            raise ArchiveTooLargeError(
+                f"Repository archive is larger than {REPO_ARCHIVE_MAX_BYTES} bytes"
+            )
+        reader = _ChunkReader(
+            response.iter_bytes(REPO_ARCHIVE_CHUNK_BYTES), REPO_ARCHIVE_MAX_BYTES
+        )
+        archive = read_tarball(reader, scorer, max_samples, max_sample_bytes)
+        archive.stats.compressed_bytes = reader.bytes_read
+    return archive
+
+
+def read_tarball(
+    fileobj: io.RawIOBase,
+    scorer: Optional[SampleScorer] = None,
+    max_samples: int = 0,
+    max_sample_bytes: int = 0,
+) -> RepoArchive:
+    """Parse a gzipped GitHub tarball in a single forward pass."""
+    archive = RepoArchive(structure={})
+    stats = archive.stats
+    kept: list[_Worst] = []
+    by_digest: dict[str, ArchiveFile] = {}
+
+    # GzipFile decompresses through a buffered reader; tarfile's own "r|gz"
+    # re-copies its whole decompressed buffer on every 512-byte header read
+    with gzip.GzipFile(fileobj=fileobj, mode="rb") as unzipped, tarfile.open(
+        fileobj=unzipped, mode="r|"
+    ) as tar:
+        for member in tar:
+            stats.entries += 1
+            # Every path sits below a "<owner>-<repo>-<sha>/" folder
+            _, _, path = member.name.partition("/")
+            path = path.rstrip("/")
+            if not path:
+                continue
+            parts = path.split("/")
+            node = archive.structure
+            for part in parts[:-1]:
+                child = node.setdefault(part, {})
+                if isinstance(child, str):
+                    child = node[part] = {}
+                node = child
+            if member.isdir():
+                node.setdefault(parts[-1], {})
+                continue
+            # Regular files and symlinks are both listed as files, as in the git tree
+            node[parts[-1]] = path
+            if not member.isfile():
+                continue
+            stats.files += 1
+
+            if path in ("README.md", ".gitignore"):
+                text = _read(tar, member, REPO_ARCHIVE_TEXT_MAX_BYTES)[0]
+                if text is not None:
+                    decoded = text.decode("utf-8", errors="replace")
+                    if path == "README.md":
+                        archive.readme = decoded
+                    else:
+                        archive.gitignore = decoded
+
+            score = scorer(path, member.size) if scorer and max_samples else 0
+            if not score:
+                continue
+            stats.candidates += 1
+            sample = ArchiveFile(path, member.size, score, b"")
+            # Only read files that would make it into the kept set
+            if len(kept) >= max_samples and not sample.rank < kept[0].rank:
+                continue
+            content, sample.truncated = _read(tar, member, max_sample_bytes)
+            if content is None:
+                stats.binary_skipped += 1
+                continue
+            sample.content = content
+            twin = by_digest.get(sample.digest)
+            if twin is not None:
+                if sample.rank < twin.rank:
+                    # Identical files are listed under the best-ranked path
+                    twin.duplicates.append(twin.path)
+                    twin.path, twin.score, twin.size = path, score, member.size
+                    for entry in kept:
+                        entry.rank = entry.sample.rank
+                    heapq.heapify(kept)
+                else:
+                    twin.duplicates.append(path)
+                continue
+            by_digest[sample.digest] = sample
+            heapq.heappush(kept, _Worst(sample))
+            if len(kept) > max_samples:
+                del by_digest[heapq.heappop(kept).sample.digest]
+
+    archive.samples = sorted((entry.sample for entry in kept), key=lambda s: s.rank)
+    return archive
+
+
+def _read(
+    tar: tarfile.TarFile, member: tarfile.TarInfo, max_bytes: int
+) -> tuple[Optional[bytes], bool]:
+    """Read at most `max_bytes` of a member, cut at a line break; None for binary files."""
+    extracted = tar.extractfile(member)
+    if extracted is None:
+        return None, False
+    content = extracted.read(max_bytes)
+    if b"\0" in content[:8000]:
+        return None, False
+    truncated = member.size > len(content)
+    if truncated and b"\n" in content:
+        content = content.rsplit(b"\n", 1)[0]
+    return content, truncated
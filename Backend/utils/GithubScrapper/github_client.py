@@ -0,0 +1,325 @@
+import importlib.util
+import itertools
+import json
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, Mapping, Optional
+
+import httpx
+
+from utils.GithubScrapper.http_cache import ConditionalRequestCache, github_http_cache
+from utils.GithubScrapper.rate_limit import GithubRateLimiter, github_rate_limiter
+from utils.Observability.metrics import (
+    record_github_rate_limited,
+    record_github_request,
+    record_stage,
+)
+
+
+# Overridable so the scanner can be pointed at GitHub Enterprise or a local fake server
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_OAUTH_URL = os.getenv(
+    "GITHUB_OAUTH_URL", "https://github.com/login/oauth/access_token"
+)
+
+GITHUB_TIMEOUT_SECONDS = float(os.getenv("GITHUB_TIMEOUT_SECONDS", "30"))
+
+# Connection pool shared by every GitHub call in the process
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "100"))
+GITHUB_MAX_KEEPALIVE = int(os.getenv("GITHUB_MAX_KEEPALIVE", "20"))
+GITHUB_KEEPALIVE_SECONDS = float(os.getenv("GITHUB_KEEPALIVE_SECONDS", "60"))
+
+_DEFAULT_HEADERS = {
+    "Accept": "application/vnd.github+json",
+    "X-GitHub-Api-Version": "2022-11-28",
+}
+
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_http_lock = threading.Lock()
+
+
+def _http_options() -> dict[str, Any]:
+    return {
+        "timeout": GITHUB_TIMEOUT_SECONDS,
+        "limits": httpx.Limits(
+            max_connections=GITHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=GITHUB_MAX_KEEPALIVE,
+            keepalive_expiry=GITHUB_KEEPALIVE_SECONDS,
+        ),
+        # HTTP/2 multiplexes concurrent scans over one TLS connection when h2 is installed
+        "http2": importlib.util.find_spec("h2") is not None,
+    }
+
+
+def shared_http_client() -> httpx.Client:
+    """App-lifetime keep-alive connection pool for blocking GitHub calls."""
+    global _http_client
+    with _http_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(**_http_options())
+        return _http_client
+
+
+def shared_async_http_client() -> httpx.AsyncClient:
+    """App-lifetime keep-alive connection pool for GitHub calls made on the event loop."""
+    global _async_http_client
+    if _async_http_client is None:
+        _async_http_client = httpx.AsyncClient(**_http_options())
+    return _async_http_client
+
+
+async def close_shared_http_clients() -> None:
+    global _http_client, _async_http_client
+    with _http_lock:
+        http_client, _http_client = _http_client, None
+    if http_client is not None:
+        http_client.close()
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+
+
+class GithubAPIError(Exception):
+    def __init__(self, status: int, method: str, path: str, message: str) -> None:
+        super().__init__(f"GitHub API {method} {path} failed with {status}: {message}")
+        self.status = status
+
+
+@dataclass(frozen=True)
+class GithubResponse:
+    body: bytes
+    headers: Mapping[str, str]
+    from_cache: bool = False
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclass(frozen=True)
+class GithubRepo:
+    client: "GithubClient"
+    full_name: str
+    default_branch: str
+
+
+class GithubClient:
+    """Minimal GitHub REST client used by the scanner and the OAuth flow.
+
+    Requests go over the shared connection pools; `get*` methods block and
+    `aget*` methods run on the event loop. Every GET goes through `cache`,
+    which turns repeat requests into conditional ones and serves
+    `304 Not Modified` answers locally, and is scheduled by `limiter`, which
+    paces it against the token's rate limits and retries rate-limit answers.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = GITHUB_API_URL,
+        cache: Optional[ConditionalRequestCache] = github_http_cache,
+        limiter: Optional[GithubRateLimiter] = github_rate_limiter,
+    ) -> None:
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.limiter = limiter
+        self.headers = dict(_DEFAULT_HEADERS)
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+
+    def _request(
+        self, path: str, params: Optional[Mapping[str, Any]], conditional: bool = True
+    ) -> tuple[httpx.Request, str]:
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        request = httpx.Request("GET", url, params=params, headers=self.headers)
+        key = ConditionalRequestCache.key(self.token, str(request.url))
+        if conditional and self.cache is not None:
+            request.headers.update(self.cache.conditional_headers(key))
+        return request, key
+
+    def _resolve(
+        self, path: str, key: str, response: httpx.Response
+    ) -> Optional[GithubResponse]:
+        """Turn a response into a GithubResponse; None means "refetch unconditionally"."""
+        if response.status_code == 304 and self.cache is not None:
+            cached = self.cache.not_modified(key)
+            if cached is None:
+                # Entry was evicted between the request and the answer
+                return None
+            headers = {"link": cached.link} if cached.link else {}
+            return GithubResponse(cached.body, headers, from_cache=True)
+
+        if response.status_code >= 400:
+            raise GithubAPIError(
+                response.status_code, "GET", path, _error_message(response)
+            )
+        if self.cache is not None:
+            self.cache.store(key, response.headers, response.content)
+        return GithubResponse(response.content, response.headers)
+
+    def _acquire(self) -> None:
+        if self.limiter is not None:
+            _record_throttle(self.limiter.acquire(self.token))
+
+    async def _aacquire(self) -> None:
+        if self.limiter is not None:
+            _record_throttle(await self.limiter.acquire_async(self.token))
+
+    def _settle(self, response: Optional[httpx.Response], attempt: int) -> bool:
+        """Report a finished request (None: it failed to send) to the limiter; True means send it again."""
+        if response is not None:
+            record_github_request(response.status_code)
+        if self.limiter is None:
+            return False
+        if response is None:
+            self.limiter.release(self.token, 0, {}, "", attempt)
+            return False
+        body = response.text if response.status_code in (403, 429) else ""
+        if self.limiter.release(self.token, response.status_code, response.headers, body, attempt) is None:
+            return False
+        record_github_rate_limited()
+        return True
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        http = shared_http_client()
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                response = http.send(request)
+            except BaseException:
+                self._settle(None, attempt)
+                raise
+            if not self._settle(response, attempt):
+                return response
+            attempt += 1
+
+    async def _asend(self, request: httpx.Request) -> httpx.Response:
+        http = shared_async_http_client()
+        attempt = 0
+        while True:
+            await self._aacquire()
+            try:
+                response = await http.send(request)
+            except BaseException:
+                self._settle(None, attempt)
+                raise
+            if not self._settle(response, attempt):
+                return response
+            attempt += 1
+
+    def get(self, path: str, params: Optional[Mapping[str, Any]] = None) -> GithubResponse:
+        request, key = self._request(path, params)
+        result = self._resolve(path, key, self._send(request))
+        if result is None:
+            request, key = self._request(path, params, conditional=False)
+            result = self._resolve(path, key, self._send(request))
+        assert result is not None
+        return result
+
+    async def aget(
+        self, path: str, params: Optional[Mapping[str, Any]] = None
+    ) -> GithubResponse:
+        request, key = self._request(path, params)
+        result = self._resolve(path, key, await self._asend(request))
+        if result is None:
+            request, key = self._request(path, params, conditional=False)
+            result = self._resolve(path, key, await self._asend(request))
+        assert result is not None
+        return result
+
+    @contextmanager
+    def stream(
+        self, path: str, params: Optional[Mapping[str, Any]] = None
+    ) -> Iterator[httpx.Response]:
+        """Open a large download (e.g. a repository archive) without buffering or caching it.
+
+        Redirects are followed; httpx drops the Authorization header when one
+        leaves the API host, as GitHub's signed archive URLs expect.
+        """
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        for attempt in itertools.count():
+            self._acquire()
+            with ExitStack() as opened:
+                try:
+                    response = opened.enter_context(
+                        shared_http_client().stream(
+                            "GET", url, params=params, headers=self.headers, follow_redirects=True
+                        )
+                    )
+                except BaseException:
+                    self._settle(None, attempt)
+                    raise
+                if response.status_code >= 400:
+                    response.read()
+                if self._settle(response, attempt):
+                    continue
+                if response.status_code >= 400:
+                    raise GithubAPIError(
+                        response.status_code, "GET", path, _error_message(response)
+                    )
+                yield response
+                return
+
+    def get_json(self, path: str, params: Optional[Mapping[str, Any]] = None) -> Any:
+        return self.get(path, params).json()
+
+    def paginate(
+        self, path: str, params: Optional[Mapping[str, Any]] = None
+    ) -> Iterator[Any]:
+        """Yield the items of a list endpoint across all of its pages."""
+        next_url: Optional[str] = path
+        next_params = {"per_page": 100, **(params or {})}
+        while next_url:
+            response = self.get(next_url, next_params)
+            yield from response.json()
+            next_url = _next_link(response.headers.get("link"))
+            next_params = None  # the next link already carries the query
+
+    def get_repo(self, full_name: str) -> GithubRepo:
+        data = self.get_json(f"/repos/{full_name}")
+        return GithubRepo(self, data["full_name"], data["default_branch"])
+
+    def get_user(self) -> dict[str, Any]:
+        return self.get_json("/user")
+
+    async def aget_user(self) -> dict[str, Any]:
+        return (await self.aget("/user")).json()
+
+
+async def exchange_oauth_code(code: str) -> httpx.Response:
+    """Exchange a GitHub OAuth code for an access token without blocking the loop."""
+    return await shared_async_http_client().post(
+        GITHUB_OAUTH_URL,
+        data={
+            "client_id": os.getenv("AUTH_GITHUB_ID"),
+            "client_secret": os.getenv("AUTH_GITHUB_SECRET"),
+            "code": code,
+        },
+        headers={"Accept": "application/json"},
+    )
+
+
+def _record_throttle(waited: float) -> None:
+    # Only waits worth seeing show up in Server-Timing
+    if waited >= 0.001:
+        record_stage("github_throttle", waited)
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        return response.json().get("message", response.text)
+    except ValueError:
+        return response.text
+
+
+def _next_link(link_header: Optional[str]) -> Optional[str]:
+    """The rel="next" URL of a GitHub `Link` header."""
+    for part in (link_header or "").split(","):
+        url, _, rel = part.partition(";")
+        if 'rel="next"' in rel:
+            return url.strip().strip("<>")
+    return None
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional
+
+from utils.Cache.backends import CacheBackend, create_backend
+from utils.Http.fast_json import dumps, loads
+
+
+# Upper bound on the bodies kept, in bytes
+GITHUB_HTTP_CACHE_MAX_BYTES = int(os.getenv("GITHUB_HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Entries are dropped this long after they were stored, even if the bound is not reached
+GITHUB_HTTP_CACHE_TTL_SECONDS = float(os.getenv("GITHUB_HTTP_CACHE_TTL_SECONDS", "86400"))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    link: Optional[str]  # pagination header, replayed on 304s
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def encode(self) -> bytes:
+        """The validators as one JSON line, then the body as is."""
+        return dumps([self.etag, self.last_modified, self.link]) + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, stored: bytes) -> "CachedResponse":
+        header, _, body = stored.partition(b"\n")
+        etag, last_modified, link = loads(header)
+        return cls(body, etag, last_modified, link)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+    entries: int = 0
+    bytes_stored: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_saved,
+            "entries": self.entries,
+            "bytes_stored": self.bytes_stored,
+        }
+
+
+class ConditionalRequestCache:
+    """Validators and bodies of GitHub GET responses, for conditional requests.
+
+    Entries are keyed by token and URL, so one user's private responses are
+    never replayed to another. A stored entry turns the next request into an
+    `If-None-Match` / `If-Modified-Since` request; a `304 Not Modified` answer
+    is served from here, costs no body transfer and does not count against
+    the GitHub rate limit. Entries live in a cache backend bounded by total
+    body bytes, so with a shared backend one worker's fetch saves the others'.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str, url: str) -> str:
+        token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        return f"{token_hash}:{url}"
+
+    def _entry(self, key: str) -> Optional[CachedResponse]:
+        stored = self.backend.get(key)
+        return CachedResponse.decode(stored) if stored is not None else None
+
+    def conditional_headers(self, key: str) -> dict[str, str]:
+        """Headers that make the request conditional on the stored entry, if any."""
+        entry = self._entry(key)
+        headers: dict[str, str] = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def not_modified(self, key: str) -> Optional[CachedResponse]:
+        """Handle a 304: return the stored entry (None if it was evicted meanwhile)."""
+        entry = self._entry(key)
+        with self._lock:
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            self._stats.bytes_saved += entry.size
+        return entry
+
+    def store(self, key: str, headers: Mapping[str, str], body: bytes) -> None:
+        """Record a fresh 200 response; responses without validators are not kept."""
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        with self._lock:
+            self._stats.misses += 1
+        if not (etag or last_modified):
+            return
+        self.backend.set(key, CachedResponse(body, etag, last_modified, headers.get("link")).encode())
+        with self._lock:
+            self._stats.stores += 1
+
+    def stats(self) -> CacheStats:
+        usage = self.backend.stats()
+        with self._lock:
+            return CacheStats(
+                **{
+                    **self._stats.__dict__,
+                    "evictions": usage.evictions,
+                    "entries": usage.entries or 0,
+                    "bytes_stored": usage.bytes_stored or 0,
+                }
+            )
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._lock:
+            self._stats = CacheStats()
+
+
+github_http_cache = ConditionalRequestCache(
+    create_backend(
+        "github_http",
+        max_bytes=GITHUB_HTTP_CACHE_MAX_BYTES,
+        default_ttl=GITHUB_HTTP_CACHE_TTL_SECONDS,
+    )
+)
@@ -0,0 +1,350 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Iterator, Mapping, Optional
+
+
+# Steady request rate allowed per token (GitHub's secondary limit is ~900 requests/minute); 0 disables pacing
+GITHUB_REQUESTS_PER_SECOND = float(os.getenv("GITHUB_REQUESTS_PER_SECOND", "15"))
+# Requests a token may send back to back before pacing kicks in
+GITHUB_REQUEST_BURST = int(os.getenv("GITHUB_REQUEST_BURST", "30"))
+# Hourly calls held back from batch work (twice that from background work) for interactive scans
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "500"))
+# Longest a request waits for budget before failing instead
+GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS", "60"))
+# Attempts per request when GitHub answers 403/429 for rate limiting
+GITHUB_RETRY_ATTEMPTS = int(os.getenv("GITHUB_RETRY_ATTEMPTS", "4"))
+GITHUB_RETRY_BASE_SECONDS = float(os.getenv("GITHUB_RETRY_BASE_SECONDS", "1"))
+
+
+class GithubPriority(IntEnum):
+    """Who is waiting on a request; lower values are served first."""
+
+    INTERACTIVE = 0  # a user holding an HTTP request open
+    BATCH = 1  # scan-all over a user's repositories
+    BACKGROUND = 2  # queued scan jobs
+
+
+_priority: ContextVar[GithubPriority] = ContextVar(
+    "github_priority", default=GithubPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def github_priority(priority: GithubPriority) -> Iterator[None]:
+    """Send the GitHub requests made in this context (and threads it spawns) at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> GithubPriority:
+    return _priority.get()
+
+
+class GithubRateLimitError(Exception):
+    """A request would exceed the token's GitHub budget, or kept being rate limited."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class BudgetForecast:
+    """Whether `calls` more requests fit in what the token has left this hour."""
+
+    calls: int
+    # False until a response has told us the token's budget; unknown budgets always fit
+    known: bool
+    available: int = 0
+    reset_in: float = 0.0
+
+    @property
+    def fits(self) -> bool:
+        return not self.known or self.calls <= self.available
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "known": self.known,
+            "available": self.available,
+            "reset_in_seconds": round(self.reset_in, 1),
+            "fits": self.fits,
+        }
+
+
+@dataclass
+class _TokenState:
+    # Token bucket
+    tokens: float
+    refilled_at: float
+    # Hourly budget as last reported by GitHub; `limit` is 0 until a response arrives
+    limit: int = 0
+    remaining: int = 0
+    reset_at: float = 0.0  # epoch seconds
+    in_flight: int = 0
+    # Everything for this token waits until then after a rate-limit answer
+    paused_until: float = 0.0
+    # (priority, ticket) of requests waiting for a slot
+    waiting: list[tuple[int, int]] = field(default_factory=list)
+
+
+class GithubRateLimiter:
+    """Schedules every GitHub request of a token against its rate limits.
+
+    Each token gets a token bucket that paces requests below GitHub's
+    secondary limits, and tracks the hourly budget reported in the
+    `X-RateLimit-*` headers of every response. Waiting requests are served by
+    priority: interactive scans first, and batch and background work may not
+    spend the last `reserve` calls of the hour. A 403/429 rate-limit answer
+    pauses the whole token, honouring `Retry-After` or the reset time, or
+    backing off exponentially with jitter.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        reserve: int,
+        max_wait: float,
+        attempts: int,
+        retry_base: float,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.attempts = max(attempts, 1)
+        self.retry_base = retry_base
+        self._states: dict[str, _TokenState] = {}
+        self._tickets = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def _state(self, token: str) -> _TokenState:
+        state = self._states.get(token)
+        if state is None:
+            self._evict_idle()
+            state = self._states[token] = _TokenState(float(self.burst), time.monotonic())
+        return state
+
+    def _evict_idle(self) -> None:
+        """Forget tokens that have nothing pending and nothing left to remember."""
+        now, wall = time.monotonic(), time.time()
+        idle = [
+            token
+            for token, state in self._states.items()
+            if not state.waiting
+            and not state.in_flight
+            and state.reset_at <= wall
+            and state.paused_until <= now
+            and (self.rate <= 0 or state.tokens + (now - state.refilled_at) * self.rate >= self.burst)
+        ]
+        for token in idle:
+            del self._states[token]
+
+    def _floor(self, priority: int) -> int:
+        return self.reserve * priority
+
+    def _available(self, state: _TokenState) -> Optional[int]:
+        """Calls left this hour minus those in flight; None when unknown or the window has reset."""
+        if not state.limit or time.time() >= state.reset_at:
+            return None
+        return state.remaining - state.in_flight
+
+    def _try_acquire(self, state: _TokenState, priority: int, ticket: int) -> float:
+        """Take a slot for the ticket (returns 0) or say how long to wait before trying again."""
+        now = time.monotonic()
+        if state.paused_until > now:
+            return state.paused_until - now
+
+        available = self._available(state)
+        if available is not None and available <= self._floor(priority):
+            reset_in = state.reset_at - time.time()
+            if reset_in > self.max_wait:
+                raise GithubRateLimitError(
+                    f"GitHub budget for {GithubPriority(priority).name.lower()} requests is spent "
+                    f"({max(available, 0)} calls left, resets in {reset_in:.0f}s)",
+                    retry_after=reset_in,
+                )
+            return max(reset_in, 0.05)
+
+        if state.waiting[0] != (priority, ticket):
+            # Someone more urgent (or earlier) goes first; they notify when done
+            return 1 / self.rate if self.rate > 0 else 0.05
+
+        if self.rate > 0:
+            state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+            state.refilled_at = now
+            if state.tokens < 1:
+                return (1 - state.tokens) / self.rate
+            state.tokens -= 1
+        heapq.heappop(state.waiting)
+        state.in_flight += 1
+        self._changed.notify_all()
+        return 0.0
+
+    def _enqueue(self, token: str, priority: int) -> tuple[_TokenState, int]:
+        ticket = next(self._tickets)
+        state = self._state(token)
+        heapq.heappush(state.waiting, (priority, ticket))
+        return state, ticket
+
+    def _withdraw(self, state: _TokenState, priority: int, ticket: int) -> None:
+        """Drop a waiter that gave up (error or cancellation) so it stops blocking the queue."""
+        if (priority, ticket) in state.waiting:
+            state.waiting.remove((priority, ticket))
+            heapq.heapify(state.waiting)
+            self._changed.notify_all()
+
+    def acquire(self, token: str) -> float:
+        """Block until the token may send a request; returns the seconds spent waiting."""
+        priority = current_priority()
+        started = time.monotonic()
+        with self._lock:
+            state, ticket = self._enqueue(token, priority)
+            try:
+                while True:
+                    delay = self._try_acquire(state, priority, ticket)
+                    if not delay:
+                        return time.monotonic() - started
+                    self._changed.wait(delay)
+            finally:
+                self._withdraw(state, priority, ticket)
+
+    async def acquire_async(self, token: str) -> float:
+        """`acquire` for the event loop: waits with asyncio.sleep instead of blocking."""
+        priority = current_priority()
+        started = time.monotonic()
+        with self._lock:
+            state, ticket = self._enqueue(token, priority)
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_acquire(state, priority, ticket)
+                if not delay:
+                    return time.monotonic() - started
+                await asyncio.sleep(delay)
+        finally:
+            with self._lock:
+                self._withdraw(state, priority, ticket)
+
+    def release(
+        self, token: str, status: int, headers: Mapping[str, str], body: str, attempt: int
+    ) -> Optional[float]:
+        """Record a response; returns how long to back off before retrying, or None if it was not rate limited.
+
+        Raises GithubRateLimitError once the attempts are used up or the wait
+        would be longer than `max_wait`.
+        """
+        with self._lock:
+            state = self._state(token)
+            state.in_flight = max(state.in_flight - 1, 0)
+            self._observe(state, headers)
+            delay = self._backoff(state, status, headers, body, attempt)
+            if delay is not None:
+                state.paused_until = max(state.paused_until, time.monotonic() + delay)
+            self._changed.notify_all()
+        if delay is not None and (attempt + 1 >= self.attempts or delay > self.max_wait):
+            raise GithubRateLimitError(
+                f"GitHub rate limit hit ({status}), retry in {delay:.0f}s", retry_after=delay
+            )
+        return delay
+
+    def _observe(self, state: _TokenState, headers: Mapping[str, str]) -> None:
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset_at = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        if reset_at != state.reset_at:
+            state.limit, state.remaining, state.reset_at = limit, remaining, reset_at
+        else:
+            # Responses arrive out of order; within a window the lowest count is the latest
+            state.remaining = min(state.remaining, remaining)
+
+    def _backoff(
+        self,
+        state: _TokenState,
+        status: int,
+        headers: Mapping[str, str],
+        body: str,
+        attempt: int,
+    ) -> Optional[float]:
+        if status not in (403, 429):
+            return None
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        if headers.get("x-ratelimit-remaining") == "0":
+            return max(state.reset_at - time.time(), 0.0) + 1
+        if status == 403 and "rate limit" not in body.lower():
+            # A plain permission error
+            return None
+        # Secondary limit without a hint: exponential backoff with jitter
+        ceiling = self.retry_base * 2**attempt
+        return random.uniform(ceiling / 2, ceiling)
+
+    def forecast(self, token: str, calls: int, priority: Optional[GithubPriority] = None) -> BudgetForecast:
+        """Predict whether `calls` more requests fit in the token's remaining budget."""
+        if priority is None:
+            priority = current_priority()
+        with self._lock:
+            state = self._state(token)
+            available = self._available(state)
+            if available is None:
+                return BudgetForecast(calls, known=False)
+            return BudgetForecast(
+                calls,
+                known=True,
+                available=max(available - self._floor(priority), 0),
+                reset_in=max(state.reset_at - time.time(), 0.0),
+            )
+
+    def require(self, token: str, calls: int, what: str = "This scan") -> BudgetForecast:
+        """`forecast`, raising GithubRateLimitError up front when the work cannot finish."""
+        forecast = self.forecast(token, calls)
+        if not forecast.fits:
+            raise GithubRateLimitError(
+                f"{what} needs about {calls} GitHub calls but only {forecast.available} are left "
+                f"for {current_priority().name.lower()} work; the budget resets in {forecast.reset_in:.0f}s",
+                retry_after=forecast.reset_in,
+            )
+        return forecast
+
+    def stats(self, token: str) -> dict[str, Any]:
+        with self._lock:
+            state = self._state(token)
+            return {
+                "limit": state.limit,
+                "remaining": state.remaining,
+                "reset_in_seconds": round(max(state.reset_at - time.time(), 0.0), 1),
+                "in_flight": state.in_flight,
+                "waiting": len(state.waiting),
+                "paused_for_seconds": round(max(state.paused_until - time.monotonic(), 0.0), 1),
+            }
+
+
+github_rate_limiter = GithubRateLimiter(
+    rate=GITHUB_REQUESTS_PER_SECOND,
+    burst=GITHUB_REQUEST_BURST,
+    reserve=GITHUB_RATE_LIMIT_RESERVE,
+    max_wait=GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS,
+    attempts=GITHUB_RETRY_ATTEMPTS,
+    retry_base=GITHUB_RETRY_BASE_SECONDS,
+)
@@ -0,0 +1,77 @@
+import json
+from typing import Any, Mapping
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used without it
+    orjson = None
+
+
+class RawJSON:
+    """JSON that is already encoded, written into a response as is."""
+
+    __slots__ = ("encoded",)
+
+    def __init__(self, encoded: bytes) -> None:
+        self.encoded = encoded
+
+
+def _default(value: Any) -> Any:
+    # The types orjson encodes natively but the stdlib encoder does not
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON: orjson when installed, the stdlib encoder otherwise."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dumps_str(value: Any) -> str:
+    return dumps(value).decode("utf-8")
+
+
+def splice(value: Mapping[str, Any]) -> bytes:
+    """Encode a mapping whose values may be RawJSON, copying those bytes instead of re-encoding them.
+
+    Nested mappings are spliced too, so RawJSON may sit at any depth; other
+    values are encoded as usual. The large payload is copied once, into the
+    final join.
+    """
+    parts: list[bytes] = []
+    _splice_into(parts, value)
+    return b"".join(parts)
+
+
+def _splice_into(parts: list[bytes], value: Mapping[str, Any]) -> None:
+    parts.append(b"{")
+    for i, (key, item) in enumerate(value.items()):
+        parts.append(b"," if i else b"")
+        parts.append(dumps(key) + b":")
+        if isinstance(item, RawJSON):
+            parts.append(item.encoded)
+        elif isinstance(item, Mapping):
+            _splice_into(parts, item)
+        else:
+            parts.append(dumps(item))
+    parts.append(b"}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, or sent as is when the content is RawJSON."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, RawJSON):
+            return content.encoded
+        return dumps(content)
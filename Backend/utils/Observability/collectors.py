@@ -0,0 +1,85 @@
+from typing import Any, Iterator
+
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+from sqlalchemy import Engine
+
+from database import async_engine, engine
+from utils.Auth.hash_pass_handler import password_hasher
+from utils.Auth.token_cache import verified_token_cache
+from utils.Cache.backends import cache_backends
+from utils.GithubScrapper.http_cache import github_http_cache
+
+
+def _pool_stats(db_engine: Engine) -> dict[str, Any]:
+    pool = db_engine.pool
+    # SQLite uses pools without sizing; only QueuePool-style pools report these
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+def _gauges(name: str, documentation: str, stats: dict[str, Any]) -> GaugeMetricFamily:
+    family = GaugeMetricFamily(name, documentation, labels=["field"])
+    for field, value in stats.items():
+        if isinstance(value, (int, float)):
+            family.add_metric([field], value)
+    return family
+
+
+class SkillCredCollector(Collector):
+    """Expose pool, queue and cache counters the app already keeps, read at scrape time."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        pools = GaugeMetricFamily(
+            "skillcred_db_pool_connections",
+            "Database connection pool state",
+            labels=["engine", "state"],
+        )
+        for name, db_engine in (("sync", engine), ("async", async_engine.sync_engine)):
+            for state, value in _pool_stats(db_engine).items():
+                pools.add_metric([name, state], value)
+        yield pools
+
+        yield _gauges(
+            "skillcred_password_hasher",
+            "bcrypt worker pool state",
+            password_hasher.stats().as_dict(),
+        )
+        yield _gauges(
+            "skillcred_github_http_cache",
+            "GitHub conditional-request cache counters",
+            github_http_cache.stats().as_dict(),
+        )
+        yield _gauges(
+            "skillcred_token_cache",
+            "Verified JWT cache counters",
+            verified_token_cache.stats(),
+        )
+
+        backends = GaugeMetricFamily(
+            "skillcred_cache_backend",
+            "Scan, GitHub and JWT cache backends (hits, misses and sets are this worker's)",
+            labels=["namespace", "backend", "field"],
+        )
+        for namespace, backend in cache_backends.items():
+            stats = backend.stats().as_dict()
+            for field, value in stats.items():
+                if isinstance(value, (int, float)):
+                    backends.add_metric([namespace, stats["backend"], field], value)
+        yield backends
+
+
+_registered = False
+
+
+def register_collectors() -> None:
+    global _registered
+    if not _registered:
+        REGISTRY.register(SkillCredCollector())
+        _registered = True
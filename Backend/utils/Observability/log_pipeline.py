@@ -0,0 +1,235 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterator, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.Observability.metrics import record_log_dropped
+
+
+# Root log level at startup; change it at runtime with set_log_level (PUT /log-level)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" for humans, "json" for one structured object per line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Records waiting for the writer thread; past that they are dropped and counted, never waited on
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Prompts, model output and other payloads are cut to this many characters...
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
+# ...except in this share of requests, whose payloads are logged whole
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0"))
+# Required by PUT /log-level; while unset the level can only be read
+LOG_ADMIN_TOKEN = os.getenv("LOG_ADMIN_TOKEN", "")
+
+REQUEST_ID_HEADER = "x-request-id"
+# Incoming request ids are reused only if they look like one
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# Whether this request's payloads are logged whole; None outside requests
+_full_payloads: ContextVar[Optional[bool]] = ContextVar("full_payloads", default=None)
+
+
+@contextmanager
+def correlation_id(request_id: Optional[str] = None) -> Iterator[str]:
+    """Tag records logged in this context (and threads it spawns) with `request_id`, or a new one.
+
+    Also decides once, for everything in the context, whether payloads are
+    logged whole (see LogPayload).
+    """
+    request_id = request_id or uuid.uuid4().hex
+    id_token = _request_id.set(request_id)
+    sample_token = _full_payloads.set(random.random() < LOG_PAYLOAD_SAMPLE_RATE)
+    try:
+        yield request_id
+    finally:
+        _full_payloads.reset(sample_token)
+        _request_id.reset(id_token)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class LogPayload:
+    """A large string for a log message, cut to `max_chars` unless its request was sampled.
+
+    Nothing is sliced or copied until the writer thread formats the record,
+    and not at all when the level is disabled.
+    """
+
+    __slots__ = ("text", "max_chars", "full")
+
+    def __init__(self, text: str, max_chars: Optional[int] = None) -> None:
+        self.text = text
+        self.max_chars = LOG_PAYLOAD_MAX_CHARS if max_chars is None else max_chars
+        full = _full_payloads.get()
+        self.full = random.random() < LOG_PAYLOAD_SAMPLE_RATE if full is None else full
+
+    def __str__(self) -> str:
+        if self.full or len(self.text) <= self.max_chars:
+            return self.text
+        return f"{self.text[: self.max_chars]}… [{len(self.text) - self.max_chars} more chars]"
+
+
+class _ContextFilter(logging.Filter):
+    """Stamp the request id on each record while still in the thread that logged it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the writer thread unformatted; drop them when the queue is full.
+
+    The stock QueueHandler formats every record on the caller's thread so it
+    can be pickled; an in-process queue does not need that, so message
+    arguments are only interpolated by the writer. They must not be mutated
+    after logging.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            record_log_dropped()
+
+
+# LogRecord attributes every record has; anything else came in through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the request id and any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "thread": record.threadName,
+        }
+        entry.update(
+            (name, value) for name, value in vars(record).items() if name not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        return super().format(record)
+
+
+_handler: Optional[_NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging() -> None:
+    """Send every record through a bounded queue to one writer thread. Idempotent.
+
+    Replaces the root handlers, and uvicorn's own, so nothing writes to the
+    terminal on the request path.
+    """
+    global _handler, _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    _handler = _NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(LOG_LEVEL)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(_handler.queue, stream)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Write out what is still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def set_log_level(level: str, logger_name: str = "") -> None:
+    """Change a logger's level (the root logger by default) in the running process."""
+    value = logging.getLevelName(level.upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    logging.getLogger(logger_name or None).setLevel(value)
+
+
+def log_levels() -> dict[str, Any]:
+    """The root level, every logger with its own level, and the queue's state, in this process."""
+    levels = {"": logging.getLevelName(logging.getLogger().level)}
+    for name, known in sorted(logging.Logger.manager.loggerDict.items()):
+        if isinstance(known, logging.Logger) and known.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(known.level)
+    return {
+        "pid": os.getpid(),
+        "levels": levels,
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+    }
+
+
+class CorrelationIdMiddleware:
+    """Give each HTTP request an id (its `X-Request-ID`, or a new one) for its log records.
+
+    The id is echoed in the response's `X-Request-ID` header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1")
+        with correlation_id(incoming if _VALID_REQUEST_ID.match(incoming) else None) as request_id:
+
+            async def send_with_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (REQUEST_ID_HEADER.encode(), request_id.encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+logger = logging.getLogger(__name__)
+
+# Buckets from 1 ms to 2 min: bcrypt and GitHub calls sit at the low end, LLM calls at the top
+_STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "skillcred_stage_seconds",
+    "Time spent in one stage of a request (GitHub fetch, prompt build, LLM call, bcrypt, ...)",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "skillcred_http_request_seconds",
+    "End-to-end HTTP request latency",
+    ["method", "route", "status"],
+    buckets=_STAGE_BUCKETS,
+)
+GITHUB_REQUESTS = Counter(
+    "skillcred_github_requests_total",
+    "GitHub API requests sent, by response status",
+    ["status"],
+)
+GITHUB_RATE_LIMITED = Counter(
+    "skillcred_github_rate_limited_total",
+    "GitHub requests answered 403/429 for rate limiting and sent again after a backoff",
+)
+COALESCED_REQUESTS = Counter(
+    "skillcred_coalesced_requests_total",
+    "Requests that waited on an identical computation already in flight instead of running their own",
+    ["kind"],
+)
+LOG_RECORDS_DROPPED = Counter(
+    "skillcred_log_records_dropped_total",
+    "Log records dropped because the writer thread's queue was full",
+)
+GITHUB_REQUESTS_PER_SCAN = Histogram(
+    "skillcred_github_requests_per_scan",
+    "GitHub API requests made by one scan",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250, 500),
+)
+LLM_TOKENS = Counter(
+    "skillcred_llm_tokens_total",
+    "Tokens billed by the GenAI model",
+    ["kind"],
+)
+EVENT_LOOP_LAG = Histogram(
+    "skillcred_event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+EVENT_LOOP_LAG_LAST = Gauge(
+    "skillcred_event_loop_lag_last_seconds",
+    "Most recent event loop lag sample",
+)
+
+
+# Stage durations of the current HTTP request, read by the Server-Timing middleware
+_request_timings: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+# GitHub request counter of the scan running in the current context
+_github_calls: ContextVar[Optional[list[int]]] = ContextVar("github_calls", default=None)
+# Worker threads running in copies of a scan's context bump the same counter
+_github_calls_lock = threading.Lock()
+
+
+@contextmanager
+def collect_request_timings() -> Iterator[list[tuple[str, float]]]:
+    """Collect `stage_timer` durations recorded in this context (and threads it spawns)."""
+    timings: list[tuple[str, float]] = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+@contextmanager
+def count_github_calls() -> Iterator[list[int]]:
+    """Count GitHub requests made in this block; the count is `calls[0]`."""
+    calls = [0]
+    token = _github_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _github_calls.reset(token)
+
+
+def record_github_request(status: int) -> None:
+    GITHUB_REQUESTS.labels(str(status)).inc()
+    calls = _github_calls.get()
+    if calls is not None:
+        with _github_calls_lock:
+            calls[0] += 1
+
+
+def record_github_rate_limited() -> None:
+    GITHUB_RATE_LIMITED.inc()
+
+
+def record_coalesced_request(kind: str) -> None:
+    COALESCED_REQUESTS.labels(kind).inc()
+
+
+def record_log_dropped() -> None:
+    LOG_RECORDS_DROPPED.inc()
+
+
+def record_scan_github_calls(calls: int) -> None:
+    GITHUB_REQUESTS_PER_SCAN.observe(calls)
+
+
+def record_llm_usage(usage: Any) -> None:
+    """Count tokens from a GenAI `usage_metadata` object (missing fields are skipped)."""
+    if usage is None:
+        return
+    for kind, attr in (
+        ("prompt", "prompt_token_count"),
+        ("output", "candidates_token_count"),
+        ("thinking", "thoughts_token_count"),
+    ):
+        count = getattr(usage, attr, None)
+        if count:
+            LLM_TOKENS.labels(kind).inc(count)
+
+
+def server_timing_header(timings: list[tuple[str, float]], total: float) -> str:
+    """Format durations as a Server-Timing header, summing repeated stages."""
+    merged: dict[str, float] = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    merged["total"] = total
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items())
+
+
+class EventLoopLagMonitor:
+    """Sleep for `interval` in a loop and record how late each wake-up is."""
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            EVENT_LOOP_LAG.observe(lag)
+            EVENT_LOOP_LAG_LAST.set(lag)
+            if lag > 0.1:
+                logger.warning("🐢 Event loop lagged %.0f ms", lag * 1000)
+
+
+event_loop_lag_monitor = EventLoopLagMonitor(
+    interval=float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+)
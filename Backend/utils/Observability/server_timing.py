@@ -0,0 +1,66 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.Observability.metrics import (
+    HTTP_REQUEST_SECONDS,
+    collect_request_timings,
+    server_timing_header,
+)
+
+
+class ServerTimingMiddleware:
+    """Add a `Server-Timing` header with the request's stage durations.
+
+    Stages recorded with `stage_timer` before the response starts are included;
+    for streamed responses that is whatever ran before the first byte.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        with collect_request_timings() as timings:
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    header = server_timing_header(timings, time.perf_counter() - started)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", header.encode()),
+                        # Lets the browser's Resource Timing API see it cross-origin
+                        (b"timing-allow-origin", b"*"),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                HTTP_REQUEST_SECONDS.labels(
+                    scope["method"], _route_template(scope), str(status)
+                ).observe(time.perf_counter() - started)
+
+
+def _route_template(scope: Scope) -> str:
+    """Matched route as a template (e.g. `/api/scan/jobs/{job_id}`), never the raw path.
+
+    Routes of included routers only know their own path, so the static prefix
+    is recovered from the part of the request path in front of the match.
+    """
+    route = scope.get("route")
+    if route is None or not hasattr(route, "path_regex"):
+        return "unmatched"
+    path: str = scope["path"]
+    for i, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
@@ -0,0 +1,274 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from schemas.routesSchemas.scan import AnalyzedComponent, ScanAnalysis
+
+
+# Text allowed before the opening brace (a ```json fence, a short preamble)
+PREAMBLE_LIMIT = 512
+# Schema-invalid components tolerated before the output is treated as garbage
+MAX_INVALID_COMPONENTS = 5
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_START = "-0123456789tfn"
+_SCALAR_CHARS = "+-.0123456789eEtruefalsn"
+
+# Frame states: what the next token may be
+_KEY_OR_END = "key_or_end"  # after "{"
+_KEY = "key"  # after "," in an object
+_COLON = "colon"
+_VALUE_OR_END = "value_or_end"  # after "["
+_VALUE = "value"  # after ":" or "," in an array
+_COMMA = "comma"  # after a complete member or element
+
+
+class MalformedOutputError(ValueError):
+    """The model output cannot be (or can no longer become) a scan analysis."""
+
+
+@dataclass
+class ParsedAnalysis:
+    data: dict[str, Any]
+    partial: bool = False
+    missing_fields: list[str] = field(default_factory=list)
+    invalid_components: int = 0
+
+
+@dataclass
+class _Frame:
+    kind: str  # "{" or "["
+    start: int
+    state: str
+    key: Optional[str] = None  # object: member currently being read
+    key_in_parent: Optional[str] = None  # member name this container is the value of
+
+
+class AnalysisStreamParser:
+    """Incrementally parse a scan analysis as the model streams it.
+
+    `feed` checks the JSON structure character by character and raises
+    `MalformedOutputError` as soon as the text cannot be valid, so a bad
+    stream can be abandoned early. Each `analyzed_components` entry is
+    validated the moment its closing brace arrives. `finish` returns the
+    validated analysis, or a salvaged partial one if the output was cut off.
+    """
+
+    def __init__(
+        self,
+        preamble_limit: int = PREAMBLE_LIMIT,
+        max_invalid_components: int = MAX_INVALID_COMPONENTS,
+    ) -> None:
+        self.preamble_limit = preamble_limit
+        self.max_invalid_components = max_invalid_components
+        self.components: list[dict[str, Any]] = []
+        self.invalid_components = 0
+        self._text = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._token_start = 0
+        self._scalar_start: Optional[int] = None
+        # Longest prefix that becomes valid JSON once `closers` are appended
+        self._safe: Optional[tuple[int, str]] = None
+
+    # -------------------- FEEDING --------------------
+
+    def feed(self, text: str) -> list[dict[str, Any]]:
+        """Consume a chunk; return the components completed by it."""
+        completed_before = len(self.components)
+        self._text += text
+        text = self._text
+        for i in range(self._pos, len(text)):
+            self._step(text, i, text[i])
+        self._pos = len(text)
+        return self.components[completed_before:]
+
+    def _step(self, text: str, i: int, char: str) -> None:
+        if self._start is None:
+            if char == "{":
+                self._start = i
+                self._stack.append(_Frame("{", i, _KEY_OR_END))
+            elif i >= self.preamble_limit:
+                raise MalformedOutputError(
+                    f"No JSON object in the first {self.preamble_limit} characters"
+                )
+            return
+
+        if self._end is not None:
+            if char not in _WHITESPACE and char != "`":
+                raise MalformedOutputError(f"Unexpected text after the JSON object at {i}")
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                self._on_string(text, i)
+            return
+
+        if self._scalar_start is not None:
+            if char in _SCALAR_CHARS:
+                return
+            self._on_scalar(text, i)
+
+        if char in _WHITESPACE:
+            return
+
+        frame = self._stack[-1]
+        if char == '"':
+            if frame.state in (_KEY_OR_END, _KEY):
+                frame.state = _COLON
+            else:
+                self._expect_value(frame, i)
+            self._in_string = True
+            self._token_start = i
+        elif char in "{[":
+            self._expect_value(frame, i)
+            key = frame.key if frame.kind == "{" else None
+            state = _KEY_OR_END if char == "{" else _VALUE_OR_END
+            self._stack.append(_Frame(char, i, state, key_in_parent=key))
+        elif char in "}]":
+            closable = (_KEY_OR_END, _COMMA) if char == "}" else (_VALUE_OR_END, _COMMA)
+            if frame.kind != ("{" if char == "}" else "[") or frame.state not in closable:
+                raise MalformedOutputError(f"Unexpected '{char}' at {i}")
+            self._stack.pop()
+            if char == "}":
+                self._on_object(text, frame, i)
+            self._on_value(i + 1)
+        elif char == ":":
+            if frame.state != _COLON:
+                raise MalformedOutputError(f"Unexpected ':' at {i}")
+            frame.state = _VALUE
+        elif char == ",":
+            if frame.state != _COMMA:
+                raise MalformedOutputError(f"Unexpected ',' at {i}")
+            frame.state = _KEY if frame.kind == "{" else _VALUE
+        elif char in _SCALAR_START:
+            self._expect_value(frame, i)
+            self._scalar_start = i
+        else:
+            raise MalformedOutputError(f"Unexpected {char!r} at {i}")
+
+    def _expect_value(self, frame: _Frame, i: int) -> None:
+        allowed = (_VALUE,) if frame.kind == "{" else (_VALUE, _VALUE_OR_END)
+        if frame.state not in allowed:
+            raise MalformedOutputError(f"Unexpected value at {i}")
+
+    def _on_string(self, text: str, i: int) -> None:
+        frame = self._stack[-1]
+        # Strings opened in key position already moved their object to _COLON
+        if frame.state == _COLON:
+            try:
+                frame.key = json.loads(text[self._token_start : i + 1])
+            except json.JSONDecodeError:
+                raise MalformedOutputError(f"Invalid key at {self._token_start}")
+        else:
+            self._on_value(i + 1)
+
+    def _on_scalar(self, text: str, i: int) -> None:
+        token = text[self._scalar_start : i]
+        self._scalar_start = None
+        try:
+            json.loads(token)
+        except json.JSONDecodeError:
+            raise MalformedOutputError(f"Invalid literal {token!r}")
+        self._on_value(i)
+
+    def _on_value(self, end: int) -> None:
+        """A value ending just before `end` completed in the current container."""
+        if not self._stack:
+            self._end = end
+            return
+        self._stack[-1].state = _COMMA
+        closers = "".join("}" if f.kind == "{" else "]" for f in reversed(self._stack))
+        self._safe = (end, closers)
+
+    def _on_object(self, text: str, frame: _Frame, i: int) -> None:
+        # Components are objects directly inside the top-level `analyzed_components` array
+        if len(self._stack) != 2 or self._stack[1].key_in_parent != "analyzed_components":
+            return
+        try:
+            component = AnalyzedComponent.model_validate_json(text[frame.start : i + 1])
+        except ValidationError:
+            self.invalid_components += 1
+            if self.invalid_components > self.max_invalid_components:
+                raise MalformedOutputError(
+                    f"{self.invalid_components} components do not match the schema"
+                )
+            return
+        self.components.append(component.model_dump())
+
+    # -------------------- FINISHING --------------------
+
+    def finish(self) -> ParsedAnalysis:
+        """Validate the whole analysis, salvaging what arrived if it was cut off."""
+        if self._start is None:
+            raise MalformedOutputError("No JSON object found in the model output")
+
+        if self._end is not None:
+            document = self._load(self._text[self._start : self._end])
+            try:
+                analysis = ScanAnalysis.model_validate(document)
+            except ValidationError:
+                return self._salvage(document)
+            return ParsedAnalysis(analysis.model_dump(), invalid_components=self.invalid_components)
+
+        if self._safe is None:
+            raise MalformedOutputError("Output was cut off before any field completed")
+        end, closers = self._safe
+        return self._salvage(self._load(self._text[self._start : end] + closers))
+
+    def _load(self, text: str) -> dict[str, Any]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise MalformedOutputError(f"Invalid JSON: {e}")
+
+    def _salvage(self, document: dict[str, Any]) -> ParsedAnalysis:
+        """Keep every top-level field that validates on its own."""
+        data: dict[str, Any] = {}
+        missing: list[str] = []
+        for name, info in ScanAnalysis.model_fields.items():
+            if name == "analyzed_components":
+                data[name] = list(self.components)
+                continue
+            if name in document:
+                try:
+                    value = TypeAdapter(info.annotation).validate_python(document[name])
+                    data[name] = TypeAdapter(info.annotation).dump_python(value)
+                    continue
+                except ValidationError:
+                    pass
+            if not info.is_required():
+                data[name] = info.get_default(call_default_factory=True)
+            missing.append(name)
+
+        if "name" in missing and not self.components:
+            raise MalformedOutputError("Nothing usable could be salvaged from the output")
+        return ParsedAnalysis(
+            data,
+            partial=True,
+            missing_fields=missing,
+            invalid_components=self.invalid_components,
+        )
+
+
+def parse_analysis(raw_text: str) -> ParsedAnalysis:
+    """Parse a complete model answer in one go."""
+    parser = AnalysisStreamParser()
+    parser.feed(raw_text)
+    return parser.finish()
+
+
+def analysis_schema_fingerprint() -> str:
+    """Stable text of the response schema; part of the scan cache key."""
+    return json.dumps(ScanAnalysis.model_json_schema(), sort_keys=True)
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from utils.GithubScrapper.github_client import GithubClient
+from utils.GithubScrapper.rate_limit import GithubPriority, github_priority
+
+from utils.Scan.scan_pipeline import estimate_github_calls, execute_scan
+from utils.Scan.scan_store import save_scan_result
+
+
+class BatchScanLimiter:
+    """Concurrency caps for batch scans: one global, one per GitHub token.
+
+    The per-token cap keeps a single user from draining their rate limit (and
+    every worker) at once; the global cap bounds total GitHub and GenAI load.
+    The semaphores belong to the event loop they were first used on, and are
+    made afresh when a new loop (a reload, a test) starts using the limiter.
+    """
+
+    def __init__(self, global_limit: int, per_token_limit: int) -> None:
+        self.global_limit = global_limit
+        self.per_token_limit = per_token_limit
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        # token hash -> (semaphore, number of scans currently using it)
+        self._per_token: dict[str, tuple[asyncio.Semaphore, int]] = {}
+
+    def _ensure_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._global is None or self._loop is not loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.global_limit)
+            self._per_token = {}
+        return self._global
+
+    @asynccontextmanager
+    async def slot(self, access_token: str) -> AsyncIterator[None]:
+        global_semaphore = self._ensure_loop()
+        per_token = self._per_token
+        key = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+        semaphore, users = per_token.get(
+            key, (asyncio.Semaphore(self.per_token_limit), 0)
+        )
+        per_token[key] = (semaphore, users + 1)
+        try:
+            async with semaphore, global_semaphore:
+                yield
+        finally:
+            semaphore, users = per_token[key]
+            if users == 1:
+                del per_token[key]
+            else:
+                per_token[key] = (semaphore, users - 1)
+
+
+batch_scan_limiter = BatchScanLimiter(
+    global_limit=int(os.getenv("SCAN_BATCH_GLOBAL_CONCURRENCY", "8")),
+    per_token_limit=int(os.getenv("SCAN_BATCH_PER_TOKEN_CONCURRENCY", "3")),
+)
+
+
+def batch_github_calls(repo_count: int, deep: bool = False) -> int:
+    """Worst case for a batch: every repo misses the cache (repo and head lookups, then a full scan)."""
+    return repo_count * (2 + estimate_github_calls(deep))
+
+
+def list_user_repo_names(github_client: GithubClient) -> list[str]:
+    """Full names of the repositories owned by the token's user."""
+    return [
+        repo["full_name"]
+        for repo in github_client.paginate("/user/repos", {"affiliation": "owner"})
+    ]
+
+
+async def scan_repositories(
+    github_client: GithubClient,
+    access_token: str,
+    repo_names: list[str],
+    deep: bool = False,
+    owner_id: Optional[str] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Scan every repo concurrently and yield each result as soon as it is ready.
+
+    Results arrive in completion order, so one slow repository never holds
+    back the others. A failed repo yields an error entry instead of aborting.
+    """
+
+    async def scan_one(repo_name: str) -> dict[str, Any]:
+        async with batch_scan_limiter.slot(access_token):
+            started = time.perf_counter()
+            try:
+                # Interactive scans of the same token go first
+                with github_priority(GithubPriority.BATCH):
+                    outcome = await run_in_threadpool(
+                        execute_scan, github_client, repo_name, None, deep
+                    )
+            except Exception as e:
+                return {"repo_name": repo_name, "success": False, "error": str(e)}
+            await run_in_threadpool(save_scan_result, owner_id, outcome)
+            return {
+                "repo_name": repo_name,
+                "success": True,
+                "result": outcome.to_response(),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+
+    tasks = [asyncio.create_task(scan_one(name)) for name in repo_names]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away: stop scans that have not finished yet
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from schemas.routesSchemas.scan import ChunkAnalysis
+from utils.GithubScrapper.Scrapper import FolderStructure
+from utils.Scan.analysis_parser import ParsedAnalysis
+from utils.Scan.google_genai import GENAI_MODEL
+from utils.Scan.prompt_builder import (
+    IgnoreRules,
+    TREE_TOKEN_BUDGET,
+    build_tree_prompt,
+    listing_tokens,
+    prune_tree,
+)
+from utils.Scan.scan_cache import ScanCacheKey, chunk_cache, hash_prompt_template
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PROMPT_TEMPLATE_PATH = "prompts/chunk.txt"
+REDUCE_PROMPT_TEMPLATE_PATH = "prompts/reduce.txt"
+
+# "auto": chunk trees whose full listing exceeds the tree budget; "always"; "off"
+SCAN_CHUNKING = os.getenv("SCAN_CHUNKING", "auto").lower()
+# Listing tokens per chunk; a chunk is one map call
+CHUNK_TOKEN_BUDGET = int(os.getenv("SCAN_CHUNK_TOKEN_BUDGET", str(TREE_TOKEN_BUDGET)))
+# More chunks than this are merged into bigger (more collapsed) ones
+CHUNK_MAX_CHUNKS = int(os.getenv("SCAN_CHUNK_MAX_CHUNKS", "12"))
+# Map calls in flight at once, shared by every scan in the process
+CHUNK_CONCURRENCY = int(os.getenv("SCAN_CHUNK_CONCURRENCY", "4"))
+# Tries per chunk before it is given up on
+CHUNK_ATTEMPTS = int(os.getenv("SCAN_CHUNK_ATTEMPTS", "3"))
+CHUNK_RETRY_BASE_SECONDS = float(os.getenv("SCAN_CHUNK_RETRY_BASE_SECONDS", "1.0"))
+# Size of the top-level overview the reduce step sees instead of the full tree
+REDUCE_OVERVIEW_TOKEN_BUDGET = int(os.getenv("SCAN_REDUCE_OVERVIEW_TOKEN_BUDGET", "1500"))
+
+_map_pool = ThreadPoolExecutor(max_workers=CHUNK_CONCURRENCY, thread_name_prefix="scan-chunk")
+
+# Sends a prompt to the model in JSON mode with the given schema; returns the answer text
+Generate = Callable[[str, type], str]
+
+
+def _load(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def chunking_fingerprint() -> str:
+    """Settings and templates that change a chunked scan; folded into the scan cache key."""
+    templates = _load(CHUNK_PROMPT_TEMPLATE_PATH) + _load(REDUCE_PROMPT_TEMPLATE_PATH)
+    return json.dumps(
+        [
+            "chunked-v1",
+            SCAN_CHUNKING,
+            CHUNK_TOKEN_BUDGET,
+            CHUNK_MAX_CHUNKS,
+            REDUCE_OVERVIEW_TOKEN_BUDGET,
+            hashlib.sha256(templates.encode("utf-8")).hexdigest(),
+        ]
+    )
+
+
+@dataclass
+class _Unit:
+    """A sub-tree or a folder's loose files: the pieces chunks are packed from."""
+
+    directory: str  # "" is the repo root
+    entries: FolderStructure
+    tokens: int
+
+    @property
+    def label(self) -> str:
+        if len(self.entries) == 1 and isinstance(next(iter(self.entries.values())), dict):
+            name = next(iter(self.entries))
+            return f"{self.directory}/{name}" if self.directory else name
+        return f"{self.directory or '.'}/*"
+
+
+@dataclass
+class Chunk:
+    index: int
+    units: List[_Unit]
+
+    @property
+    def label(self) -> str:
+        labels = [unit.label for unit in self.units]
+        return ", ".join(labels[:4]) + (f" and {len(labels) - 4} more" if len(labels) > 4 else "")
+
+    @property
+    def tokens(self) -> int:
+        return sum(unit.tokens for unit in self.units)
+
+    def structure(self) -> FolderStructure:
+        """The chunk's units placed at their real paths below the repo root."""
+        root: FolderStructure = {}
+        for unit in self.units:
+            node = root
+            for part in unit.directory.split("/") if unit.directory else []:
+                child = node.setdefault(part, {})
+                assert isinstance(child, dict)
+                node = child
+            node.update(unit.entries)
+        return root
+
+
+@dataclass
+class ChunkResult:
+    chunk: Chunk
+    analysis: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    cached: bool = False
+
+
+@dataclass
+class ChunkedAnalysis:
+    results: List[ChunkResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> List[ChunkResult]:
+        return [r for r in self.results if r.analysis is not None]
+
+    @property
+    def failed(self) -> List[ChunkResult]:
+        return [r for r in self.results if r.analysis is None]
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "chunks": len(self.results),
+            "cached": sum(r.cached for r in self.results),
+            "retried": sum(r.attempts > 1 for r in self.results),
+            "failed": [r.chunk.label for r in self.failed],
+        }
+
+
+def _units(structure: FolderStructure, directory: str, budget: int) -> List[_Unit]:
+    """Split a tree into sub-trees that fit the budget, descending only where needed."""
+    units: List[_Unit] = []
+    files: FolderStructure = {}
+    for name, value in structure.items():
+        if not isinstance(value, dict):
+            files[name] = value
+            continue
+        tokens = listing_tokens({name: value})
+        has_subdirs = any(isinstance(child, dict) for child in value.values())
+        if tokens <= budget or not has_subdirs:
+            # Oversized leaf folders are collapsed when their chunk is rendered
+            units.append(_Unit(directory, {name: value}, tokens))
+        else:
+            path = f"{directory}/{name}" if directory else name
+            units.extend(_units(value, path, budget))
+    if files:
+        units.append(_Unit(directory, files, listing_tokens(files)))
+    return units
+
+
+def _pack(units: List[_Unit], budget: int) -> List[Chunk]:
+    """Fill chunks with neighbouring units, in tree order, up to the budget."""
+    chunks: List[Chunk] = []
+    current: List[_Unit] = []
+    used = 0
+    for unit in units:
+        if current and used + unit.tokens > budget:
+            chunks.append(Chunk(len(chunks), current))
+            current, used = [], 0
+        current.append(unit)
+        used += unit.tokens
+    if current:
+        chunks.append(Chunk(len(chunks), current))
+    return chunks
+
+
+def plan_chunks(structure: FolderStructure, rules: IgnoreRules) -> List[Chunk]:
+    """Partition the tree for a map-reduce scan; no chunks means "one prompt is enough"."""
+    if SCAN_CHUNKING == "off":
+        return []
+    pruned, _ = prune_tree(structure, rules)
+    if SCAN_CHUNKING == "auto" and listing_tokens(pruned) <= TREE_TOKEN_BUDGET:
+        return []
+
+    budget = CHUNK_TOKEN_BUDGET
+    units = _units(pruned, "", budget)
+    chunks = _pack(units, budget)
+    while len(chunks) > CHUNK_MAX_CHUNKS:
+        # Fewer, bigger chunks; their listings get collapsed to CHUNK_TOKEN_BUDGET
+        budget = int(budget * 1.5)
+        chunks = _pack(units, budget)
+    if SCAN_CHUNKING == "auto" and len(chunks) < 2:
+        return []
+    return chunks
+
+
+def build_chunk_prompt(chunk: Chunk) -> str:
+    """Only the part's own content, so an unchanged part reuses its cached analysis."""
+    tree = build_tree_prompt(chunk.structure(), token_budget=CHUNK_TOKEN_BUDGET)
+    return (
+        f"### Prompt for Google GenAI\n\n {_load(CHUNK_PROMPT_TEMPLATE_PATH)}\n\n"
+        f"### Part of the Repository: {chunk.label}\n\n"
+        "### Folder Structure of This Part (one entry per line, directories end with '/', "
+        "two-space indentation shows nesting, bracketed lines summarize omitted files):\n\n"
+        f"{tree.text}"
+    )
+
+
+def _analyze_chunk(
+    chunk: Chunk, prompt: str, repo_full_name: str, generate: Generate
+) -> ChunkResult:
+    # Keyed by content, not commit: unchanged parts hit across commits and retries
+    key = ScanCacheKey(
+        repo_full_name=repo_full_name,
+        commit_sha="",
+        prompt_hash=hash_prompt_template(prompt),
+        model=GENAI_MODEL,
+    )
+    cached, _ = chunk_cache.get(key)
+    if cached is not None:
+        return ChunkResult(chunk, cached.result, cached=True)
+
+    result = ChunkResult(chunk)
+    for attempt in range(1, CHUNK_ATTEMPTS + 1):
+        result.attempts = attempt
+        try:
+            analysis = ChunkAnalysis.model_validate_json(generate(prompt, ChunkAnalysis))
+        except Exception as e:
+            # Model errors and answers that do not match the schema are retried alike
+            result.error = str(e)
+            logger.warning(
+                "⚠️ Chunk %s (%s) attempt %s failed: %s",
+                chunk.index + 1,
+                chunk.label,
+                attempt,
+                e,
+            )
+            if attempt < CHUNK_ATTEMPTS:
+                # Jittered exponential backoff so retries of parallel chunks spread out
+                time.sleep(CHUNK_RETRY_BASE_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            continue
+        result.analysis, result.error = analysis.model_dump(), None
+        chunk_cache.set(key, result.analysis)
+        break
+    return result
+
+
+def analyze_chunks(
+    chunks: List[Chunk], repo_full_name: str, generate: Generate
+) -> ChunkedAnalysis:
+    """Map step: analyze every chunk on the shared pool, each with its own retries and cache entry.
+
+    Each chunk runs in a copy of the caller's context, so its logs keep the
+    request id and its model calls reach the request's Server-Timing and usage.
+    """
+    futures = [
+        _map_pool.submit(
+            copy_context().run,
+            _analyze_chunk,
+            chunk,
+            build_chunk_prompt(chunk),
+            repo_full_name,
+            generate,
+        )
+        for chunk in chunks
+    ]
+    chunked = ChunkedAnalysis([future.result() for future in futures])
+    if not chunked.succeeded:
+        raise ValueError(
+            f"All {len(chunks)} chunks failed; last error: {chunked.results[-1].error}"
+        )
+    return chunked
+
+
+def build_reduce_prompt(
+    chunked: ChunkedAnalysis, structure: FolderStructure, readme: str, gitignore: Optional[str]
+) -> str:
+    """Reduce step: the README, a top-level overview and every chunk's findings in brief."""
+    overview = build_tree_prompt(
+        structure, gitignore=gitignore, token_budget=REDUCE_OVERVIEW_TOKEN_BUDGET
+    )
+    parts = []
+    for result in chunked.results:
+        header = f"#### Part {result.chunk.index + 1}: {result.chunk.label}"
+        if result.analysis is None:
+            parts.append(f"{header}\n(not analyzed: {result.error})")
+            continue
+        brief = {
+            "score": result.analysis["score"],
+            "summary": result.analysis["summary"],
+            "files_to_check": result.analysis["files_to_check"],
+            "components": [c["file_name"] for c in result.analysis["analyzed_components"]],
+        }
+        parts.append(f"{header}\n{json.dumps(brief, indent=1)}")
+    return (
+        f"### Prompt for Google GenAI\n\n {_load(REDUCE_PROMPT_TEMPLATE_PATH)}\n\n"
+        f"### README Content:\n\n{readme}\n\n"
+        "### Folder Overview (top levels only; deeper levels are summarized as counts):\n\n"
+        f"{overview.text}\n\n"
+        f"### Analyses of the {len(chunked.results)} Parts:\n\n" + "\n\n".join(parts)
+    )
+
+
+def merge_chunks(chunked: ChunkedAnalysis, analysis: ParsedAnalysis) -> ParsedAnalysis:
+    """Final answer: the reduce step's fields plus every chunk's components.
+
+    Project-wide components from the reduce step come first; chunk components
+    follow in tree order. If any chunk failed, the result is partial.
+    """
+    components = list(analysis.data.get("analyzed_components", []))
+    seen = {c["file_name"] for c in components}
+    files_to_check = list(analysis.data.get("files_to_check", []))
+    for result in chunked.succeeded:
+        assert result.analysis is not None
+        for component in result.analysis["analyzed_components"]:
+            if component["file_name"] not in seen:
+                seen.add(component["file_name"])
+                components.append(component)
+        if not analysis.data.get("files_to_check"):
+            files_to_check.extend(result.analysis["files_to_check"])
+
+    missing_fields = list(analysis.missing_fields)
+    if chunked.failed and "analyzed_components" not in missing_fields:
+        missing_fields.append("analyzed_components")
+    return ParsedAnalysis(
+        {**analysis.data, "analyzed_components": components, "files_to_check": files_to_check},
+        partial=analysis.partial or bool(chunked.failed),
+        missing_fields=missing_fields,
+        invalid_components=analysis.invalid_components,
+    )
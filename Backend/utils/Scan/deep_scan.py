@@ -0,0 +1,296 @@
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+from utils.GithubScrapper.github_client import GithubRepo
+from utils.GithubScrapper.Scrapper import TreeBlob, get_blob_content
+from utils.Scan.prompt_builder import IgnoreRules, estimate_tokens
+
+if TYPE_CHECKING:
+    from utils.GithubScrapper.archive import RepoArchive, SampleScorer
+
+
+logger = logging.getLogger(__name__)
+
+# At most this many key files are read per deep scan
+DEEP_SCAN_MAX_FILES = int(os.getenv("DEEP_SCAN_MAX_FILES", "20"))
+# Bytes kept from one file; longer files are cut at a line boundary
+DEEP_SCAN_MAX_FILE_BYTES = int(os.getenv("DEEP_SCAN_MAX_FILE_BYTES", "16384"))
+# Files larger than this are not downloaded at all (generated code, data dumps)
+DEEP_SCAN_SKIP_FILE_BYTES = int(os.getenv("DEEP_SCAN_SKIP_FILE_BYTES", "262144"))
+# Bytes downloaded across all key files of one scan
+DEEP_SCAN_MAX_TOTAL_BYTES = int(os.getenv("DEEP_SCAN_MAX_TOTAL_BYTES", "262144"))
+# Rough size of the key-files section of the prompt
+DEEP_SCAN_TOKEN_BUDGET = int(os.getenv("DEEP_SCAN_TOKEN_BUDGET", "12000"))
+# Concurrent blob downloads, shared by every deep scan in the process
+DEEP_SCAN_WORKERS = int(os.getenv("DEEP_SCAN_WORKERS", "8"))
+
+_MANIFESTS = {
+    "package.json", "requirements.txt", "pyproject.toml", "setup.py", "setup.cfg",
+    "pipfile", "go.mod", "cargo.toml", "pom.xml", "build.gradle", "build.gradle.kts",
+    "composer.json", "gemfile", "mix.exs", "pubspec.yaml",
+}
+_ENTRY_POINTS = {
+    "main", "app", "server", "index", "manage", "wsgi", "asgi", "program", "cli", "__main__",
+}
+_CONFIG_FILES = {
+    "dockerfile", "docker-compose.yml", "docker-compose.yaml", "compose.yaml", "makefile",
+    ".env.example", "tsconfig.json", "settings.py", "config.py", "alembic.ini",
+}
+_CONFIG_PREFIXES = ("next.config.", "vite.config.", "webpack.config.", "nuxt.config.")
+_ROUTE_DIRS = {"routes", "routers", "controllers", "handlers", "api", "endpoints", "views", "pages"}
+_CORE_DIRS = {"models", "services", "schemas", "middleware", "lib", "core", "utils"}
+_ROUTE_NAME = re.compile(r"(route|router|controller|handler|endpoint|api)s?\b", re.IGNORECASE)
+# tests.py, test_x.py, x_test.go, x.test.ts, x.spec.js (matched lowercased); not contest.py or latest.js
+_TEST_NAME = re.compile(r"^tests?[._]|_tests?\.|\.(test|spec)\.|^conftest\.py$")
+# FooTest.java, FooTests.cs, FooSpec.scala: only the original casing tells them from latest.java
+_CAMEL_TEST_NAME = re.compile(r"[a-z0-9](Tests?|Spec)\.[A-Za-z]+$")
+_SOURCE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt", ".rb", ".php",
+    ".cs", ".ex", ".exs", ".dart", ".swift", ".scala", ".vue", ".svelte",
+}
+# Never worth their tokens
+_SKIP_NAMES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "pipfile.lock",
+    "cargo.lock", "composer.lock", "gemfile.lock", "go.sum", "readme.md", "license",
+}
+
+_fetch_pool = ThreadPoolExecutor(max_workers=DEEP_SCAN_WORKERS, thread_name_prefix="deep-scan")
+
+
+def deep_scan_fingerprint() -> str:
+    """Settings that change the key-files section; folded into the scan cache key."""
+    return json.dumps(
+        [
+            "deep-v1",
+            DEEP_SCAN_MAX_FILES,
+            DEEP_SCAN_MAX_FILE_BYTES,
+            DEEP_SCAN_SKIP_FILE_BYTES,
+            DEEP_SCAN_MAX_TOTAL_BYTES,
+            DEEP_SCAN_TOKEN_BUDGET,
+        ]
+    )
+
+
+@dataclass
+class KeyFile:
+    path: str
+    sha: str
+    size: int
+    score: int
+    # Other paths with byte-identical content (same blob SHA)
+    duplicates: List[str] = field(default_factory=list)
+    content: Optional[str] = None
+    truncated: bool = False
+
+
+@dataclass
+class KeyFilesStats:
+    candidates: int = 0
+    selected: int = 0
+    fetched: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    bytes_fetched: int = 0
+    packed: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class KeyFilesPrompt:
+    text: str
+    files: List[KeyFile]
+    stats: KeyFilesStats
+
+
+def score_path(path: str) -> int:
+    """Heuristic signal of a file for judging the project; 0 means skip."""
+    parts = path.lower().split("/")
+    name = parts[-1]
+    stem, _, _ = name.partition(".")
+    extension = name[name.rfind(".") :] if "." in name else ""
+    directories = set(parts[:-1])
+
+    if name in _SKIP_NAMES or directories & {"test", "tests", "__tests__", "spec"}:
+        return 0
+    if _TEST_NAME.search(name) or _CAMEL_TEST_NAME.search(path):
+        return 0
+    if name in _MANIFESTS or name.endswith(".csproj"):
+        score = 100
+    elif extension in _SOURCE_EXTENSIONS and stem in _ENTRY_POINTS:
+        score = 80
+    elif extension in _SOURCE_EXTENSIONS and (directories & _ROUTE_DIRS or _ROUTE_NAME.search(stem)):
+        score = 60
+    elif name in _CONFIG_FILES or name.startswith(_CONFIG_PREFIXES) or (
+        ".github" in directories and extension in (".yml", ".yaml")
+    ):
+        score = 50
+    elif extension in _SOURCE_EXTENSIONS and directories & _CORE_DIRS:
+        score = 40
+    else:
+        return 0
+    # Top-level files describe the project; deeply nested ones describe a corner of it
+    return max(score - 6 * (len(parts) - 1), 1)
+
+
+def key_file_scorer(rules: IgnoreRules) -> "SampleScorer":
+    """`score_path` plus the size limits and ignore rules, for scoring files without a tree."""
+
+    ignored_dirs: dict[str, bool] = {}
+
+    def score(path: str, size: int) -> int:
+        if size == 0 or size > DEEP_SCAN_SKIP_FILE_BYTES:
+            return 0
+        # Scoring is cheap and rejects most files before the ignore rules run
+        points = score_path(path)
+        if not points or rules.is_path_ignored(path, ignored_dirs):
+            return 0
+        return points
+
+    return score
+
+
+def select_key_files(
+    blobs: Iterable[TreeBlob],
+    rules: IgnoreRules,
+    max_files: int = DEEP_SCAN_MAX_FILES,
+    max_total_bytes: int = DEEP_SCAN_MAX_TOTAL_BYTES,
+) -> tuple[List[KeyFile], int]:
+    """Pick the highest-signal files within the file and byte caps.
+
+    Files sharing a blob SHA are selected once; the other paths are recorded
+    as duplicates. Returns the selection and the number of candidates scored.
+    """
+    scorer = key_file_scorer(rules)
+    candidates: List[KeyFile] = []
+    for blob in blobs:
+        score = scorer(blob.path, blob.size)
+        if score:
+            candidates.append(KeyFile(blob.path, blob.sha, blob.size, score))
+    candidates.sort(key=lambda f: (-f.score, f.path.count("/"), f.path))
+
+    selected: dict[str, KeyFile] = {}
+    total_bytes = 0
+    for candidate in candidates:
+        if candidate.sha in selected:
+            selected[candidate.sha].duplicates.append(candidate.path)
+            continue
+        if len(selected) >= max_files:
+            continue
+        # Only the kept prefix of a large file counts against the total
+        kept = min(candidate.size, DEEP_SCAN_MAX_FILE_BYTES)
+        if total_bytes + kept > max_total_bytes:
+            continue
+        total_bytes += kept
+        selected[candidate.sha] = candidate
+    return list(selected.values()), len(candidates)
+
+
+def _fetch(repo: GithubRepo, key_file: KeyFile) -> None:
+    raw = get_blob_content(repo, key_file.sha)
+    if b"\0" in raw[:8000]:
+        raise ValueError("binary file")
+    if len(raw) > DEEP_SCAN_MAX_FILE_BYTES:
+        raw = raw[:DEEP_SCAN_MAX_FILE_BYTES].rsplit(b"\n", 1)[0]
+        key_file.truncated = True
+    key_file.content = raw.decode("utf-8", errors="replace")
+
+
+def fetch_key_files(repo: GithubRepo, files: List[KeyFile], stats: KeyFilesStats) -> None:
+    """Download all selected files concurrently; failures are logged and skipped.
+
+    Each download runs in a copy of the caller's context, so its GitHub
+    priority, request id, per-scan call count and Server-Timing entries carry over.
+    """
+    futures = [(f, _fetch_pool.submit(copy_context().run, _fetch, repo, f)) for f in files]
+    for key_file, future in futures:
+        try:
+            future.result()
+            stats.fetched += 1
+            stats.bytes_fetched += len(key_file.content or "")
+        except Exception as e:
+            stats.failed += 1
+            logger.debug("⚠️ Skipping key file %s: %s", key_file.path, e)
+
+
+def pack_key_files(
+    files: List[KeyFile], stats: KeyFilesStats, token_budget: int = DEEP_SCAN_TOKEN_BUDGET
+) -> str:
+    """Render fetched files, best first, until the token budget is spent."""
+    sections: List[str] = []
+    used = 0
+    for key_file in files:
+        if key_file.content is None:
+            continue
+        header = f"#### {key_file.path}"
+        if key_file.duplicates:
+            header += f" (identical: {', '.join(key_file.duplicates)})"
+        if key_file.truncated:
+            header += " (truncated)"
+        section = f"{header}\n```\n{key_file.content}\n```"
+        tokens = estimate_tokens(section)
+        if used + tokens > token_budget:
+            remaining = (token_budget - used) * 4 - len(header) - 20
+            # Worth including a head of the file only if a useful amount fits
+            if remaining < 1000:
+                continue
+            content = key_file.content[:remaining].rsplit("\n", 1)[0]
+            section = f"{header} (truncated)\n```\n{content}\n```"
+            tokens = estimate_tokens(section)
+        sections.append(section)
+        used += tokens
+        stats.packed += 1
+    stats.tokens = used
+    return "\n\n".join(sections)
+
+
+def build_key_files_prompt(
+    repo: GithubRepo, blobs: Iterable[TreeBlob], rules: IgnoreRules
+) -> KeyFilesPrompt:
+    """Select, fetch and pack the key source files of a repository."""
+    files, candidates = select_key_files(blobs, rules)
+    stats = KeyFilesStats(
+        candidates=candidates,
+        selected=len(files),
+        duplicates=sum(len(f.duplicates) for f in files),
+    )
+    fetch_key_files(repo, files, stats)
+    return KeyFilesPrompt(text=pack_key_files(files, stats), files=files, stats=stats)
+
+
+def key_files_from_archive(archive: "RepoArchive", rules: IgnoreRules) -> KeyFilesPrompt:
+    """Pack the files sampled while reading a repository archive; nothing is fetched."""
+    files: List[KeyFile] = []
+    total_bytes = 0
+    for sample in archive.samples:
+        # The archive pass could not know the repo's .gitignore yet
+        if len(files) >= DEEP_SCAN_MAX_FILES or rules.is_path_ignored(sample.path):
+            continue
+        if total_bytes + len(sample.content) > DEEP_SCAN_MAX_TOTAL_BYTES:
+            continue
+        total_bytes += len(sample.content)
+        files.append(
+            KeyFile(
+                sample.path,
+                sample.digest,
+                sample.size,
+                sample.score,
+                duplicates=sample.duplicates,
+                content=sample.content.decode("utf-8", errors="replace"),
+                truncated=sample.truncated,
+            )
+        )
+    stats = KeyFilesStats(
+        candidates=archive.stats.candidates,
+        selected=len(files),
+        fetched=len(files),
+        duplicates=sum(len(f.duplicates) for f in files),
+        failed=archive.stats.binary_skipped,
+        bytes_fetched=total_bytes,
+    )
+    return KeyFilesPrompt(text=pack_key_files(files, stats), files=files, stats=stats)
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, AsyncIterator, Optional
+
+from utils.GithubScrapper.rate_limit import GithubPriority, github_priority
+from utils.GithubScrapper.Scrapper import get_github_client
+from utils.Observability.log_pipeline import correlation_id, current_request_id
+from utils.Scan.scan_pipeline import execute_scan
+from utils.Scan.scan_store import save_scan_result
+
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class JobQueueFullError(Exception):
+    """Raised when a scan is submitted while the pending queue is at capacity."""
+
+
+@dataclass
+class ScanJob:
+    id: str
+    repo_name: str
+    access_token: str = field(repr=False)
+    owner_id: Optional[str] = None  # user_id of the submitter; jobs are only visible to them
+    deep: bool = False
+    # Of the request that submitted the job; the job's log records carry it too
+    request_id: Optional[str] = None
+    status: str = JOB_QUEUED
+    stage: Optional[str] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    events: list[dict[str, Any]] = field(default_factory=list)
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Public view of the job; never includes the access token."""
+        return {
+            "job_id": self.id,
+            "repo_name": self.repo_name,
+            "deep": self.deep,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    def publish(self, **changes: Any) -> None:
+        """Apply `changes`, record a progress event and wake up subscribers.
+
+        Must run on the event loop thread.
+        """
+        for name, value in changes.items():
+            setattr(self, name, value)
+        self.updated_at = time.time()
+        event = {"status": self.status, "stage": self.stage}
+        if self.finished:
+            event.update(result=self.result, error=self.error)
+            self.access_token = ""
+        self.events.append(event)
+        # Swap in a fresh event so the next wait blocks until the next change
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class ScanJobQueue:
+    """Bounded pool of background scan workers.
+
+    Submissions return immediately; `workers` asyncio tasks pull jobs from a
+    bounded queue and run the blocking scan pipeline on a dedicated thread
+    pool, so long GitHub crawls and GenAI calls never occupy the event loop
+    or the default thread pool used by the rest of the app.
+    """
+
+    def __init__(self, workers: int, max_pending: int, max_retained: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self._jobs: "OrderedDict[str, ScanJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue[ScanJob]] = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _ensure_started(self) -> asyncio.Queue[ScanJob]:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="scan-worker"
+            )
+            self._tasks = [
+                asyncio.create_task(self._worker(), name=f"scan-worker-{i}")
+                for i in range(self.workers)
+            ]
+            logger.info("🧵 Started %s scan workers", self.workers)
+        return self._queue
+
+    def submit(
+        self,
+        access_token: str,
+        repo_name: str,
+        owner_id: Optional[str] = None,
+        deep: bool = False,
+    ) -> ScanJob:
+        queue = self._ensure_started()
+        job = ScanJob(
+            id=uuid.uuid4().hex,
+            repo_name=repo_name,
+            access_token=access_token,
+            owner_id=owner_id,
+            deep=deep,
+            request_id=current_request_id(),
+        )
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Too many scans are queued, try again later.")
+        self._jobs[job.id] = job
+        job.publish()
+        self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        return self._jobs.get(job_id)
+
+    async def events(self, job: ScanJob) -> AsyncIterator[dict[str, Any]]:
+        """Yield the job's progress events, starting from the first, until it finishes."""
+        seen = 0
+        while True:
+            changed = job.changed
+            pending = job.events[seen:]
+            seen += len(pending)
+            for event in pending:
+                yield event
+            if job.finished:
+                return
+            await changed.wait()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._queue, self._executor, self._tasks = None, None, []
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(loop, job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, job: ScanJob) -> None:
+        job.publish(status=JOB_RUNNING)
+
+        def on_stage(stage: str) -> None:
+            # Called from the worker thread; hop back onto the loop to notify
+            loop.call_soon_threadsafe(partial(job.publish, stage=stage))
+
+        def scan() -> dict[str, Any]:
+            github_client = get_github_client(job.access_token)
+            with correlation_id(job.request_id):
+                # Nobody holds a connection open for a queued job: it yields to everyone else
+                with github_priority(GithubPriority.BACKGROUND):
+                    outcome = execute_scan(github_client, job.repo_name, on_stage, job.deep)
+                save_scan_result(job.owner_id, outcome)
+                return outcome.to_response()
+
+        try:
+            result = await loop.run_in_executor(self._executor, scan)
+        except Exception as e:
+            logger.error("❌ Scan job %s failed: %s", job.id, e)
+            job.publish(status=JOB_FAILED, error=str(e))
+        else:
+            job.publish(status=JOB_SUCCEEDED, result=result)
+
+    def _evict_finished(self) -> None:
+        """Drop the oldest finished jobs once more than `max_retained` are stored."""
+        excess = len(self._jobs) - self.max_retained
+        for job_id in [j.id for j in self._jobs.values() if j.finished][: max(excess, 0)]:
+            del self._jobs[job_id]
+
+
+scan_job_queue = ScanJobQueue(
+    workers=int(os.getenv("SCAN_WORKERS", "4")),
+    max_pending=int(os.getenv("SCAN_MAX_PENDING_JOBS", "1000")),
+    max_retained=int(os.getenv("SCAN_MAX_RETAINED_JOBS", "5000")),
+)
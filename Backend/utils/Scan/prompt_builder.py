@@ -0,0 +1,322 @@
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from utils.GithubScrapper.Scrapper import FolderStructure
+
+
+# Directories and files that never help the model judge a project
+DEFAULT_IGNORE_PATTERNS = [
+    ".git/",
+    "node_modules/",
+    "bower_components/",
+    "vendor/",
+    "venv/",
+    ".venv/",
+    "env/",
+    "__pycache__/",
+    ".pytest_cache/",
+    ".mypy_cache/",
+    ".next/",
+    ".nuxt/",
+    ".turbo/",
+    ".cache/",
+    "dist/",
+    "build/",
+    "out/",
+    "target/",
+    "coverage/",
+    ".idea/",
+    "*.pyc",
+    "*.class",
+    "*.o",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    ".DS_Store",
+    "Thumbs.db",
+]
+
+# Rough size of the folder-structure section the model is allowed to see
+TREE_TOKEN_BUDGET = int(os.getenv("SCAN_PROMPT_TREE_TOKEN_BUDGET", "6000"))
+
+# A directory with more files than this gets its large extension groups summarized
+COLLAPSE_THRESHOLD = int(os.getenv("SCAN_PROMPT_COLLAPSE_THRESHOLD", "25"))
+
+# Extra comma-separated gitignore-style patterns from the environment
+EXTRA_IGNORE_PATTERNS = [
+    p.strip() for p in os.getenv("SCAN_PROMPT_IGNORE", "").split(",") if p.strip()
+]
+
+
+def tree_prompt_fingerprint() -> str:
+    """Settings that change the rendered tree; folded into the scan cache key."""
+    return json.dumps(
+        ["compact-v1", TREE_TOKEN_BUDGET, COLLAPSE_THRESHOLD, EXTRA_IGNORE_PATTERNS]
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for code and paths)."""
+    return (len(text) + 3) // 4
+
+
+def _glob_to_regex(glob: str) -> str:
+    regex = ""
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif glob.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif glob[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif glob[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif glob[i] == "[" and "]" in glob[i + 1 :]:
+            end = glob.index("]", i + 1)
+            regex += "[" + glob[i + 1 : end].replace("!", "^", 1) + "]"
+            i = end + 1
+        else:
+            regex += re.escape(glob[i])
+            i += 1
+    return regex
+
+
+@dataclass
+class _IgnoreRule:
+    pattern: re.Pattern[str]
+    negated: bool
+    dir_only: bool
+
+
+class IgnoreRules:
+    """A `.gitignore`-style matcher: globs, `**`, `!` negation, `/` anchoring, `dir/` rules."""
+
+    def __init__(self, patterns: Iterable[str] = ()) -> None:
+        self._rules: List[_IgnoreRule] = []
+        self.extend(patterns)
+
+    @classmethod
+    def from_gitignore(cls, content: str) -> "IgnoreRules":
+        return cls(content.splitlines())
+
+    def extend(self, patterns: Iterable[str]) -> None:
+        for raw in patterns:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            line = line[1:] if negated else line
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # A slash anywhere but the end anchors the pattern to the repo root
+            anchored = "/" in line
+            body = _glob_to_regex(line.lstrip("/"))
+            regex = f"^{body}$" if anchored else f"^(?:.*/)?{body}$"
+            self._rules.append(_IgnoreRule(re.compile(regex), negated, dir_only))
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        ignored = False
+        for rule in self._rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.pattern.match(path):
+                ignored = not rule.negated
+        return ignored
+
+    def is_path_ignored(
+        self, path: str, ignored_dirs: Optional[dict[str, bool]] = None
+    ) -> bool:
+        """Whether a file or any folder above it is ignored; `ignored_dirs` memoizes folders."""
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            directory = "/".join(parts[:i])
+            ignored = None if ignored_dirs is None else ignored_dirs.get(directory)
+            if ignored is None:
+                ignored = self.is_ignored(directory, is_dir=True)
+                if ignored_dirs is not None:
+                    ignored_dirs[directory] = ignored
+            if ignored:
+                return True
+        return self.is_ignored(path, is_dir=False)
+
+
+@dataclass
+class TreePromptStats:
+    json_tokens: int
+    compact_tokens: int
+    ignored_entries: int = 0
+    collapsed_dirs: int = 0
+    depth_limit: Optional[int] = None
+
+    @property
+    def saved_ratio(self) -> float:
+        if not self.json_tokens:
+            return 0.0
+        return 1 - self.compact_tokens / self.json_tokens
+
+
+@dataclass
+class TreePrompt:
+    text: str
+    stats: TreePromptStats
+
+
+@dataclass
+class _RenderState:
+    depth_limit: Optional[int]
+    collapse_threshold: int
+    lines: List[str] = field(default_factory=list)
+    collapsed_dirs: int = 0
+
+
+def prune_tree(
+    structure: FolderStructure, rules: IgnoreRules, prefix: str = ""
+) -> tuple[FolderStructure, int]:
+    """Drop ignored entries; returns the pruned tree and how many were dropped."""
+    pruned: FolderStructure = {}
+    ignored = 0
+    for name, value in structure.items():
+        path = f"{prefix}{name}"
+        is_dir = isinstance(value, dict)
+        if rules.is_ignored(path, is_dir):
+            ignored += 1
+            continue
+        if isinstance(value, dict):
+            child, child_ignored = prune_tree(value, rules, f"{path}/")
+            pruned[name] = child
+            ignored += child_ignored
+        else:
+            pruned[name] = value
+    return pruned, ignored
+
+
+def _count(structure: FolderStructure) -> tuple[int, int]:
+    files = dirs = 0
+    for value in structure.values():
+        if isinstance(value, dict):
+            child_files, child_dirs = _count(value)
+            files, dirs = files + child_files, dirs + child_dirs + 1
+        else:
+            files += 1
+    return files, dirs
+
+
+def _extension(name: str) -> str:
+    return name.rsplit(".", 1)[1].lower() if "." in name.lstrip(".") else ""
+
+
+def _render(structure: FolderStructure, depth: int, state: _RenderState) -> None:
+    indent = "  " * depth
+    for name, value in structure.items():
+        if not isinstance(value, dict):
+            continue
+        # Fold chains of single-directory folders into one line: a/b/c/
+        label = name
+        while len(value) == 1:
+            (child_name, child_value), = value.items()
+            if not isinstance(child_value, dict):
+                break
+            label, value = f"{label}/{child_name}", child_value
+        if state.depth_limit is not None and depth + 1 >= state.depth_limit:
+            files, dirs = _count(value)
+            state.lines.append(f"{indent}{label}/ ({files} files, {dirs} dirs)")
+            state.collapsed_dirs += 1
+        else:
+            state.lines.append(f"{indent}{label}/")
+            _render(value, depth + 1, state)
+
+    files = [name for name, value in structure.items() if not isinstance(value, dict)]
+    if len(files) <= state.collapse_threshold:
+        state.lines.extend(f"{indent}{name}" for name in files)
+        return
+
+    # Huge directory: summarize the big extension groups, list the rest
+    by_extension = Counter(_extension(name) for name in files)
+    summarized = {ext for ext, count in by_extension.items() if count > 3}
+    state.lines.extend(
+        f"{indent}{name}" for name in files if _extension(name) not in summarized
+    )
+    for ext in sorted(summarized, key=lambda e: -by_extension[e]):
+        pattern = f"*.{ext}" if ext else "files without extension"
+        state.lines.append(f"{indent}[{by_extension[ext]} {pattern}]")
+    state.collapsed_dirs += 1
+
+
+def listing_tokens(
+    structure: FolderStructure, collapse_threshold: int = COLLAPSE_THRESHOLD
+) -> int:
+    """Tokens the compact listing of a (pruned) structure takes with nothing collapsed by depth."""
+    state = _RenderState(None, collapse_threshold)
+    _render(structure, 0, state)
+    return estimate_tokens("\n".join(state.lines))
+
+
+def build_ignore_rules(
+    gitignore: Optional[str] = None, extra_ignore: Iterable[str] = ()
+) -> IgnoreRules:
+    """Default ignores, then SCAN_PROMPT_IGNORE, `extra_ignore` and the repo's .gitignore."""
+    rules = IgnoreRules(DEFAULT_IGNORE_PATTERNS)
+    rules.extend(EXTRA_IGNORE_PATTERNS)
+    rules.extend(extra_ignore)
+    if gitignore:
+        rules.extend(gitignore.splitlines())
+    return rules
+
+
+def build_tree_prompt(
+    structure: FolderStructure,
+    gitignore: Optional[str] = None,
+    token_budget: int = TREE_TOKEN_BUDGET,
+    collapse_threshold: int = COLLAPSE_THRESHOLD,
+    extra_ignore: Iterable[str] = (),
+) -> TreePrompt:
+    """Encode a folder structure as a compact indented listing within a token budget.
+
+    Directories end with `/` and children are indented two spaces; ignored
+    paths are dropped. If the listing is still over budget, deeper levels are
+    replaced by per-directory file/dir counts until it fits.
+    """
+    rules = build_ignore_rules(gitignore, extra_ignore)
+    pruned, ignored = prune_tree(structure, rules)
+    json_tokens = estimate_tokens(json.dumps(structure, indent=2))
+
+    depth_limit: Optional[int] = None
+    while True:
+        state = _RenderState(depth_limit, collapse_threshold)
+        _render(pruned, 0, state)
+        text = "\n".join(state.lines)
+        if estimate_tokens(text) <= token_budget or depth_limit == 1:
+            break
+        depth_limit = _max_depth(pruned) - 1 if depth_limit is None else depth_limit - 1
+        depth_limit = max(depth_limit, 1)
+
+    if estimate_tokens(text) > token_budget:
+        # Even the top level alone is too big: cut it and say so
+        text = text[: token_budget * 4].rsplit("\n", 1)[0] + "\n[... truncated]"
+
+    return TreePrompt(
+        text=text,
+        stats=TreePromptStats(
+            json_tokens=json_tokens,
+            compact_tokens=estimate_tokens(text),
+            ignored_entries=ignored,
+            collapsed_dirs=state.collapsed_dirs,
+            depth_limit=depth_limit,
+        ),
+    )
+
+
+def _max_depth(structure: FolderStructure) -> int:
+    depths = [_max_depth(v) + 1 for v in structure.values() if isinstance(v, dict)]
+    return max(depths, default=1)
@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from utils.GithubScrapper.github_client import GithubRepo
+from utils.GithubScrapper.Scrapper import ChangedFile, get_commit_diff
+from utils.Scan.analysis_parser import ParsedAnalysis
+from utils.Scan.prompt_builder import build_ignore_rules, estimate_tokens
+
+
+logger = logging.getLogger(__name__)
+
+RESCAN_PROMPT_TEMPLATE_PATH = "prompts/rescan.txt"
+
+# Rescan from the last scanned commit instead of analyzing the whole repo again
+SCAN_INCREMENTAL = os.getenv("SCAN_INCREMENTAL", "true").lower() == "true"
+# Diffs touching more files than this get a full scan
+RESCAN_MAX_CHANGED_FILES = int(os.getenv("RESCAN_MAX_CHANGED_FILES", "100"))
+# Characters of one file's patch included in the prompt
+RESCAN_MAX_PATCH_CHARS = int(os.getenv("RESCAN_MAX_PATCH_CHARS", "6000"))
+# Rough size of the changes section; files past it are listed without patches
+RESCAN_TOKEN_BUDGET = int(os.getenv("RESCAN_TOKEN_BUDGET", "12000"))
+
+_ROOT_NAMES = {"", ".", "/"}
+
+
+@dataclass
+class RescanPlan:
+    """What changed since the last scan of the repo, and which of its findings that touches."""
+
+    base_commit_sha: str
+    previous: dict[str, Any]
+    changed: List[ChangedFile] = field(default_factory=list)
+    # Previous `analyzed_components` entries the changes fall inside
+    affected: List[dict[str, Any]] = field(default_factory=list)
+    # Paths that no longer exist (deleted, or the old side of a rename)
+    removed_paths: set[str] = field(default_factory=set)
+
+    def summary(self, reanalyzed: Optional[int] = None) -> dict[str, Any]:
+        info: dict[str, Any] = {
+            "base_commit_sha": self.base_commit_sha,
+            "changed_files": len(self.changed),
+            "affected_components": len(self.affected),
+        }
+        if reanalyzed is not None:
+            info["reanalyzed_components"] = reanalyzed
+        return info
+
+
+def _normalize(path: str) -> str:
+    return path.strip().strip("/").removeprefix("./")
+
+
+def _touches(component_path: str, changed_path: str) -> bool:
+    """A change is inside a component when it is that file or lies below that folder."""
+    return (
+        component_path in _ROOT_NAMES
+        or changed_path == component_path
+        or changed_path.startswith(component_path + "/")
+    )
+
+
+def plan_rescan(
+    repo: GithubRepo, base_sha: str, head_sha: str, previous: dict[str, Any]
+) -> Optional[RescanPlan]:
+    """Diff the last scanned commit against the new head; None means "do a full scan".
+
+    Full scans are needed when head is not a descendant of the base (force
+    pushes), when GitHub truncated the file list, or when the diff is too big
+    for an incremental prompt to be cheaper.
+    """
+    diff = get_commit_diff(repo, base_sha, head_sha)
+    if diff.status not in ("ahead", "identical"):
+        logger.info("↩️ %s: head is %s of %s, full scan", repo.full_name, diff.status, base_sha[:7])
+        return None
+    if diff.truncated:
+        logger.info("↩️ %s: diff since %s is truncated, full scan", repo.full_name, base_sha[:7])
+        return None
+
+    rules = build_ignore_rules()
+    ignored_dirs: dict[str, bool] = {}
+    changed = [
+        f
+        for f in diff.files
+        if not (
+            rules.is_path_ignored(f.path, ignored_dirs)
+            and (f.previous_path is None or rules.is_path_ignored(f.previous_path, ignored_dirs))
+        )
+    ]
+    if len(changed) > RESCAN_MAX_CHANGED_FILES:
+        logger.info("↩️ %s: %s files changed, full scan", repo.full_name, len(changed))
+        return None
+
+    removed_paths = {f.path for f in changed if f.status == "removed"}
+    removed_paths.update(f.previous_path for f in changed if f.previous_path)
+    touched = {f.path for f in changed} | removed_paths
+    affected = [
+        component
+        for component in previous.get("analyzed_components", [])
+        if any(_touches(_normalize(component["file_name"]), path) for path in touched)
+    ]
+    return RescanPlan(
+        base_commit_sha=base_sha,
+        previous=previous,
+        changed=changed,
+        affected=affected,
+        removed_paths=removed_paths,
+    )
+
+
+def load_rescan_template() -> str:
+    with open(RESCAN_PROMPT_TEMPLATE_PATH, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def build_rescan_prompt(plan: RescanPlan, template: str) -> str:
+    """Previous findings plus the diff; its size follows the diff, not the repository."""
+    previous = {
+        name: value
+        for name, value in plan.previous.items()
+        if name != "analyzed_components"
+    }
+    affected_ids = {id(component) for component in plan.affected}
+    unchanged = [
+        component["file_name"]
+        for component in plan.previous.get("analyzed_components", [])
+        if id(component) not in affected_ids
+    ]
+
+    sections: List[str] = []
+    used = 0
+    for changed in plan.changed:
+        header = f"#### {changed.path} ({changed.status}, +{changed.additions} -{changed.deletions})"
+        if changed.previous_path:
+            header += f" (renamed from {changed.previous_path})"
+        patch = changed.patch or ""
+        if len(patch) > RESCAN_MAX_PATCH_CHARS:
+            patch = patch[:RESCAN_MAX_PATCH_CHARS].rsplit("\n", 1)[0] + "\n... (patch truncated)"
+        section = f"{header}\n```diff\n{patch}\n```" if patch else header
+        tokens = estimate_tokens(section)
+        if patch and used + tokens > RESCAN_TOKEN_BUDGET:
+            # Out of budget: still name the file so the model knows it changed
+            section = f"{header} (patch omitted)"
+            tokens = estimate_tokens(section)
+        sections.append(section)
+        used += tokens
+
+    return (
+        f"### Prompt for Google GenAI\n\n {template}\n\n"
+        f"### Previous Analysis (commit {plan.base_commit_sha[:7]}), without its components:\n\n"
+        f"{json.dumps(previous, indent=1)}\n\n"
+        "### Previously Analyzed Components Touched by the Changes:\n\n"
+        f"{json.dumps(plan.affected, indent=1)}\n\n"
+        "### Previously Analyzed Components Not Touched (kept as they are):\n\n"
+        + ("\n".join(unchanged) or "(none)")
+        + f"\n\n### Changes Since the Previous Analysis ({len(plan.changed)} files):\n\n"
+        + "\n\n".join(sections)
+    )
+
+
+def merge_rescan(plan: RescanPlan, analysis: ParsedAnalysis) -> ParsedAnalysis:
+    """Put the re-analyzed components back among the untouched ones from the previous scan.
+
+    Components keep their previous order; a component whose path was removed
+    is dropped unless the model re-analyzed it. Top-level fields missing from
+    a cut-off answer fall back to the previous analysis.
+    """
+    fresh = {
+        _normalize(component["file_name"]): component
+        for component in analysis.data.get("analyzed_components", [])
+    }
+    merged: List[dict[str, Any]] = []
+    for component in plan.previous.get("analyzed_components", []):
+        path = _normalize(component["file_name"])
+        if path in fresh:
+            merged.append(fresh.pop(path))
+        elif path not in plan.removed_paths:
+            merged.append(component)
+    merged.extend(fresh.values())
+
+    data = {**analysis.data, "analyzed_components": merged}
+    for name in analysis.missing_fields:
+        if name in plan.previous:
+            data[name] = plan.previous[name]
+    return ParsedAnalysis(
+        data,
+        partial=analysis.partial,
+        missing_fields=analysis.missing_fields,
+        invalid_components=analysis.invalid_components,
+    )
@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SessionLocal
+from models.scan_cache import ScanCacheEntry
+from utils.Cache.backends import CacheBackend, create_backend
+from utils.Http.fast_json import dumps, loads
+
+
+logger = logging.getLogger(__name__)
+
+# Bounds and lifetime of cached scan results; results are their encoded JSON
+SCAN_CACHE_MAX_ENTRIES = int(os.getenv("SCAN_CACHE_MAX_ENTRIES", "256"))
+SCAN_CACHE_MAX_BYTES = int(os.getenv("SCAN_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+SCAN_CACHE_TTL_SECONDS = float(os.getenv("SCAN_CACHE_TTL_SECONDS", "3600"))
+# Results of single chunks (the map step of chunked scans), bounded apart so a
+# large scan's chunks never evict whole scans
+SCAN_CHUNK_CACHE_MAX_ENTRIES = int(
+    os.getenv("SCAN_CHUNK_CACHE_MAX_ENTRIES", str(SCAN_CACHE_MAX_ENTRIES * 4))
+)
+# Also persist results in the scan_cache table, which outlives the cache backend
+SCAN_CACHE_DATABASE = os.getenv("SCAN_CACHE_DATABASE", "true").lower() == "true"
+
+
+@dataclass(frozen=True)
+class ScanCacheKey:
+    repo_full_name: str
+    commit_sha: str
+    prompt_hash: str
+    model: str
+
+    @property
+    def digest(self) -> str:
+        raw = "\0".join(
+            (self.repo_full_name.lower(), self.commit_sha, self.prompt_hash, self.model)
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CachedScan:
+    """A result's JSON, encoded once and then spliced into every response.
+
+    Hits are served from `encoded`; the parsed `result` is only decoded when
+    something reads it.
+    """
+
+    def __init__(self, encoded: bytes, result: Optional[dict[str, Any]] = None) -> None:
+        self.encoded = encoded
+        self._result = result
+
+    @classmethod
+    def of(cls, result: dict[str, Any]) -> "CachedScan":
+        return cls(dumps(result), result)
+
+    @property
+    def result(self) -> dict[str, Any]:
+        # Threads racing here decode the same bytes; either copy will do
+        if self._result is None:
+            self._result = loads(self.encoded)
+        return self._result
+
+
+def hash_prompt_template(prompt_template: str) -> str:
+    """Hash the prompt template so editing it invalidates previously cached scans."""
+    return hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+
+
+class ScanResultCache:
+    """Two-tier cache for parsed scan results.
+
+    Lookups hit the cache backend first (per process, or shared by the
+    workers, see CACHE_BACKEND) and fall back to the `scan_cache` table;
+    database hits are promoted into the backend. Results are stored there as
+    their encoded JSON. Database errors are logged and treated as misses so a
+    cache outage never fails a scan.
+    """
+
+    def __init__(
+        self,
+        results: CacheBackend,
+        latest_keys: Optional[CacheBackend],
+        use_database: bool = True,
+    ):
+        self.results = results
+        # (repo, prompt hash, model) -> key of the most recently stored scan; None
+        # for caches whose entries are never looked up by lineage
+        self.latest_keys = latest_keys
+        self.use_database = use_database
+
+    @staticmethod
+    def _lineage(repo_full_name: str, prompt_hash: str, model: str) -> str:
+        raw = "\0".join((repo_full_name.lower(), prompt_hash, model))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _latest_key(self, lineage: str) -> Optional[ScanCacheKey]:
+        if self.latest_keys is None:
+            return None
+        stored = self.latest_keys.get(lineage)
+        return ScanCacheKey(*loads(stored)) if stored is not None else None
+
+    def _cached(self, digest: str) -> Optional[CachedScan]:
+        encoded = self.results.get(digest)
+        return CachedScan(encoded) if encoded is not None else None
+
+    def latest(
+        self, repo_full_name: str, prompt_hash: str, model: str
+    ) -> Optional[tuple[ScanCacheKey, dict[str, Any]]]:
+        """The most recent stored scan of a repo with this prompt and model, if any."""
+        key = self._latest_key(self._lineage(repo_full_name, prompt_hash, model))
+        if key is not None:
+            cached = self._cached(key.digest)
+            if cached is not None:
+                return key, cached.result
+
+        if not self.use_database:
+            return None
+
+        try:
+            with SessionLocal() as db:
+                entry = db.scalars(
+                    select(ScanCacheEntry)
+                    .where(
+                        ScanCacheEntry.repo_full_name == repo_full_name,
+                        ScanCacheEntry.prompt_hash == prompt_hash,
+                        ScanCacheEntry.model == model,
+                    )
+                    .order_by(ScanCacheEntry.created_at.desc())
+                    .limit(1)
+                ).first()
+                if entry is None:
+                    return None
+                key = ScanCacheKey(entry.repo_full_name, entry.commit_sha, prompt_hash, model)
+                return key, entry.result
+        except SQLAlchemyError as e:
+            logger.warning("Scan cache latest lookup failed: %s", e)
+            return None
+
+    def get(self, key: ScanCacheKey) -> tuple[Optional[CachedScan], Optional[str]]:
+        """Return `(entry, tier)`: the tier is the backend's kind ("memory", "sqlite" or
+        "redis"), "database", or None on a miss."""
+        digest = key.digest
+        cached = self._cached(digest)
+        if cached is not None:
+            return cached, self.results.kind
+
+        if not self.use_database:
+            return None, None
+
+        try:
+            with SessionLocal() as db:
+                entry = db.get(ScanCacheEntry, digest)
+                result = entry.result if entry else None
+        except SQLAlchemyError as e:
+            logger.warning("Scan cache lookup failed: %s", e)
+            return None, None
+
+        if result is None:
+            return None, None
+        cached = CachedScan.of(result)
+        self.results.set(digest, cached.encoded)
+        return cached, "database"
+
+    def set(self, key: ScanCacheKey, result: dict[str, Any]) -> CachedScan:
+        """Store `result` in both tiers; returns it with its encoded JSON."""
+        digest = key.digest
+        cached = CachedScan.of(result)
+        self.results.set(digest, cached.encoded)
+        if self.latest_keys is not None:
+            self.latest_keys.set(
+                self._lineage(key.repo_full_name, key.prompt_hash, key.model),
+                dumps([key.repo_full_name, key.commit_sha, key.prompt_hash, key.model]),
+            )
+
+        if not self.use_database:
+            return cached
+
+        try:
+            with SessionLocal() as db:
+                db.merge(
+                    ScanCacheEntry(
+                        key=digest,
+                        repo_full_name=key.repo_full_name,
+                        commit_sha=key.commit_sha,
+                        prompt_hash=key.prompt_hash,
+                        model=key.model,
+                        result=result,
+                    )
+                )
+                db.commit()
+        except SQLAlchemyError as e:
+            logger.warning("Scan cache write failed: %s", e)
+        return cached
+
+
+scan_cache = ScanResultCache(
+    create_backend(
+        "scan_results",
+        max_entries=SCAN_CACHE_MAX_ENTRIES,
+        max_bytes=SCAN_CACHE_MAX_BYTES,
+        default_ttl=SCAN_CACHE_TTL_SECONDS,
+    ),
+    create_backend(
+        "scan_latest",
+        max_entries=SCAN_CACHE_MAX_ENTRIES,
+        default_ttl=SCAN_CACHE_TTL_SECONDS,
+    ),
+    use_database=SCAN_CACHE_DATABASE,
+)
+
+chunk_cache = ScanResultCache(
+    create_backend(
+        "scan_chunks",
+        max_entries=SCAN_CHUNK_CACHE_MAX_ENTRIES,
+        max_bytes=SCAN_CACHE_MAX_BYTES,
+        default_ttl=SCAN_CACHE_TTL_SECONDS,
+    ),
+    latest_keys=None,
+    use_database=SCAN_CACHE_DATABASE,
+)
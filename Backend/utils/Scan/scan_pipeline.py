@@ -0,0 +1,545 @@
+import logging
+import os
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Optional
+
+from utils.GithubScrapper.archive import get_repo_archive
+from utils.GithubScrapper.github_client import GithubClient, GithubRepo
+from utils.Http.fast_json import RawJSON, splice
+from utils.GithubScrapper.Scrapper import (
+    FolderStructure,
+    get_file_content,
+    get_head_commit_sha,
+    get_repo_tree,
+)
+from utils.Observability.log_pipeline import LogPayload
+from utils.Observability.metrics import (
+    count_github_calls,
+    record_llm_usage,
+    record_scan_github_calls,
+    stage_timer,
+)
+from schemas.routesSchemas.scan import ScanAnalysis
+from utils.Scan.analysis_parser import (
+    ParsedAnalysis,
+    analysis_schema_fingerprint,
+    parse_analysis,
+)
+from utils.Scan.chunked import (
+    ChunkedAnalysis,
+    analyze_chunks,
+    build_reduce_prompt,
+    chunking_fingerprint,
+    merge_chunks,
+    plan_chunks,
+)
+from utils.Scan.deep_scan import (
+    DEEP_SCAN_MAX_FILE_BYTES,
+    DEEP_SCAN_MAX_FILES,
+    KeyFilesPrompt,
+    build_key_files_prompt,
+    deep_scan_fingerprint,
+    key_file_scorer,
+    key_files_from_archive,
+)
+from utils.Scan.google_genai import GENAI_MODEL, shared_genai_client
+from utils.Scan.prompt_builder import (
+    build_ignore_rules,
+    build_tree_prompt,
+    tree_prompt_fingerprint,
+)
+from utils.Scan.rescan import (
+    SCAN_INCREMENTAL,
+    RescanPlan,
+    build_rescan_prompt,
+    load_rescan_template,
+    merge_rescan,
+    plan_rescan,
+)
+from utils.Scan.scan_cache import CachedScan, ScanCacheKey, hash_prompt_template, scan_cache
+from utils.Scan.single_flight import scan_flights
+
+if TYPE_CHECKING:
+    from google.genai import types
+
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE_PATH = "prompts/run1.txt"
+
+# "api": git tree plus one request per file; "archive": one streamed tarball download
+SCAN_INGESTION = os.getenv("SCAN_INGESTION", "api").lower()
+
+# Progress stages reported while a scan runs, in order
+STAGE_FETCHING_TREE = "fetching_tree"
+STAGE_FETCHING_ARCHIVE = "fetching_archive"  # replaces the fetch stages in archive mode
+STAGE_FETCHING_README = "fetching_readme"
+STAGE_FETCHING_FILES = "fetching_files"  # deep scans only
+STAGE_ANALYZING_CHUNKS = "analyzing_chunks"  # large repos only: the map step
+STAGE_ANALYZING = "analyzing"
+STAGE_PARSING = "parsing"
+
+StageCallback = Callable[[str], None]
+
+
+@dataclass
+class ScanContext:
+    """Everything known about a scan before any expensive work is done."""
+
+    repo: GithubRepo
+    commit_sha: str
+    prompt_template: str
+    cache_key: ScanCacheKey
+    # Deep scans also read the contents of key source files
+    deep: bool = False
+    cached: Optional[CachedScan] = None
+    cache_tier: Optional[str] = None
+    github_calls: int = 0
+    # Set when only the changes since the last scanned commit get analyzed
+    rescan: Optional[RescanPlan] = None
+    # Set when the tree was analyzed in parts; the prompt is then the reduce step
+    chunked: Optional[ChunkedAnalysis] = None
+
+    def cached_outcome(self) -> Optional["ScanOutcome"]:
+        if self.cached is None:
+            return None
+        return ScanOutcome(
+            self.cached,
+            self.cache_key,
+            self.cache_tier,
+            rescan=self.rescan.summary(0) if self.rescan else None,
+        )
+
+
+@dataclass
+class ScanOutcome:
+    # The result and its JSON, the JSON as stored when it came from the scan cache
+    result: CachedScan
+    cache_key: ScanCacheKey
+    cache_tier: Optional[str] = None
+    # Salvaged from cut-off model output; such results are never cached
+    partial: bool = False
+    missing_fields: list[str] = field(default_factory=list)
+    # Base commit and diff size when the result came from an incremental rescan
+    rescan: Optional[dict[str, Any]] = None
+    # Chunk counts when the result came from a map-reduce scan
+    chunks: Optional[dict[str, Any]] = None
+    # Shared from an identical scan another request already had in flight
+    coalesced: bool = False
+
+    @property
+    def data(self) -> dict[str, Any]:
+        return self.result.result
+
+    def to_response(self) -> dict[str, Any]:
+        return self._envelope(self.data)
+
+    def to_response_json(self) -> RawJSON:
+        """`to_response()` encoded, splicing in the cached JSON of `data` rather than re-encoding it."""
+        return RawJSON(splice(self._envelope(RawJSON(self.result.encoded))))
+
+    def _envelope(self, data: Any) -> dict[str, Any]:
+        response: dict[str, Any] = {"status": "success", "data": data}
+        if self.partial:
+            response["status"] = "partial"
+            response["missing_fields"] = self.missing_fields
+        extra: dict[str, Any] = {}
+        if self.rescan is not None:
+            extra["rescan"] = self.rescan
+        if self.chunks is not None:
+            extra["chunks"] = self.chunks
+        if self.coalesced:
+            extra["coalesced"] = True
+        return {
+            "message": (
+                "Scan completed with a partial result"
+                if self.partial
+                else "Scan completed successfully"
+            ),
+            "response": response,
+            "cache": {
+                "hit": self.cache_tier is not None,
+                "tier": self.cache_tier,
+                "key": self.cache_key.digest,
+                "commit_sha": self.cache_key.commit_sha,
+            },
+            **extra,
+        }
+
+
+def load_prompt_template() -> str:
+    logger.debug("📜 Loading prompt template...")
+    with open(PROMPT_TEMPLATE_PATH, "r", encoding="utf-8") as file:
+        prompt_template = file.read()
+    logger.debug("✅ Loaded prompt template.")
+    return prompt_template
+
+
+def prepare_scan(
+    github_client: GithubClient, repo_name: str, deep: bool = False
+) -> ScanContext:
+    """Resolve the repo head and look the scan up in the result cache."""
+    with count_github_calls() as calls, stage_timer("github_head"):
+        repo = github_client.get_repo(repo_name)
+        commit_sha = get_head_commit_sha(repo)
+    prompt_template = load_prompt_template()
+
+    # Same repo, commit, prompt and model always produce a reusable result
+    prompt_inputs = (
+        f"{prompt_template}\0{tree_prompt_fingerprint()}\0{analysis_schema_fingerprint()}"
+        f"\0{chunking_fingerprint()}"
+    )
+    if deep:
+        prompt_inputs += f"\0{deep_scan_fingerprint()}"
+    cache_key = ScanCacheKey(
+        repo_full_name=repo.full_name,
+        commit_sha=commit_sha,
+        prompt_hash=hash_prompt_template(prompt_inputs),
+        model=GENAI_MODEL,
+    )
+    with stage_timer("cache_lookup"):
+        cached, cache_tier = scan_cache.get(cache_key)
+    ctx = ScanContext(
+        repo=repo,
+        commit_sha=commit_sha,
+        prompt_template=prompt_template,
+        cache_key=cache_key,
+        deep=deep,
+        cached=cached,
+        cache_tier=cache_tier,
+        github_calls=calls[0],
+    )
+    if cached is None and SCAN_INCREMENTAL:
+        _plan_rescan(ctx)
+    if ctx.cached is None and ctx.rescan is None and github_client.limiter is not None:
+        # Fail now rather than after spending the rest of the token's budget
+        github_client.limiter.require(github_client.token, estimate_github_calls(deep))
+    if ctx.cached is not None:
+        logger.debug("⚡ Scan cache hit (%s) for %s@%s", ctx.cache_tier, repo.full_name, commit_sha)
+        # A cache hit ends the scan here
+        record_scan_github_calls(ctx.github_calls)
+    return ctx
+
+
+def estimate_github_calls(deep: bool = False) -> int:
+    """GitHub requests a full scan makes after `prepare_scan`; truncated trees need more."""
+    if SCAN_INGESTION == "archive":
+        return 1
+    # Tree, README and .gitignore, plus one blob per key file
+    return 3 + (DEEP_SCAN_MAX_FILES if deep else 0)
+
+
+def _plan_rescan(ctx: ScanContext) -> None:
+    """Switch a cache miss to an incremental rescan if an earlier commit was scanned."""
+    key = ctx.cache_key
+    with stage_timer("cache_lookup"):
+        latest = scan_cache.latest(key.repo_full_name, key.prompt_hash, key.model)
+    if latest is None:
+        return
+    previous_key, previous = latest
+    if previous_key.commit_sha == ctx.commit_sha:
+        return
+
+    try:
+        with count_github_calls() as calls, stage_timer("github_compare"):
+            plan = plan_rescan(ctx.repo, previous_key.commit_sha, ctx.commit_sha, previous)
+    except Exception as e:
+        # A failed comparison only costs the saving, never the scan
+        logger.warning("⚠️ Could not diff %s for a rescan: %s", ctx.repo.full_name, e)
+        return
+    finally:
+        ctx.github_calls += calls[0]
+    if plan is None:
+        return
+
+    ctx.rescan = plan
+    if not plan.changed:
+        # Nothing the analysis looks at changed: the previous result still holds
+        with stage_timer("cache_store"):
+            ctx.cached = scan_cache.set(key, previous)
+        ctx.cache_tier = "previous_commit"
+    logger.info(
+        "🔁 Rescan of %s from %s: %s files changed, %s components affected",
+        ctx.repo.full_name,
+        previous_key.commit_sha[:7],
+        len(plan.changed),
+        len(plan.affected),
+    )
+
+
+def build_scan_prompt(
+    ctx: ScanContext, on_stage: Optional[StageCallback] = None
+) -> str:
+    """Fetch the folder structure and README (and key files for deep scans) and format the GenAI prompt.
+
+    Incremental rescans need nothing more from GitHub: their prompt is the
+    previous analysis plus the diff fetched by `prepare_scan`.
+    """
+    if ctx.rescan is not None:
+        with stage_timer("prompt_build"):
+            return build_rescan_prompt(ctx.rescan, load_rescan_template())
+
+    with count_github_calls() as calls:
+        if SCAN_INGESTION == "archive":
+            snapshot = _fetch_via_archive(ctx, on_stage)
+        else:
+            snapshot = _fetch_via_api(ctx, on_stage)
+    ctx.github_calls += calls[0]
+    fileStructure, readmeContent = snapshot.structure, snapshot.readme
+    gitignore, keyFiles = snapshot.gitignore, snapshot.key_files
+    if keyFiles is not None:
+        stats = keyFiles.stats
+        logger.info(
+            "🔑 Key files: %s packed (%s tokens) of %s fetched, "
+            "%s selected from %s candidates, %s duplicates, %s failed",
+            stats.packed,
+            stats.tokens,
+            stats.fetched,
+            stats.selected,
+            stats.candidates,
+            stats.duplicates,
+            stats.failed,
+        )
+
+    rules = build_ignore_rules(gitignore)
+    with stage_timer("prompt_build"):
+        chunks = plan_chunks(fileStructure, rules)
+    if chunks:
+        # Too big for one prompt: analyze the parts concurrently, then reduce
+        _report(on_stage, STAGE_ANALYZING_CHUNKS)
+        logger.info("🧩 Analyzing %s in %s chunks", ctx.repo.full_name, len(chunks))
+        with stage_timer("llm_map"):
+            ctx.chunked = analyze_chunks(chunks, ctx.repo.full_name, generate_json)
+        logger.info("🧩 Chunks done: %s", ctx.chunked.summary())
+        with stage_timer("prompt_build"):
+            prompt = build_reduce_prompt(ctx.chunked, fileStructure, readmeContent, gitignore)
+        return _with_key_files(prompt, keyFiles)
+
+    logger.debug("📝 Formatting prompt...")
+    with stage_timer("prompt_build"):
+        tree = build_tree_prompt(fileStructure, gitignore=gitignore)
+    logger.info(
+        "🌳 Folder structure: %s tokens (JSON would be %s, saved %.0f%%, %s ignored, %s collapsed)",
+        tree.stats.compact_tokens,
+        tree.stats.json_tokens,
+        tree.stats.saved_ratio * 100,
+        tree.stats.ignored_entries,
+        tree.stats.collapsed_dirs,
+    )
+    prompt = (
+        f"### Prompt for Google GenAI\n\n {ctx.prompt_template}\n\n  ### README Content:\n\n{readmeContent}\n\n"
+        "### Folder Structure (one entry per line, directories end with '/', "
+        "two-space indentation shows nesting, bracketed lines summarize omitted files):\n\n"
+        f"{tree.text}"
+    )
+    prompt = _with_key_files(prompt, keyFiles)
+    logger.debug("✅ Formatted prompt (%d chars)", len(prompt))
+    return prompt
+
+
+def _with_key_files(prompt: str, keyFiles: Optional[KeyFilesPrompt]) -> str:
+    if keyFiles is None or not keyFiles.text:
+        return prompt
+    return (
+        f"{prompt}\n\n### Key Source Files (highest-signal files of the repository, "
+        f"judge code quality from these):\n\n{keyFiles.text}"
+    )
+
+
+@dataclass
+class RepoSnapshot:
+    """The parts of a repository the prompt is built from."""
+
+    structure: FolderStructure
+    readme: str
+    gitignore: Optional[str] = None
+    key_files: Optional[KeyFilesPrompt] = None
+
+
+def _fetch_via_api(ctx: ScanContext, on_stage: Optional[StageCallback]) -> RepoSnapshot:
+    """One recursive tree call, then README, .gitignore and (deep) key files one by one."""
+    _report(on_stage, STAGE_FETCHING_TREE)
+    with stage_timer("github_tree"):
+        repoTree = get_repo_tree(ctx.repo, ctx.commit_sha)
+    logger.debug("📂 Folder structure retrieved successfully.")
+
+    _report(on_stage, STAGE_FETCHING_README)
+    with stage_timer("github_readme"):
+        readmeContent = get_file_content(ctx.repo, "README.md")
+    logger.debug("📄 README content retrieved successfully.")
+
+    gitignore = None
+    if isinstance(repoTree.structure.get(".gitignore"), str):
+        with stage_timer("github_gitignore"):
+            gitignore = get_file_content(ctx.repo, ".gitignore")
+
+    keyFiles = None
+    if ctx.deep:
+        _report(on_stage, STAGE_FETCHING_FILES)
+        with stage_timer("github_files"):
+            keyFiles = build_key_files_prompt(
+                ctx.repo, repoTree.blobs, build_ignore_rules(gitignore)
+            )
+    return RepoSnapshot(repoTree.structure, readmeContent, gitignore, keyFiles)
+
+
+def _fetch_via_archive(ctx: ScanContext, on_stage: Optional[StageCallback]) -> RepoSnapshot:
+    """Everything from a single streamed tarball download."""
+    _report(on_stage, STAGE_FETCHING_ARCHIVE)
+    with stage_timer("github_archive"):
+        archive = get_repo_archive(
+            ctx.repo,
+            ctx.commit_sha,
+            scorer=key_file_scorer(build_ignore_rules()) if ctx.deep else None,
+            max_samples=DEEP_SCAN_MAX_FILES,
+            max_sample_bytes=DEEP_SCAN_MAX_FILE_BYTES,
+        )
+    logger.debug(
+        "📦 Archive read: %s bytes, %s entries, %s files sampled",
+        archive.stats.compressed_bytes,
+        archive.stats.entries,
+        len(archive.samples),
+    )
+    if archive.readme is None:
+        # Same outcome as the API path, where fetching a missing README fails
+        raise ValueError("Path README.md does not point to a file.")
+
+    keyFiles = None
+    if ctx.deep:
+        keyFiles = key_files_from_archive(archive, build_ignore_rules(archive.gitignore))
+    return RepoSnapshot(archive.structure, archive.readme, archive.gitignore, keyFiles)
+
+
+def generation_config(schema: type = ScanAnalysis) -> "types.GenerateContentConfig":
+    from google.genai import types
+
+    # JSON mode: the model must answer with a document matching the schema
+    return types.GenerateContentConfig(
+        max_output_tokens=3000,
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
+
+
+def extract_response_text(response: "types.GenerateContentResponse") -> str:
+    # Validate response structure before accessing attributes
+    if not response.candidates or not response.candidates[0].content:
+        raise ValueError("Invalid response: Missing candidates or content.")
+
+    content = response.candidates[0].content
+    if not content.parts or not content.parts[0].text:
+        raise ValueError("Invalid response: Missing parts or text in content.")
+
+    return content.parts[0].text
+
+
+def generate_json(prompt: str, schema: type = ScanAnalysis) -> str:
+    """One blocking JSON-mode model call; returns the answer text."""
+    with stage_timer("llm_generate"):
+        response = shared_genai_client().models.generate_content(
+            model=GENAI_MODEL,
+            contents=prompt,
+            config=generation_config(schema),
+        )
+    record_llm_usage(response.usage_metadata)
+    return extract_response_text(response)
+
+
+def parse_scan_output(raw_text: str) -> ParsedAnalysis:
+    """Parse and validate the model's answer (raw JSON, or wrapped in a ```json block)."""
+    logger.debug("Raw response text from AI:\n%s", LogPayload(raw_text))
+    with stage_timer("parse"):
+        return parse_analysis(raw_text)
+
+
+def execute_scan(
+    github_client: GithubClient,
+    repo_name: str,
+    on_stage: Optional[StageCallback] = None,
+    deep: bool = False,
+) -> ScanOutcome:
+    """Run a full scan synchronously. Blocking: call it from a worker thread.
+
+    Identical scans already in flight (same cache key) are waited on rather
+    than repeated; the waiter does not see the leader's progress stages.
+    """
+    ctx = prepare_scan(github_client, repo_name, deep)
+    cached = ctx.cached_outcome()
+    if cached is not None:
+        return cached
+
+    outcome, shared = scan_flights.run(
+        ctx.cache_key.digest, lambda: complete_scan(ctx, on_stage)
+    )
+    return replace(outcome, coalesced=True) if shared else outcome
+
+
+def complete_scan(
+    ctx: ScanContext, on_stage: Optional[StageCallback] = None
+) -> ScanOutcome:
+    """Everything after a cache miss: fetch, prompt, generate, parse and store. Blocking."""
+    prompt = build_scan_prompt(ctx, on_stage)
+
+    _report(on_stage, STAGE_ANALYZING)
+    logger.debug("🔍 Running scan with Google GenAI...")
+    logger.debug("Prompt for Google GenAI: %s", LogPayload(prompt))
+    raw_text = generate_json(prompt)
+
+    _report(on_stage, STAGE_PARSING)
+    return finish_scan(ctx, parse_scan_output(raw_text))
+
+
+async def stream_scan_output(prompt: str) -> AsyncIterator[str]:
+    """Yield the model's answer text as it is generated."""
+    logger.debug("🔍 Streaming scan with Google GenAI...")
+    stream = await shared_genai_client().aio.models.generate_content_stream(
+        model=GENAI_MODEL,
+        contents=prompt,
+        config=generation_config(),
+    )
+    usage = None
+    try:
+        with stage_timer("llm_stream"):
+            async for chunk in stream:
+                # Every chunk repeats the running totals; the last one is final
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    yield chunk.text
+    finally:
+        # Closing early (malformed output, client gone) stops the generation
+        await stream.aclose()
+        record_llm_usage(usage)
+
+
+def finish_scan(ctx: ScanContext, analysis: ParsedAnalysis) -> ScanOutcome:
+    """Store a parsed answer in the scan cache, unless it was salvaged from a cut-off one."""
+    reanalyzed = len(analysis.data.get("analyzed_components", []))
+    if ctx.rescan is not None:
+        analysis = merge_rescan(ctx.rescan, analysis)
+    if ctx.chunked is not None:
+        analysis = merge_chunks(ctx.chunked, analysis)
+    if analysis.partial:
+        logger.warning(
+            "⚠️ Partial analysis for %s: missing %s, %s invalid components",
+            ctx.repo.full_name,
+            analysis.missing_fields,
+            analysis.invalid_components,
+        )
+        result = CachedScan.of(analysis.data)
+    else:
+        with stage_timer("cache_store"):
+            result = scan_cache.set(ctx.cache_key, analysis.data)
+    record_scan_github_calls(ctx.github_calls)
+    return ScanOutcome(
+        result,
+        ctx.cache_key,
+        partial=analysis.partial,
+        missing_fields=analysis.missing_fields,
+        rescan=ctx.rescan.summary(reanalyzed) if ctx.rescan else None,
+        chunks=ctx.chunked.summary() if ctx.chunked else None,
+    )
+
+
+def _report(on_stage: Optional[StageCallback], stage: str) -> None:
+    if on_stage is not None:
+        on_stage(stage)
@@ -0,0 +1,201 @@
+import base64
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import Integer, bindparam, func, literal_column, select, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import SessionLocal
+from models.scan_result import COMPONENTS_SQL, SUMMARY_TSVECTOR_SQL, ScanResult, score_sql
+from models.user import UserProfile
+from schemas.routesSchemas.scan import ScanSearchQuery
+from utils.Scan.scan_pipeline import ScanOutcome
+
+
+logger = logging.getLogger(__name__)
+
+# Keep every user's latest scan of each repo for candidate search
+SCAN_STORE_RESULTS = os.getenv("SCAN_STORE_RESULTS", "true").lower() == "true"
+
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+_UPDATED_COLUMNS = ("commit_sha", "model", "result", "scanned_at")
+
+
+def save_scan_result(user_id: Optional[str], outcome: ScanOutcome) -> None:
+    """Store `outcome` as the user's latest scan of its repo. Blocking.
+
+    Partial results are skipped, as in the scan cache, and so are scans
+    without a valid user id. So is rewriting a stored scan of the same commit
+    and model, as every cache hit would otherwise do. Failures are logged,
+    never raised: storing is a side effect of a scan that already succeeded.
+    """
+    if not SCAN_STORE_RESULTS or outcome.partial or not user_id:
+        return
+    try:
+        owner = UUID(str(user_id))
+    except ValueError:
+        logger.debug("Not storing scan for non-UUID user id %r", user_id)
+        return
+
+    key = outcome.cache_key
+    try:
+        with SessionLocal() as db:
+            stored = db.execute(
+                select(ScanResult.commit_sha, ScanResult.model).where(
+                    ScanResult.user_id == owner,
+                    ScanResult.repo_full_name == key.repo_full_name,
+                )
+            ).first()
+            if stored is not None and tuple(stored) == (key.commit_sha, key.model):
+                return
+            values = {
+                "id": uuid4(),
+                "user_id": owner,
+                "repo_full_name": key.repo_full_name,
+                "commit_sha": key.commit_sha,
+                "model": key.model,
+                "result": outcome.data,
+                "scanned_at": datetime.now(timezone.utc),
+            }
+            upsert = _UPSERTS.get(db.get_bind().dialect.name)
+            if upsert is None:
+                existing = db.scalars(
+                    select(ScanResult).where(
+                        ScanResult.user_id == owner,
+                        ScanResult.repo_full_name == key.repo_full_name,
+                    )
+                ).first()
+                if existing is None:
+                    db.add(ScanResult(**values))
+                else:
+                    for name in _UPDATED_COLUMNS:
+                        setattr(existing, name, values[name])
+            else:
+                statement = upsert(ScanResult).values(**values)
+                db.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["user_id", "repo_full_name"],
+                        set_={name: statement.excluded[name] for name in _UPDATED_COLUMNS},
+                        # A concurrent save of the same scan already wrote it
+                        where=tuple_(ScanResult.commit_sha, ScanResult.model)
+                        != tuple_(statement.excluded.commit_sha, statement.excluded.model),
+                    )
+                )
+            db.commit()
+    except SQLAlchemyError as e:
+        logger.warning("⚠️ Storing scan of %s failed: %s", key.repo_full_name, e)
+
+
+def _score(name: str) -> Any:
+    # Literal SQL rather than JSON operators with bound keys, so it matches the index expression
+    return literal_column(score_sql(name), Integer)
+
+
+def encode_cursor(sort: str, value: int, result_id: UUID) -> str:
+    raw = json.dumps([sort, value, str(result_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[int, UUID]:
+    """The (score, id) a page ended on; ValueError for cursors from another sort or garbage."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, result_id = json.loads(raw)
+        if cursor_sort != sort:
+            raise ValueError("cursor belongs to another sort order")
+        return int(value), UUID(result_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+
+
+async def search_scan_results(db: AsyncSession, query: ScanSearchQuery) -> dict[str, Any]:
+    """One keyset page of stored scans matching `query`, best `sort` score first.
+
+    Score filters and ordering use the per-field expression indexes; tag,
+    file and text filters use the GIN indexes and need PostgreSQL.
+    """
+    postgres = db.get_bind().dialect.name == "postgresql"
+    if (query.tags or query.files or query.q) and not postgres:
+        raise ValueError("Tag, file and text filters need PostgreSQL")
+    if postgres:
+        # Selectivity swings with every filter value; a cached generic plan
+        # (used after five runs of a prepared statement) can be 20x slower
+        await db.execute(text("SET LOCAL plan_cache_mode = force_custom_plan"))
+
+    sort = _score(query.sort)
+    statement = select(
+        ScanResult.id,
+        ScanResult.user_id,
+        ScanResult.repo_full_name,
+        ScanResult.commit_sha,
+        ScanResult.scanned_at,
+        ScanResult.result["score"].label("score"),
+        ScanResult.result["summary"].label("summary"),
+        sort.label("sort_value"),
+    )
+    for name, minimum in query.min_scores().items():
+        statement = statement.where(_score(name) >= minimum)
+    components = literal_column(COMPONENTS_SQL, JSONB)
+    for tag in query.tags:
+        statement = statement.where(components.op("@>")(bindparam(None, [{"tags": [tag]}], JSONB)))
+    for file_name in query.files:
+        statement = statement.where(
+            components.op("@>")(bindparam(None, [{"file_name": file_name}], JSONB))
+        )
+    if query.q:
+        statement = statement.where(
+            literal_column(SUMMARY_TSVECTOR_SQL).op("@@")(func.plainto_tsquery("english", query.q))
+        )
+    if query.cursor:
+        value, after_id = decode_cursor(query.cursor, query.sort)
+        statement = statement.where(tuple_(sort, ScanResult.id) < tuple_(value, after_id))
+
+    rows = (
+        await db.execute(
+            statement.order_by(sort.desc(), ScanResult.id.desc()).limit(query.limit + 1)
+        )
+    ).all()
+    page, more = rows[: query.limit], len(rows) > query.limit
+
+    profiles: dict[UUID, dict[str, Any]] = {}
+    if page:
+        for profile in await db.scalars(
+            select(UserProfile).where(UserProfile.user_id.in_({row.user_id for row in page}))
+        ):
+            profiles.setdefault(
+                profile.user_id,
+                {
+                    "first_name": profile.first_name,
+                    "last_name": profile.last_name,
+                    "github_url": profile.github_url,
+                    "college": profile.college,
+                    "city": profile.city,
+                    "country": profile.country,
+                },
+            )
+
+    return {
+        "results": [
+            {
+                "id": str(row.id),
+                "user_id": str(row.user_id),
+                "repo_full_name": row.repo_full_name,
+                "commit_sha": row.commit_sha,
+                "scanned_at": row.scanned_at.isoformat(),
+                "score": row.score,
+                "summary": row.summary,
+                "profile": profiles.get(row.user_id),
+            }
+            for row in page
+        ],
+        "next_cursor": (
+            encode_cursor(query.sort, page[-1].sort_value, page[-1].id) if more else None
+        ),
+    }
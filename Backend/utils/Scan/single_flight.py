@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from utils.Observability.metrics import record_coalesced_request
+
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Runs at most one computation per key; callers asking for a key in flight share its result.
+
+    Works across threads and the event loop alike: blocking callers wait on
+    the shared future, async callers await it without holding a thread. The
+    shared future cannot be cancelled, so a waiter that goes away (a client
+    disconnecting, a cancelled task) never takes the work down with it.
+    Failures are shared too, and the next caller after one starts afresh.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.leaders = 0
+        self.coalesced = 0
+        self._flights: dict[str, Future[T]] = {}
+        self._lock = threading.Lock()
+        # Strong references to detached leaders so they are not garbage collected
+        self._tasks: set[asyncio.Future[None]] = set()
+
+    def _join(self, key: str) -> tuple[Future[T], bool]:
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                record_coalesced_request(self.name)
+                return future, False
+            future = Future()
+            # A running future ignores cancel(), whoever calls it
+            future.set_running_or_notify_cancel()
+            self._flights[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _lead(self, key: str, future: Future[T], fn: Callable[[], T]) -> None:
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def run(self, key: str, fn: Callable[[], T]) -> tuple[T, bool]:
+        """Blocking: compute `fn()` or wait for the flight already computing `key`.
+
+        Returns the result and whether it came from another caller's flight.
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._lead(key, future, fn)
+        return future.result(), not leader
+
+    async def arun(self, key: str, fn: Callable[[], T]) -> tuple[T, bool]:
+        """`run` for the event loop; a leader's blocking `fn` runs on the thread pool."""
+        future, leader = self._join(key)
+        if leader:
+            # Detached from this caller, so cancelling it leaves the work running for the others
+            task = asyncio.ensure_future(run_in_threadpool(self._lead, key, future, fn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future)), not leader
+
+    async def join(self, key: str) -> Optional[T]:
+        """Wait for the flight computing `key` if there is one; None when there is not."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is None:
+                return None
+            self.coalesced += 1
+            record_coalesced_request(self.name)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+
+# Scans keyed by their cache key: repo, commit, prompt inputs and model
+scan_flights: SingleFlight[Any] = SingleFlight("scan")
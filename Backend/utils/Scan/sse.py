@@ -0,0 +1,8 @@
+from typing import Any
+
+from utils.Http.fast_json import dumps_str
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {dumps_str(data)}\n\n"